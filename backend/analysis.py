@@ -0,0 +1,347 @@
+import numpy as np
+
+from downsample import shape_series
+from detection import DETECTION_DEFAULTS, BurnDetector
+from expressions import DERIVED_CHANNELS, compile_expression
+from filters import smooth
+
+NS_PER_SECOND = 1_000_000_000
+
+# Fields each chart series needs from the event collection
+SERIES_FIELDS = {
+    "manifold": ["Time", "Manifold"],
+    "dp": ["Time", "Tank", "Manifold"],
+    "tank": ["Time", "Tank"],
+    "tanklc": ["Time", "TankLC"],
+    "thrustlc": ["Time", "ThrustLC"],
+    "pressures": ["Time", "Chamber", "Manifold", "Tank"],
+    "mdot": ["Time", "TankLC"],
+    "stiff": ["Time", "Manifold", "Chamber"],
+}
+
+# Fields each scalar metric needs from the event collection
+METRIC_FIELDS = {
+    "peakThrust": ["ThrustLC"],
+    "peakChamber": ["Chamber"],
+    "peakMdot": ["Time", "TankLC"],
+    "dataRate": ["Time"],
+    "burntime": ["Time", "Manifold"],
+    "totalImpulse": ["Time", "Manifold", "ThrustLC"],
+    "averageThrust": ["Time", "Manifold", "ThrustLC"],
+}
+
+
+def event_fields(series=(), metrics=()):
+    # Union of the fields needed so the event is only read once
+    fields = set()
+    for name in series:
+        fields.update(SERIES_FIELDS[name])
+    for name in metrics:
+        fields.update(METRIC_FIELDS[name])
+    return sorted(fields)
+
+
+def extract_columns(data, fields):
+    # Walk the documents once, loading every requested field into a typed column:
+    # Time as int64 nanoseconds, channels as float64. Missing channel values become
+    # NaN; missing times are tracked in the "_time_valid" mask.
+    raw = {field: [] for field in fields}
+    for point in data:
+        for field in fields:
+            raw[field].append(point.get(field))
+
+    # A column that fails to parse only breaks the series/metrics that use it
+    columns = {"_count": len(raw[fields[0]]) if fields else 0}
+    errors = {}
+    for field, values in raw.items():
+        try:
+            if field == "Time":
+                valid = np.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+                columns["Time"] = np.array([value if value is not None else 0 for value in values], dtype=np.int64)
+                columns["_time_valid"] = valid
+            else:
+                columns[field] = np.array([value if value is not None else np.nan for value in values], dtype=np.float64)
+        except (TypeError, ValueError, OverflowError) as e:
+            errors[field] = e
+    return columns, errors
+
+
+def _require_times(columns):
+    if not columns["_time_valid"].all():
+        raise KeyError("Time")
+    return columns["Time"]
+
+
+def _require_channel(columns, channel):
+    values = columns[channel]
+    if np.isnan(values).any():
+        raise KeyError(channel)
+    return values
+
+
+def _series(time, **channels):
+    # Series are computed as a relative-time array plus named channel arrays
+    return time, channels
+
+
+def series_points(time, channels):
+    # Column arrays back to the row-oriented JSON shape the frontend expects
+    names = list(channels)
+    rows = zip(time.tolist(), *(channels[name].tolist() for name in names))
+    return [dict(zip(["Time", *names], row)) for row in rows]
+
+
+def _relative(times, start_time):
+    return (times - start_time) / NS_PER_SECOND
+
+
+def _relative_or_nan(columns, start_time):
+    return np.where(columns["_time_valid"], _relative(columns["Time"], start_time), np.nan)
+
+
+def derived_values(columns, start_time, expression, memo=None, filtering=None):
+    # (time, values) of an expression over the event columns, e.g. "integrate(ThrustLC)",
+    # optionally filtered (see filters.parse_filter). Rows without a time or with an
+    # undefined result (missing input, division by zero, the first row of a diff) are dropped.
+    time = _relative_or_nan(columns, start_time)
+    values = compile_expression(expression).evaluate(columns, time, memo, filtering)
+    mask = np.isfinite(time) & np.isfinite(values)
+    return time[mask], values[mask]
+
+
+def _derived_channel(columns, start_time, channel, filtering=None):
+    time, values = derived_values(columns, start_time, DERIVED_CHANNELS[channel], filtering=filtering)
+    return _series(time, **{channel: values})
+
+
+def series_manifold(columns, start_time):
+    manifold = columns["Manifold"]
+    mask = ~np.isnan(manifold)
+    # Rows without a timestamp are pinned to 0
+    time = np.where(columns["_time_valid"], _relative(columns["Time"], start_time), 0.0)
+    return _series(time[mask], Manifold=manifold[mask])
+
+
+def series_dp(columns, start_time):
+    return _derived_channel(columns, start_time, "DP")
+
+
+def _single_channel(columns, start_time, channel):
+    values = columns[channel]
+    mask = columns["_time_valid"] & ~np.isnan(values)
+    return _series(_relative(columns["Time"][mask], start_time), **{channel: values[mask]})
+
+
+def series_tank(columns, start_time):
+    return _single_channel(columns, start_time, "Tank")
+
+
+def series_tanklc(columns, start_time):
+    return _single_channel(columns, start_time, "TankLC")
+
+
+def series_thrustlc(columns, start_time):
+    return _single_channel(columns, start_time, "ThrustLC")
+
+
+def series_pressures(columns, start_time):
+    mask = columns["_time_valid"]
+    # Missing pressures default to 0
+    return _series(
+        _relative(columns["Time"][mask], start_time),
+        Chamber=np.nan_to_num(columns["Chamber"][mask], nan=0.0),
+        Manifold=np.nan_to_num(columns["Manifold"][mask], nan=0.0),
+        Tank=np.nan_to_num(columns["Tank"][mask], nan=0.0),
+    )
+
+
+def series_mdot(columns, start_time):
+    return _derived_channel(columns, start_time, "Mdot")
+
+
+def series_stiff(columns, start_time):
+    return _derived_channel(columns, start_time, "Stiffness")
+
+
+def _peak(values):
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        raise ValueError("max() arg is an empty sequence")
+    return float(values.max())
+
+
+def metric_peak_thrust(columns, detection):
+    return _peak(columns["ThrustLC"])
+
+
+def metric_peak_chamber(columns, detection):
+    return _peak(columns["Chamber"])
+
+
+def metric_peak_mdot(columns, detection):
+    _, mdot = derived_values(columns, int(_require_times(columns)[0]), DERIVED_CHANNELS["Mdot"])
+    # None tells the caller there was no valid mdot sample
+    return float(mdot.max()) if mdot.size else None
+
+
+def metric_data_rate(columns, detection):
+    times = _require_times(columns)
+    time_diffs = np.diff(times) / NS_PER_SECOND
+    avg_interval = float(time_diffs.mean()) if time_diffs.size else 0
+    return 1.0 / avg_interval
+
+
+def metric_burn_time(columns, detection):
+    # Burn times are reported without the ingest trimming buffer
+    detector = BurnDetector(**{**detection, "buffer_seconds": 0})
+    detector.push_many(_require_times(columns) / NS_PER_SECOND, _require_channel(columns, "Manifold"))
+    return detector.result()
+
+
+def _burn_impulse(columns, detection):
+    # Total impulse (lbf*s) and burning seconds over every completed burn, from the
+    # running integral of ThrustLC read off at each burn's start and end
+    start_time = int(_require_times(columns)[0])
+    burns = [burn for burn in metric_burn_time(columns, detection)["burns"] if burn["end_time"] is not None]
+    time, impulse = derived_values(columns, start_time, DERIVED_CHANNELS["Impulse"])
+    if not time.size:
+        raise KeyError("ThrustLC")
+
+    offset = start_time / NS_PER_SECOND
+    total = sum(
+        float(np.interp(burn["end_time"] - offset, time, impulse) - np.interp(burn["start_time"] - offset, time, impulse))
+        for burn in burns
+    )
+    return total, sum(burn["burn_time"] for burn in burns)
+
+
+def metric_total_impulse(columns, detection):
+    return _burn_impulse(columns, detection)[0]
+
+
+def metric_average_thrust(columns, detection):
+    impulse, burn_time = _burn_impulse(columns, detection)
+    # None when the burns have no duration to average over
+    return impulse / burn_time if burn_time > 0 else None
+
+
+SERIES = {
+    "manifold": series_manifold,
+    "dp": series_dp,
+    "tank": series_tank,
+    "tanklc": series_tanklc,
+    "thrustlc": series_thrustlc,
+    "pressures": series_pressures,
+    "mdot": series_mdot,
+    "stiff": series_stiff,
+}
+
+METRICS = {
+    "peakThrust": metric_peak_thrust,
+    "peakChamber": metric_peak_chamber,
+    "peakMdot": metric_peak_mdot,
+    "dataRate": metric_data_rate,
+    "burntime": metric_burn_time,
+    "totalImpulse": metric_total_impulse,
+    "averageThrust": metric_average_thrust,
+}
+
+
+def _check_columns(fields, column_errors):
+    for field in fields:
+        if field in column_errors:
+            raise column_errors[field]
+
+
+# Series defined by a derived channel, so filtering goes through the expression engine
+DERIVED_SERIES = {"dp": "DP", "stiff": "Stiffness", "mdot": "Mdot"}
+
+
+def filtered_series(columns, start_time, name, filtering):
+    # Full-resolution (time, channels) of a series with a filter applied to the
+    # stored channels it reads; mdot uses the filter's derivative instead
+    if name in DERIVED_SERIES:
+        return _derived_channel(columns, start_time, DERIVED_SERIES[name], filtering)
+
+    time = _relative_or_nan(columns, start_time)
+    smoothed = dict(columns)
+    for field in SERIES_FIELDS[name]:
+        if field != "Time":
+            smoothed[field] = smooth(columns[field], time, filtering)
+    return SERIES[name](smoothed, start_time)
+
+
+# Series computed from differences between consecutive samples
+DIFFERENCED_SERIES = {"mdot"}
+
+
+class IncrementalSeries:
+    # One series computed batch by batch from consecutive column batches. Differenced
+    # series carry each batch's last row into the next, so the concatenated output
+    # matches a computation over the whole event.
+    def __init__(self, name, start_time):
+        self.name = name
+        self.start_time = start_time
+        self.previous = None
+
+    def update(self, columns, column_errors=None, t0=None, t1=None):
+        # (time, channels) for the new batch, inside the optional t0/t1 window
+        _check_columns(SERIES_FIELDS[self.name], column_errors or {})
+        if self.name in DIFFERENCED_SERIES and columns["_count"]:
+            # Only this series' fields are carried, so other fields may come and go
+            fields = ["_time_valid", *SERIES_FIELDS[self.name]]
+            tail = {key: columns[key][-1:] for key in fields}
+            if self.previous is not None:
+                count = columns["_count"] + 1
+                columns = {key: np.concatenate([self.previous[key], columns[key]]) for key in fields}
+                columns["_count"] = count
+            self.previous = tail
+        return shape_series(*SERIES[self.name](columns, self.start_time), t0=t0, t1=t1)
+
+
+def series_chunks(batches, name, start_time, t0=None, t1=None):
+    # Compute one series incrementally from iter_columns batches, yielding
+    # (time, channels) per non-empty batch inside the optional t0/t1 window
+    series = IncrementalSeries(name, start_time)
+    for columns, column_errors in batches:
+        time, channels = series.update(columns, column_errors, t0, t1)
+        if len(time):
+            yield time, channels
+
+
+def compute_event(columns, column_errors, series=(), metrics=(), raise_errors=False, max_points=None, t0=None, t1=None, method="lttb", start_time=None, detection=None, as_arrays=False):
+    # Compute every requested series and metric from one read of the event columns.
+    # With raise_errors=False a failing series/metric is reported in "errors" instead
+    # of failing the whole request. max_points/t0/t1 window and downsample the series.
+    # Series times are relative to start_time (ns), by default the first row.
+    # as_arrays=True keeps each series as (time, channels) arrays instead of points.
+    detection = {**DETECTION_DEFAULTS, **(detection or {})}
+    result = {"series": {}, "metrics": {}, "errors": {}}
+
+    if start_time is None and "Time" in columns and columns["_count"] and columns["_time_valid"][0]:
+        start_time = int(columns["Time"][0])
+
+    for name in series:
+        try:
+            _check_columns(SERIES_FIELDS[name], column_errors)
+            if start_time is None:
+                raise KeyError("Time")
+            time, channels = SERIES[name](columns, start_time)
+            time, channels = shape_series(time, channels, max_points, t0, t1, method)
+            result["series"][name] = (time, channels) if as_arrays else series_points(time, channels)
+        except Exception as e:
+            if raise_errors:
+                raise
+            result["errors"][name] = str(e)
+
+    for name in metrics:
+        try:
+            _check_columns(METRIC_FIELDS[name], column_errors)
+            result["metrics"][name] = METRICS[name](columns, detection)
+        except Exception as e:
+            if raise_errors:
+                raise
+            result["errors"][name] = str(e)
+
+    return result
+
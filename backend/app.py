@@ -1,40 +1,155 @@
+import time
+BOOT_STARTED = time.perf_counter()  # Cold-start timing includes the imports below
+
 import os
-import csv
 import json
-from flask import Flask, request, jsonify
+import uuid
+import logging
+import shutil
+import click
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from flask import Flask, request, jsonify, make_response, g, stream_with_context
+from pymongo import monitoring
 from werkzeug.utils import secure_filename
-from pymongo import MongoClient
 from flask_cors import CORS
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
+import numpy as np
+from analysis import (
+    NS_PER_SECOND, SERIES, SERIES_FIELDS, METRICS, IncrementalSeries, event_fields, compute_event,
+    series_points, series_chunks, derived_values, filtered_series,
+)
+from expressions import DERIVED_CHANNELS, compile_expression
+from filters import parse_filter, filter_key
+from downsample import DOWNSAMPLE_METHODS, LevelBuilder, pick_level, shape_series
+from detection import DETECTION_DEFAULTS, BurnDetector, parse_detection
+from ingest import STAGING_PREFIX, ingest_csv
+from bulk import bulk_sources, run_bulk
+from jobs import JOBS_COLLECTION, submit_job, get_job
+from live import LIVE_COLLECTION, sample_documents, start_session, get_session, append_samples, finish_session, end_session, viewer_events
+from simulate import synthetic_burn, column_batches
+from storage import STORAGE_MODE, event_start, event_channels, read_columns, iter_columns, migrate_collection, reindex_collection
+from summary import (
+    SUMMARIES_COLLECTION, CATALOG_SORTS, SummaryBuilder, summarize_event, save_summary, load_summary_metrics, event_version,
+    upload_date, ensure_catalog_indexes, collection_size, list_catalog,
+)
+from instrumentation import (
+    RequestMetrics, CommandTimer, start_request, phase, mark_cache, profiling, profile_summary, server_timing,
+)
+from database import MONGO_READ_PREFERENCE, MONGO_WARM_UP, REPLICA_SETTLE_SECONDS, LazyDatabase, warm_up, timings
+from cache import DERIVED_CACHE_MAX_BYTES, ResponseCache, cache_key, entry_etag
+from wire import (
+    WIRE_FORMATS, STREAM_FORMATS, EXPORT_FORMATS, COMPRESS_MIN_BYTES, pa, negotiate_format, negotiate_encoding, compress,
+    compress_stream, encode_columns, encode_arrow, encode_ndjson, encode_csv, encode_parquet,
+)
 
 
 app = Flask(__name__)
+# Startup timings are logged at INFO; Flask only shows warnings and up by default
+app.logger.setLevel(logging.INFO)
 CORS(app, resources={r"/*": {"origins": "*"}})
 host='0.0.0.0'
 
-UPLOAD_FOLDER = './uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Created on the first upload; serverless hosts may only allow writes under /tmp
+UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "./uploads")
+
+# Both connect on first use (see database.py). event_db serves the event data reads,
+# which may go to secondaries; everything else, including all writes, uses db.
+db = LazyDatabase()
+event_db = LazyDatabase(MONGO_READ_PREFERENCE)
+
+# Cold-start timings reported by /health
+startup = {"import_ms": None, "first_request_ms": None}
+
+# Per-route counters for /metrics; the listener times every Mongo command a request makes
+request_metrics = RequestMetrics()
+monitoring.register(CommandTimer())
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+    start_request(profile=request.args.get("profile") == "1")
+
+@app.after_request
+def record_first_request(response):
+    # The first request pays for the lazy connection, so it shows the real cold start
+    if startup["first_request_ms"] is None and "request_started" in g:
+        startup["first_request_ms"] = (time.perf_counter() - g.request_started) * 1000
+        app.logger.info("First request (%s) took %.0f ms", request.path, startup["first_request_ms"])
+    return response
+
+@app.after_request
+def instrument_response(response):
+    # Server-Timing on every response, plus the request's share of /metrics. A streamed
+    # body is still to be produced, so its header covers only the time until the first
+    # chunk and its metrics are recorded once the stream is done.
+    if "timing" not in g:
+        return response
+    timing = g.timing
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    method, status = request.method, response.status_code
+
+    if profiling():
+        # ?profile=1: the profile of the view (and the whole stream, if any) replaces the body
+        response.get_data()
+        summary = profile_summary()
+        response = app.response_class(summary, status=200, mimetype="text/plain")
+        response.headers["X-Profiled-Status"] = str(status)
+
+    total = time.perf_counter() - timing["started"]
+    response.headers["Server-Timing"] = server_timing(timing, total)
+
+    if not response.is_streamed:
+        request_metrics.observe(route, method, status, timing, total, response.content_length or 0)
+        return response
+
+    def measured(chunks):
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            request_metrics.observe(route, method, status, timing, time.perf_counter() - timing["started"], size)
+
+    # Kept in the request context so the rows the stream reads are still counted
+    response.response = stream_with_context(measured(response.response))
+    return response
 
-uri = os.getenv("uri")
-client = MongoClient(
-    uri,
-    tls=True,  # Enable TLS/SSL
-    tlsAllowInvalidCertificates=False,  # Do not allow invalid certificates
-    server_api=ServerApi('1')  # Use Server API version 1
-)
-db = client["rp-analysis"]
-
-from datetime import datetime
 
 @app.route('/', methods=['GET'])
 def home():
     return "Hello, World!", 200
 
+@app.route('/health', methods=['GET'])
+def health():
+    # Startup timings for this process; ?warm=1 opens the connection pool first
+    try:
+        if request.args.get('warm'):
+            warm_up()
+        return jsonify({"status": "ok", "pid": os.getpid(), "startup": {**startup, **timings}}), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus text format: per-route request counts, latency, phase times, rows
+    # scanned and bytes returned since this process started
+    try:
+        body = request_metrics.render({
+            "rp_response_cache_bytes": ("Bytes held by the response cache.", response_cache.size),
+            "rp_derived_cache_bytes": ("Bytes held by the derived channel cache.", derived_cache.size),
+        })
+        return app.response_class(body, status=200, mimetype="text/plain; version=0.0.4")
+    except Exception as e:
+        return jsonify({"error": f"Error rendering metrics: {str(e)}"}), 500
+
 @app.route('/test-mongo', methods=['GET'])
 def test_mongo():
     try:
@@ -44,316 +159,921 @@ def test_mongo():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
-@app.route('/<event_id>/manifold', methods=['GET'])
-def get_manifold_data(event_id):
+response_cache = ResponseCache()
+
+# Full-resolution derived channels, so re-zooming an expression never recomputes it.
+# Kept in memory only: raw arrays are large and cheap to recompute after a restart.
+derived_cache = ResponseCache(DERIVED_CACHE_MAX_BYTES, directory=None)
+
+def cached_event_route(view):
+    # Events never change after upload, so successful responses are cached per
+    # (event, version, route, query) and browsers revalidate with ETag/Last-Modified
+    @functools.wraps(view)
+    def wrapper(event_id):
+        # A profiled request has to run the view to have anything to profile
+        if profiling():
+            return view(event_id)
+
+        try:
+            updated = event_version(db, event_id)
+            # An event still being recorded has no summary yet and changes with every batch
+            if updated is None and get_session(db, event_id) is not None:
+                return view(event_id)
+        except Exception:
+            return view(event_id)
+
+        # Each wire format and content encoding is a separate representation
+        try:
+            wire_format = negotiate_format(request.args, request.accept_mimetypes)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        encoding = negotiate_encoding(request.accept_encodings)
+
+        key = cache_key(event_id, updated.isoformat() if updated else None, request.path, request.args, wire_format, encoding)
+        etag = entry_etag(key)
+
+        # Conditional requests are answered before anything is loaded or computed.
+        # HTTP dates only have whole seconds, so Last-Modified is compared at that
+        # resolution; the ETag carries the full version.
+        if etag in request.if_none_match or (
+            updated is not None and request.if_modified_since is not None
+            and not request.if_none_match and updated.replace(microsecond=0) <= request.if_modified_since
+        ):
+            mark_cache("not_modified")
+            response = app.response_class(status=304)
+        else:
+            entry = response_cache.get(key)
+            mark_cache("miss" if entry is None else "hit")
+            if entry is None:
+                response = make_response(view(event_id))
+                # Streamed bodies are produced batch by batch and never held whole
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                # Replicas may still be catching up with a fresh upload, so don't cache it yet
+                if updated is not None and time.time() - updated.timestamp() < REPLICA_SETTLE_SECONDS:
+                    return response
+                entry = {"body": response.get_data(), "mimetype": response.mimetype, "encoding": None}
+                if encoding and len(entry["body"]) >= COMPRESS_MIN_BYTES:
+                    with phase("serialize"):
+                        entry["body"] = compress(entry["body"], encoding)
+                    entry["encoding"] = encoding
+                response_cache.put(key, entry)
+            response = app.response_class(entry["body"], status=200, mimetype=entry["mimetype"])
+            if entry.get("encoding"):
+                response.headers["Content-Encoding"] = entry["encoding"]
+
+        response.set_etag(etag)
+        response.vary.update(("Accept", "Accept-Encoding"))
+        if updated is not None:
+            response.last_modified = updated
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    return wrapper
+
+# Precomputed downsampling levels for every event series, written at upload
+LEVELS_COLLECTION = "series_levels"
+
+# Collections that hold app metadata rather than events
+INTERNAL_COLLECTIONS = {LEVELS_COLLECTION, JOBS_COLLECTION, SUMMARIES_COLLECTION, LIVE_COLLECTION, "system.views"}
+
+def event_name_error(name):
+    # Why name can't be used as an event, or None. Events share the database with
+    # the app's own collections, which must never be uploaded over or read out.
+    if not name or "$" in name or "\0" in name:
+        return "Event names must be non-empty and cannot contain $"
+    if name in INTERNAL_COLLECTIONS or name.startswith(("system.", STAGING_PREFIX)):
+        return f"{name} is a reserved name"
+    return None
+
+@app.before_request
+def check_event_name():
+    # Every /<event_id>/... route, including starting a live session
+    event_id = (request.view_args or {}).get("event_id")
+    if event_id is not None:
+        error = event_name_error(event_id)
+        if error:
+            return jsonify({"error": error}), 400
+
+def load_event(event_id, series=(), metrics=(), raise_errors=True, max_points=None, t0=None, t1=None, method="lttb", filtering=None):
+    # Series come back as (time, channels) arrays; series_response/dashboard_response
+    # turn them into the negotiated wire format
+    result = {"series": {}, "metrics": {}, "errors": {}}
+
+    # Filtered series (and peakMdot, read off the filtered mdot) come from the
+    # full-resolution filtered arrays, computed once per event and filter
+    if filtering is not None:
+        for name in [*series, *(["peakMdot"] if "peakMdot" in metrics else [])]:
+            try:
+                filtered = load_filtered(event_id, "mdot" if name == "peakMdot" else name, filtering)
+                if filtered is None:
+                    return None
+                if name == "peakMdot":
+                    mdot = filtered[1]["Mdot"]
+                    result["metrics"][name] = float(mdot.max()) if mdot.size else None
+                else:
+                    result["series"][name] = shape_series(*filtered, max_points, t0, t1, method)
+            except Exception as e:
+                if raise_errors:
+                    raise
+                result["errors"][name] = str(e)
+        series = []
+        metrics = [name for name in metrics if name != "peakMdot"]
+
+    # Downsampled requests are served from the precomputed levels when one is detailed enough
+    if max_points is not None and series:
+        result["series"].update(load_levels(event_id, series, max_points, t0, t1, method))
+        series = [name for name in series if name not in result["series"]]
+
+    # Scalar metrics come from the summary written at ingest; older events fall back to a scan
+    if metrics:
+        summary = load_summary_metrics(db, event_id, metrics)
+        if summary is not None:
+            summary_metrics, summary_errors = summary
+            for name in metrics:
+                if name in summary_errors:
+                    if raise_errors:
+                        raise ValueError(summary_errors[name])
+                    result["errors"][name] = summary_errors[name]
+                elif name in summary_metrics:
+                    result["metrics"][name] = summary_metrics[name]
+            metrics = [name for name in metrics if name not in result["metrics"] and name not in result["errors"]]
+
+    if not series and not metrics:
+        return result
+
+    # Read the event once for every field the remaining series/metrics need
+    collection = event_db[event_id]
+    fields = event_fields(series, metrics)
+
+    # A windowed series-only request reads just the stored range around the window
+    start_time = None
+    time_range = None
+    if not metrics and (t0 is not None or t1 is not None):
+        start_time = event_start(collection)
+        if start_time is None:
+            return None
+        time_range = window_range(start_time, t0, t1)
+
+    columns, column_errors = read_columns(collection, fields, time_range)
+
+    if not columns["_count"]:
+        return None
+
+    computed = compute_event(columns, column_errors, series, metrics, raise_errors, max_points, t0, t1, method, start_time, as_arrays=True)
+    for key in result:
+        result[key].update(computed[key])
+    return result
+
+def window_range(start_time, t0=None, t1=None):
+    # Relative t0/t1 seconds to the absolute (lo_ns, hi_ns) range used for stored reads
+    return (
+        start_time + int(t0 * NS_PER_SECOND) if t0 is not None else None,
+        start_time + int(t1 * NS_PER_SECOND) if t1 is not None else None,
+    )
+
+def load_filtered(event_id, name, filtering):
+    # Full-resolution filtered (time, channels) of one series, or None for an empty event
+    version = event_version(db, event_id)
+    key = (event_id, version.isoformat() if version else None, "filtered", name, filter_key(filtering))
+    cached = cached_arrays(key) if version is not None else None
+    if cached is not None:
+        return cached
+
+    columns, column_errors = read_columns(event_db[event_id], SERIES_FIELDS[name])
+    if column_errors:
+        raise next(iter(column_errors.values()))
+    if not columns["_count"]:
+        return None
+
+    time, channels = filtered_series(columns, int(columns["Time"][0]), name, filtering)
+    if version is not None:
+        remember_arrays(key, time, channels)
+    return time, channels
+
+def cached_arrays(key):
+    # (time, channels) saved by remember_arrays, or None
+    entry = derived_cache.get(key)
+    if entry is None:
+        return None
+    packed = np.frombuffer(entry["body"], dtype=np.float64).reshape(len(entry["channels"]) + 1, -1)
+    return packed[0], dict(zip(entry["channels"], packed[1:]))
+
+def remember_arrays(key, time, channels):
+    derived_cache.put(key, {"body": np.stack([time, *channels.values()]).tobytes(), "channels": list(channels)})
+
+def load_levels(event_id, series, max_points, t0=None, t1=None, method="lttb"):
+    levels = event_db[LEVELS_COLLECTION]
+    available = {}
+    for level in levels.find(
+        {"event": event_id, "series": {"$in": list(series)}},
+        {"_id": 1, "series": 1, "size": 1, "t_first": 1, "t_last": 1},
+    ):
+        available.setdefault(level["series"], []).append(level)
+
+    chosen = []
+    for name, candidates in available.items():
+        level = pick_level(candidates, max_points, t0, t1)
+        if level is not None:
+            chosen.append(level["_id"])
+
+    served = {}
+    if chosen:
+        with phase("db"):
+            chosen = list(levels.find({"_id": {"$in": chosen}}))
+        for level in chosen:
+            time = np.asarray(level["Time"], dtype=np.float64)
+            channels = {name: np.asarray(values, dtype=np.float64) for name, values in level["channels"].items()}
+            time, channels = shape_series(time, channels, max_points, t0, t1, method)
+            served[level["series"]] = (time, channels)
+    return served
+
+def save_levels(collection_name, summary):
+    # Build the min/max downsampling levels for every series so zoomed-out and
+    # zoomed-in views never have to rescan the raw event. Every series is computed
+    # and reduced from one read of the event, a batch at a time; summary (a
+    # SummaryBuilder over the event) gives the series' time origin and range.
+    levels = db[LEVELS_COLLECTION]
+    levels.create_index([("event", 1), ("series", 1), ("size", 1)])
+    levels.delete_many({"event": collection_name})
+    if summary.start_time is None:
+        return
+
+    t_first, t_last = ((time - summary.start_time) / NS_PER_SECOND for time in summary.time_range)
+    series = {name: IncrementalSeries(name, summary.start_time) for name in SERIES}
+    builders = {}
+    for columns, column_errors in iter_columns(db[collection_name], event_fields(series=SERIES)):
+        for name in list(series):
+            try:
+                time, channels = series[name].update(columns, column_errors)
+            except Exception:
+                # A series that fails anywhere gets no levels
+                del series[name]
+                builders.pop(name, None)
+                continue
+            if name not in builders:
+                builders[name] = LevelBuilder(channels, t_first, t_last)
+            builders[name].add(time, channels)
+
+    documents = []
+    for name, builder in builders.items():
+        for size, level_time, level_channels in builder.result():
+            documents.append({
+                "event": collection_name,
+                "series": name,
+                "size": size,
+                "t_first": builder.first,
+                "t_last": builder.last,
+                "Time": level_time.tolist(),
+                "channels": {channel: values.tolist() for channel, values in level_channels.items()},
+            })
+
+    if documents:
+        levels.insert_many(documents)
+
+def finalize_event(collection_name, detection=None, summary=None, **summary_fields):
+    # Downsampling levels and the summary (with the event's detection settings) for a
+    # stored event. summary is the SummaryBuilder fed while the event was ingested;
+    # without one, or when the rows were not stored in time order (and so are read
+    # back in a different order), the summary takes a streamed read of the event.
+    # Both are optimizations; the event is usable without them.
+    if summary is None or not summary.increasing:
+        summary = summarize_event(db[collection_name], detection)
+
     try:
-        # Access the MongoDB collection corresponding to the event_id
-        collection = db[event_id]
+        save_levels(collection_name, summary)
+    except Exception:
+        app.logger.exception("Error building downsampling levels for %s", collection_name)
 
-        # Query the collection to fetch Time and Manifold fields
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "Manifold": 1}))
+    try:
+        ensure_catalog_indexes(db)
+        save_summary(
+            db, collection_name,
+            **summary.result(),
+            size=collection_size(db, collection_name),
+            **summary_fields,
+        )
+    except Exception:
+        app.logger.exception("Error building event summary for %s", collection_name)
+
+    response_cache.invalidate(collection_name)
+    derived_cache.invalidate(collection_name)
+
+def parse_shape_args():
+    # Optional downsampling and time-window parameters shared by every time-series route.
+    # Invalid values are ignored and the full series is returned.
+    max_points = request.args.get('max_points', type=int)
+    method = request.args.get('downsample', 'lttb')
+    return {
+        "max_points": max_points if max_points is not None and max_points > 0 else None,
+        "t0": request.args.get('t0', type=float),
+        "t1": request.args.get('t1', type=float),
+        "method": method if method in DOWNSAMPLE_METHODS else 'lttb',
+    }
+
+def parse_names(param, known):
+    # Comma-separated multi-select (e.g. ?series=dp,tank); all names when omitted
+    value = request.args.get(param)
+    if value is None:
+        return list(known)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown {param}: {', '.join(unknown)}")
+    return names
+
+NO_DATA_ERROR = {"error": "No data found for the given event ID"}
+
+def series_view(event_id, name):
+    # Shared body of the single-series routes. Full-resolution NDJSON/CSV requests
+    # are streamed straight from the event; everything else goes through load_event.
+    shape = parse_shape_args()
+    try:
+        filtering = parse_filter(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if filtering is None and shape["max_points"] is None and negotiate_format(request.args, request.accept_mimetypes) in STREAM_FORMATS:
+        return stream_series(event_id, name, shape["t0"], shape["t1"])
+
+    result = load_event(event_id, series=[name], filtering=filtering, **shape)
+
+    if result is None:
+        return jsonify(NO_DATA_ERROR), 404
+
+    return series_response(*result["series"][name])
+
+def series_response(time, channels):
+    # {"data": [{"Time": ..., ...}]} by default, or the series in the negotiated format
+    wire_format = negotiate_format(request.args, request.accept_mimetypes)
+    with phase("serialize"):
+        if wire_format == "arrow":
+            body = encode_arrow(time, channels)
+        elif wire_format == "columns":
+            body = encode_columns({"data": (time, channels)})
+        elif wire_format == "ndjson":
+            body = b"".join(encode_ndjson([(time, channels)]))
+        elif wire_format == "csv":
+            body = b"".join(encode_csv([(time, channels)]))
+        else:
+            return jsonify({"data": series_points(time, channels)}), 200
+    return app.response_class(body, status=200, mimetype=WIRE_FORMATS[wire_format])
+
+def stream_series(event_id, name, t0=None, t1=None):
+    # Compute and send the series one stored batch at a time, so memory stays flat
+    # and the first rows go out before the rest of the event is read
+    collection = event_db[event_id]
+    start_time = event_start(collection)
+    if start_time is None:
+        return jsonify(NO_DATA_ERROR), 404
+
+    batches = iter_columns(collection, SERIES_FIELDS[name], window_range(start_time, t0, t1))
+    chunks = series_chunks(batches, name, start_time, t0, t1)
+    wire_format = negotiate_format(request.args, request.accept_mimetypes)
+    encoder = encode_ndjson if wire_format == "ndjson" else encode_csv
+    return stream_response(encoder(chunks), WIRE_FORMATS[wire_format], error_lines=wire_format == "ndjson")
+
+def stream_response(body, mimetype, error_lines=False, filename=None):
+    # The status line is sent with the first chunk, so a failure part-way through
+    # can only end the body early (with a final {"error": ...} line for NDJSON)
+    def guarded():
+        try:
+            yield from body
+        except Exception as e:
+            app.logger.exception("Error streaming response")
+            if error_lines:
+                yield (json.dumps({"error": str(e)}) + "\n").encode()
+
+    chunks = guarded()
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding:
+        chunks = compress_stream(chunks, encoding)
+
+    response = app.response_class(chunks, status=200, mimetype=mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if filename:
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response.vary.update(("Accept", "Accept-Encoding"))
+    return response
+
+def dashboard_response(result):
+    wire_format = negotiate_format(request.args, request.accept_mimetypes)
+    if wire_format == "arrow":
+        # An Arrow stream has a single schema, so it carries exactly one series
+        if len(result["series"]) != 1:
+            return jsonify({"error": "Arrow dashboards hold one series; select it with ?series="}), 400
+        (time, channels), = result["series"].values()
+        with phase("serialize"):
+            body = encode_arrow(time, channels, result["metrics"], result["errors"])
+    elif wire_format == "columns":
+        with phase("serialize"):
+            body = encode_columns(result["series"], result["metrics"], result["errors"])
+    elif wire_format in STREAM_FORMATS:
+        return jsonify({"error": f"Format {wire_format} is only available on single-series routes"}), 400
+    else:
+        with phase("serialize"):
+            result["series"] = {name: series_points(*arrays) for name, arrays in result["series"].items()}
+            return jsonify(result), 200
+    return app.response_class(body, status=200, mimetype=WIRE_FORMATS[wire_format])
+
+@app.route('/<event_id>/dashboard', methods=['GET'])
+@cached_event_route
+def get_dashboard(event_id):
+    try:
+        series = parse_names('series', SERIES)
+        metrics = parse_names('metrics', METRICS)
+        filtering = parse_filter(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
+    try:
+        result = load_event(event_id, series, metrics, raise_errors=False, filtering=filtering, **parse_shape_args())
 
-        # Calculate Time relative to the first timestamp
-        start_time = int(data[0]["Time"])  # Ensure Time is an integer
+        if result is None:
+            return jsonify(NO_DATA_ERROR), 404
 
-        for point in data:
-            if "Time" in point and point["Time"] is not None:
-                original_time = int(point["Time"])
-                adjusted_time = (original_time - start_time) / 1_000_000_000  # Convert nanoseconds to seconds
-                point["Time"] = adjusted_time
-            else:
-                point["Time"] = 0  # Default to 0 if Time is missing
+        return dashboard_response(result)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching dashboard: {str(e)}"}), 500
 
-        # Return the data as JSON
-        return jsonify({"data": data}), 200
+@app.route('/<event_id>/manifold', methods=['GET'])
+@cached_event_route
+def get_manifold_data(event_id):
+    try:
+        return series_view(event_id, "manifold")
     except Exception as e:
         return jsonify({"error": f"Error fetching manifold data: {str(e)}"}), 500
 
 
 @app.route('/<event_id>/burntime', methods=['GET'])
+@cached_event_route
 def get_burn_time(event_id):
+    # Detection settings in the query (e.g. ?max_burns=0&proximity_threshold=15)
+    # rerun the detector over the stored event; otherwise the summary answers
     try:
-        # Access the MongoDB collection corresponding to the event_id
-        collection = db[event_id]
+        detection = parse_detection(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        # Query the collection to fetch Time and Manifold fields
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "Manifold": 1}))
+    try:
+        if detection:
+            burns = detect_burns(event_id, detection)
 
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
+            if burns is None:
+                return jsonify(NO_DATA_ERROR), 404
 
-        # Convert Time to an integer and extract timestamps and manifold values
-        timestamps = [int(point["Time"]) / 1_000_000_000 for point in data]  # Convert nanoseconds to seconds
-        manifold_values = [float(point["Manifold"]) for point in data]  # Ensure Manifold is a float
+            return jsonify(burns), 200
 
-        # Use the find_start_and_end_times function without the buffer
-        start_time, end_time = find_start_and_end_times(
-            timestamps, manifold_values, buffer_seconds=0
-        )
+        result = load_event(event_id, metrics=["burntime"])
 
-        # Calculate burn time
-        burn_time = end_time - start_time
+        if result is None:
+            return jsonify(NO_DATA_ERROR), 404
 
-        return jsonify({"burn_time": burn_time, "start_time": start_time, "end_time": end_time}), 200
+        return jsonify(result["metrics"]["burntime"]), 200
     except Exception as e:
-        print(f"Error calculating burn time: {e}")  # Debugging
+        app.logger.exception("Error calculating burn time for %s", event_id)
         return jsonify({"error": f"Error calculating burn time: {str(e)}"}), 500
 
+def detect_burns(event_id, detection):
+    # Stream the event's Time/Manifold batches through a detector, so memory stays
+    # at one batch. Settings not given fall back to the event's, then the defaults.
+    stored = db[SUMMARIES_COLLECTION].find_one({"_id": event_id}, {"detection": 1}) or {}
+    detector = BurnDetector(**{**DETECTION_DEFAULTS, **stored.get("detection", {}), **detection, "buffer_seconds": 0})
+
+    count = 0
+    for columns, column_errors in iter_columns(event_db[event_id], ["Manifold", "Time"]):
+        if column_errors:
+            raise next(iter(column_errors.values()))
+        if not columns["_time_valid"].all():
+            raise KeyError("Time")
+        if np.isnan(columns["Manifold"]).any():
+            raise KeyError("Manifold")
+        count += columns["_count"]
+        detector.push_many(columns["Time"] / NS_PER_SECOND, columns["Manifold"])
+        if detector.done:
+            break
+
+    return detector.result() if count else None
+
 @app.route('/<event_id>/dp', methods=['GET'])
+@cached_event_route
 def get_differential_pressure(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "Tank": 1, "Manifold": 1}))
-
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
-
-        start_time = int(data[0]["Time"])  # Ensure Time is an integer
-        dp_data = []
-        for point in data:
-            if "Time" in point and "Tank" in point and "Manifold" in point:
-                adjusted_time = (int(point["Time"]) - start_time) / 1_000_000_000  # Convert nanoseconds to seconds
-                dp = float(point["Tank"]) - float(point["Manifold"])
-                dp_data.append({"Time": adjusted_time, "DP": dp})
-
-        return jsonify({"data": dp_data}), 200
+        return series_view(event_id, "dp")
     except Exception as e:
         return jsonify({"error": f"Error calculating differential pressure: {str(e)}"}), 500
 
 
 @app.route('/<event_id>/tank', methods=['GET'])
+@cached_event_route
 def get_tank_pressure(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "Tank": 1}))
-
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
-
-        start_time = int(data[0]["Time"])  # Ensure Time is an integer
-        tank_data = []
-        for point in data:
-            if "Time" in point and "Tank" in point:
-                adjusted_time = (int(point["Time"]) - start_time) / 1_000_000_000  # Convert nanoseconds to seconds
-                tank_data.append({"Time": adjusted_time, "Tank": float(point["Tank"])})
-
-        return jsonify({"data": tank_data}), 200
+        return series_view(event_id, "tank")
     except Exception as e:
         return jsonify({"error": f"Error fetching tank pressure: {str(e)}"}), 500
 
 
 @app.route('/<event_id>/tanklc', methods=['GET'])
+@cached_event_route
 def get_tanklc(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "TankLC": 1}))
-
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
-
-        start_time = int(data[0]["Time"])  # Ensure Time is an integer
-        tanklc_data = []
-        for point in data:
-            if "Time" in point and "TankLC" in point:
-                adjusted_time = (int(point["Time"]) - start_time) / 1_000_000_000  # Convert nanoseconds to seconds
-                tanklc_data.append({"Time": adjusted_time, "TankLC": float(point["TankLC"])})
-
-        return jsonify({"data": tanklc_data}), 200
+        return series_view(event_id, "tanklc")
     except Exception as e:
         return jsonify({"error": f"Error fetching TankLC data: {str(e)}"}), 500
 
 
 @app.route('/<event_id>/thrustlc', methods=['GET'])
+@cached_event_route
 def get_thrustlc(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "ThrustLC": 1}))
-
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
-
-        start_time = int(data[0]["Time"])  # Ensure Time is an integer
-        thrustlc_data = []
-        for point in data:
-            if "Time" in point and "ThrustLC" in point:
-                adjusted_time = (int(point["Time"]) - start_time) / 1_000_000_000  # Convert nanoseconds to seconds
-                thrustlc_data.append({"Time": adjusted_time, "ThrustLC": float(point["ThrustLC"])})
-
-        return jsonify({"data": thrustlc_data}), 200
+        return series_view(event_id, "thrustlc")
     except Exception as e:
         return jsonify({"error": f"Error fetching ThrustLC data: {str(e)}"}), 500
 
 
 @app.route('/<event_id>/pressures', methods=['GET'])
+@cached_event_route
 def get_pressures(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "Chamber": 1, "Manifold": 1, "Tank": 1}))
-
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
-
-        start_time = int(data[0]["Time"])  # Ensure Time is an integer
-        pressures_data = []
-        for point in data:
-            if "Time" in point:
-                adjusted_time = (int(point["Time"]) - start_time) / 1_000_000_000  # Convert nanoseconds to seconds
-                pressures_data.append({
-                    "Time": adjusted_time,
-                    "Chamber": float(point.get("Chamber", 0)),
-                    "Manifold": float(point.get("Manifold", 0)),
-                    "Tank": float(point.get("Tank", 0)),
-                })
-
-        return jsonify({"data": pressures_data}), 200
+        return series_view(event_id, "pressures")
     except Exception as e:
         return jsonify({"error": f"Error fetching pressures: {str(e)}"}), 500
 
 
 @app.route('/<event_id>/mdot', methods=['GET'])
+@cached_event_route
 def get_mass_flow_rate(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "TankLC": 1}))
-
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
-
-        start_time = int(data[0]["Time"])  # Ensure Time is an integer
-        mdot_data = []
-        for i in range(1, len(data)):
-            time_diff = (int(data[i]["Time"]) - int(data[i - 1]["Time"])) / 1_000_000_000  # Convert nanoseconds to seconds
-            if time_diff > 0:
-                mdot = (float(data[i]["TankLC"]) - float(data[i - 1]["TankLC"])) / time_diff
-                adjusted_time = (int(data[i]["Time"]) - start_time) / 1_000_000_000
-                mdot_data.append({"Time": adjusted_time, "Mdot": mdot})
-
-        return jsonify({"data": mdot_data}), 200
+        return series_view(event_id, "mdot")
     except Exception as e:
         return jsonify({"error": f"Error calculating mass flow rate: {str(e)}"}), 500
 
 
 @app.route('/<event_id>/stiff', methods=['GET'])
+@cached_event_route
 def get_injector_stiffness(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "Manifold": 1, "Chamber": 1}))
-
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
-
-        start_time = int(data[0]["Time"])  # Ensure Time is an integer
-        stiffness_data = []
-        for point in data:
-            if "Manifold" in point and "Chamber" in point and float(point["Chamber"]) != 0:
-                adjusted_time = (int(point["Time"]) - start_time) / 1_000_000_000  # Convert nanoseconds to seconds
-                stiffness = (float(point["Manifold"]) - float(point["Chamber"])) / float(point["Chamber"])
-                stiffness_data.append({"Time": adjusted_time, "Stiffness": stiffness})
-
-        return jsonify({"data": stiffness_data}), 200
+        return series_view(event_id, "stiff")
     except Exception as e:
         return jsonify({"error": f"Error calculating injector stiffness: {str(e)}"}), 500
 
 @app.route('/<event_id>/peakThrust', methods=['GET'])
+@cached_event_route
 def get_peak_thrust(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "ThrustLC": 1}))
-
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
+        result = load_event(event_id, metrics=["peakThrust"])
 
-        peak_thrust = max(float(point["ThrustLC"]) for point in data if "ThrustLC" in point)
+        if result is None:
+            return jsonify(NO_DATA_ERROR), 404
 
-        return jsonify({"peakThrust": peak_thrust}), 200
+        return jsonify({"peakThrust": result["metrics"]["peakThrust"]}), 200
     except Exception as e:
         return jsonify({"error": f"Error fetching peak thrust: {str(e)}"}), 500
 
 
 @app.route('/<event_id>/peakChamber', methods=['GET'])
+@cached_event_route
 def get_peak_chamber(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Chamber": 1}))
+        result = load_event(event_id, metrics=["peakChamber"])
 
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
+        if result is None:
+            return jsonify(NO_DATA_ERROR), 404
 
-        peak_chamber = max(float(point["Chamber"]) for point in data if "Chamber" in point)
-
-        return jsonify({"peakChamber": peak_chamber}), 200
+        return jsonify({"peakChamber": result["metrics"]["peakChamber"]}), 200
     except Exception as e:
         return jsonify({"error": f"Error fetching peak chamber pressure: {str(e)}"}), 500
 
 @app.route('/<event_id>/peakMdot', methods=['GET'])
+@cached_event_route
 def get_peak_mdot(event_id):
+    # ?filter=savgol (etc.) reads the peak off the filtered mdot instead of raw differences
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Time": 1, "TankLC": 1}))
+        filtering = parse_filter(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
+    try:
+        result = load_event(event_id, metrics=["peakMdot"], filtering=filtering)
 
-        # Ensure Time is an integer and calculate Mdot
-        mdot_values = []
-        for i in range(1, len(data)):
-            time_diff = (int(data[i]["Time"]) - int(data[i - 1]["Time"])) / 1_000_000_000  # Convert nanoseconds to seconds
-            if time_diff > 0:
-                mdot = (float(data[i]["TankLC"]) - float(data[i - 1]["TankLC"])) / time_diff
-                mdot_values.append(mdot)
+        if result is None:
+            return jsonify(NO_DATA_ERROR), 404
 
-        if not mdot_values:
+        peak_mdot = result["metrics"]["peakMdot"]
+        if peak_mdot is None:
             return jsonify({"error": "No valid Mdot values found"}), 404
 
-        # Calculate the peak Mdot
-        peak_mdot = max(mdot_values)
-
         return jsonify({"peakMdot": peak_mdot}), 200
     except Exception as e:
         return jsonify({"error": f"Error fetching peak Mdot: {str(e)}"}), 500
 
 @app.route('/<event_id>/dataRate', methods=['GET'])
+@cached_event_route
 def get_data_rate(event_id):
     try:
-        collection = db[event_id]
-        data = list(collection.find({}, {"_id": 0, "Time": 1}))
-
-        if not data:
-            return jsonify({"error": "No data found for the given event ID"}), 404
+        result = load_event(event_id, metrics=["dataRate"])
 
-        time_diffs = [
-            (float(data[i]["Time"]) - float(data[i - 1]["Time"])) / 1_000_000_000  # Convert to seconds
-            for i in range(1, len(data))
-        ]
-        avg_data_rate = sum(time_diffs) / len(time_diffs) if time_diffs else 0
+        if result is None:
+            return jsonify(NO_DATA_ERROR), 404
 
-        return jsonify({"dataRate": 1.0/(avg_data_rate)}), 200
+        return jsonify({"dataRate": result["metrics"]["dataRate"]}), 200
     except Exception as e:
         return jsonify({"error": f"Error calculating data rate: {str(e)}"}), 500
 
+@app.route('/<event_id>/totalImpulse', methods=['GET'])
+@cached_event_route
+def get_total_impulse(event_id):
+    try:
+        result = load_event(event_id, metrics=["totalImpulse"])
+
+        if result is None:
+            return jsonify(NO_DATA_ERROR), 404
+
+        return jsonify({"totalImpulse": result["metrics"]["totalImpulse"]}), 200
+    except Exception as e:
+        return jsonify({"error": f"Error calculating total impulse: {str(e)}"}), 500
+
+@app.route('/<event_id>/averageThrust', methods=['GET'])
+@cached_event_route
+def get_average_thrust(event_id):
+    try:
+        result = load_event(event_id, metrics=["averageThrust"])
+
+        if result is None:
+            return jsonify(NO_DATA_ERROR), 404
+
+        average_thrust = result["metrics"]["averageThrust"]
+        if average_thrust is None:
+            return jsonify({"error": "No completed burn to average over"}), 404
+
+        return jsonify({"averageThrust": average_thrust}), 200
+    except Exception as e:
+        return jsonify({"error": f"Error calculating average thrust: {str(e)}"}), 500
+
+@app.route('/<event_id>/derived', methods=['GET'])
+@cached_event_route
+def get_derived(event_id):
+    # A channel computed from the stored ones, e.g.
+    # /<event_id>/derived?expr=Chamber/Tank&name=PressureRatio&max_points=1000.
+    # Expressions use channel names, Time (s), DP/Stiffness/Mdot/Impulse, numbers,
+    # + - * / ^ and diff(), rate(), integrate(), abs(), sqrt(), log(), exp(), min(), max().
+    # ?filter= smooths the stored channels first (see filters.py).
+    try:
+        expression = compile_expression(request.args.get('expr', ''))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid expression: {str(e)}"}), 400
+
+    try:
+        filtering = parse_filter(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The result is returned alongside Time, so it can't take the name of Time or of
+    # another channel
+    name = request.args.get('name', 'Value')
+    if name == "Time" or name in DERIVED_CHANNELS:
+        return jsonify({"error": f"{name} is already a channel name"}), 400
+
+    try:
+        if name in (event_channels(event_db[event_id]) or ()):
+            return jsonify({"error": f"{name} is already a channel name"}), 400
+
+        derived = load_derived(event_id, expression, filtering)
+
+        if derived is None:
+            return jsonify(NO_DATA_ERROR), 404
+
+        time, values = derived
+        shape = parse_shape_args()
+        return series_response(*shape_series(time, {name: values}, **shape))
+    except KeyError as e:
+        return jsonify({"error": f"Unknown channel: {e.args[0]}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error evaluating expression: {str(e)}"}), 500
+
+def load_derived(event_id, expression, filtering=None):
+    # Full-resolution (time, values) of a compiled expression, memoized per event
+    # version and filter; None when the event is empty. Unknown channels raise KeyError.
+    version = event_version(db, event_id)
+    key = (event_id, version.isoformat() if version else None, "derived", expression.text, filter_key(filtering))
+    cached = cached_arrays(key) if version is not None else None
+    if cached is not None:
+        return cached[0], cached[1]["Value"]
+
+    collection = event_db[event_id]
+    channels = event_channels(collection)
+    if channels is None:
+        return None
+    for channel in expression.channels:
+        if channel not in channels:
+            raise KeyError(channel)
+
+    columns, column_errors = read_columns(collection, ["Time", *expression.channels])
+    if column_errors:
+        raise next(iter(column_errors.values()))
+    if not columns["_count"]:
+        return None
+
+    time, values = derived_values(columns, int(columns["Time"][0]), expression.text, filtering=filtering)
+    # Events with no summary yet (e.g. still recording) have no version to key on
+    if version is not None:
+        remember_arrays(key, time, {"Value": values})
+    return time, values
+
+def export_chunks(collection, channels):
+    # Absolute int64 ns Time plus every stored channel, one stored batch at a time
+    for columns, column_errors in iter_columns(collection, ["Time", *channels]):
+        if column_errors:
+            raise next(iter(column_errors.values()))
+        yield columns["Time"], {channel: columns[channel] for channel in channels}
+
+@app.route('/<event_id>/export', methods=['GET'])
+def export_event(event_id):
+    # Stream the stored (burn-trimmed) event back out, e.g. /<event_id>/export?format=parquet
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unknown format: {export_format}"}), 400
+    if export_format == 'parquet' and pa is None:
+        return jsonify({"error": "Parquet export is not available on this server"}), 400
+
+    try:
+        collection = event_db[event_id]
+        channels = event_channels(collection)
+
+        if channels is None:
+            return jsonify(NO_DATA_ERROR), 404
+
+        chunks = export_chunks(collection, channels)
+        encoder = encode_parquet if export_format == 'parquet' else encode_csv
+        return stream_response(encoder(chunks), EXPORT_FORMATS[export_format], filename=f"{event_id}.{export_format}")
+    except Exception as e:
+        return jsonify({"error": f"Error exporting event: {str(e)}"}), 500
+
+@app.route('/<event_id>/summary', methods=['GET'])
+@cached_event_route
+def get_summary(event_id):
+    try:
+        summary = db[SUMMARIES_COLLECTION].find_one({"_id": event_id})
+
+        if summary is None:
+            return jsonify({"error": "No summary found for the given event ID"}), 404
+
+        summary["name"] = summary.pop("_id")
+        return jsonify(summary), 200
+    except Exception as e:
+        return jsonify({"error": f"Error fetching summary: {str(e)}"}), 500
+
+@app.route('/<event_id>/summary/recompute', methods=['POST'])
+def recompute_summary(event_id):
+    # Rebuild the scalar metrics, e.g. after changing the flow detection thresholds
+    # with a JSON body like {"start_slope_threshold": 4000, "proximity_threshold": 15, "max_burns": 3}
+    try:
+        detection = parse_detection(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Settings not given keep the values the event was last summarized with. An
+        # event without a summary isn't catalogued yet; rebuild-catalog adds it with
+        # its author, upload date, channels and size.
+        stored = db[SUMMARIES_COLLECTION].find_one({"_id": event_id}, {"detection": 1})
+        if stored is None:
+            return jsonify({"error": "No summary found for the given event ID"}), 404
+        detection = {**stored.get("detection", {}), **detection}
+
+        summary = summarize_event(db[event_id], detection)
+
+        if not summary.count:
+            return jsonify(NO_DATA_ERROR), 404
+
+        summary = summary.result()
+        save_summary(db, event_id, **summary)
+        response_cache.invalidate(event_id)
+        return jsonify(summary), 200
+    except Exception as e:
+        return jsonify({"error": f"Error recomputing summary: {str(e)}"}), 500
+
+# Events one /compare request may overlay, and the threads that load them in parallel
+COMPARE_MAX_EVENTS = 20
+compare_executor = ThreadPoolExecutor(max_workers=int(os.getenv("COMPARE_WORKERS", "8")), thread_name_prefix="compare")
+
+@app.route('/compare', methods=['GET'])
+def compare_events():
+    # Overlay several events, e.g. /compare?events=hf_1,hf_2&series=thrustlc,pressures&max_points=1000.
+    # With align=burn (the default) series times are seconds from each event's burn start.
+    events = [name.strip() for name in request.args.get('events', '').split(',') if name.strip()]
+    if not events:
+        return jsonify({"error": "No events given"}), 400
+    if len(events) > COMPARE_MAX_EVENTS:
+        return jsonify({"error": f"At most {COMPARE_MAX_EVENTS} events can be compared"}), 400
+    for event in events:
+        error = event_name_error(event)
+        if error:
+            return jsonify({"error": error}), 400
+
+    align = request.args.get('align', 'burn')
+    if align not in ('burn', 'none'):
+        return jsonify({"error": f"Unknown align: {align}"}), 400
+
+    try:
+        series = parse_names('series', SERIES) if 'series' in request.args else ["thrustlc"]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    shape = parse_shape_args()
+    if shape["max_points"] is None:
+        shape["max_points"] = 1000  # Overlays are always downsampled
+
+    def compare_one(event):
+        # An event that fails is reported under its own errors rather than failing
+        # the whole comparison, like a series that fails within an event
+        try:
+            return compare_event(event, series, shape, align)
+        except Exception as e:
+            return e
+
+    loaded = list(compare_executor.map(compare_one, events))
+
+    results = {}
+    table = []
+    for event, result in zip(events, loaded):
+        if result is None:
+            results[event] = {"error": NO_DATA_ERROR["error"]}
+            continue
+        if isinstance(result, Exception):
+            results[event] = {"series": {}, "metrics": {}, "errors": {"event": f"Error loading event: {str(result)}"}}
+            continue
+        results[event] = result
+        metrics = result["metrics"]
+        table.append({
+            "event": event,
+            "peakThrust": metrics.get("peakThrust"),
+            "peakChamber": metrics.get("peakChamber"),
+            "peakMdot": metrics.get("peakMdot"),
+            "burnTime": (metrics.get("burntime") or {}).get("burn_time"),
+            "totalImpulse": metrics.get("totalImpulse"),
+            "averageThrust": metrics.get("averageThrust"),
+            "dataRate": metrics.get("dataRate"),
+        })
+
+    return jsonify({"align": align, "events": results, "table": table}), 200
+
+def compare_event(event_id, series, shape, align):
+    # One event of a comparison: every metric (from its summary) and the requested
+    # series, shifted so t=0 is the burn start when aligning
+    result = load_event(event_id, metrics=list(METRICS), raise_errors=False)
+    if result is None:
+        return None
+
+    offset = 0.0
+    if align == 'burn':
+        burn = result["metrics"].get("burntime")
+        start_time = event_start(event_db[event_id])
+        if burn is None or start_time is None:
+            result["errors"]["align"] = "Burn start unknown; series are not aligned"
+        else:
+            offset = burn["start_time"] - start_time / NS_PER_SECOND
+
+    # The window is given in aligned time and shifted back into the event's own time
+    t0 = shape["t0"] + offset if shape["t0"] is not None else None
+    t1 = shape["t1"] + offset if shape["t1"] is not None else None
+    loaded = load_event(event_id, series, raise_errors=False, max_points=shape["max_points"], t0=t0, t1=t1, method=shape["method"])
+    if loaded is None:
+        return None
+
+    result["errors"].update(loaded["errors"])
+    result["series"] = {name: series_points(time - offset, channels) for name, (time, channels) in loaded["series"].items()}
+    result["offset"] = offset
+    return result
+
 @app.route('/collections', methods=['GET'])
 def get_collections():
+    # Paged listing from the indexed event catalog, e.g.
+    # /collections?sort=uploadDate&order=desc&limit=50&prefix=hf_&cursor=<nextCursor>
+    sort = request.args.get('sort', 'uploadDate')
+    order = request.args.get('order', 'desc')
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+    if sort not in CATALOG_SORTS:
+        return jsonify({"error": f"Unknown sort: {sort}"}), 400
+    if order not in ('asc', 'desc'):
+        return jsonify({"error": f"Unknown order: {order}"}), 400
+
     try:
-        # Fetch all collection names from the database
-        collections = []
-        for name in db.list_collection_names():
-            # Set default metadata
-            metadata = {
-                "author": "admin",  # Default author
-                "uploadDate": datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Current date and time
-            }
-            collections.append({
-                "name": name,
-                "author": metadata["author"],
-                "uploadDate": metadata["uploadDate"]
-            })
-        return jsonify({"collections": collections}), 200
+        events, next_cursor = list_catalog(
+            db, sort, order == 'desc', limit, request.args.get('prefix'), request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error fetching collections: {str(e)}"}), 500
 
+    collections = []
+    for event in events:
+        event["name"] = event.pop("_id")
+        collections.append(event)
+    return jsonify({"collections": collections, "nextCursor": next_cursor}), 200
+
 @app.route('/upload', methods=['POST'])
 def upload():
     # Get the uploaded file
@@ -374,156 +1094,402 @@ def upload():
         return jsonify({"error": "No new CSV file name provided"}), 400
     new_csv_name += '.csv'
 
-    # Save the uploaded file
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(file_path)
+    author = request.form.get('author') or "admin"  # Default author
 
-    # # Validate that all `pt` columns are mapped
-    # with open(file_path, mode='r') as csv_file:
-    #     reader = csv.DictReader(csv_file)
-    #     csv_headers = reader.fieldnames
+    # Optional per-event flow detection settings, e.g. {"buffer_seconds": 2, "max_burns": 0}
+    try:
+        detection = parse_detection(json.loads(request.form.get('detection') or '{}'))
+    except (ValueError, AttributeError) as e:
+        return jsonify({"error": f"Invalid detection settings: {str(e)}"}), 400
+
+    collection_name = os.path.splitext(new_csv_name)[0]  # Use the file name without the .csv extension
+    error = event_name_error(collection_name)
+    if error:
+        return jsonify({"error": error}), 400
+
+    # Keep the file on disk so the background job can read it after this request returns
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    file_path = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{secure_filename(file.filename)}")
+    file.save(file_path)
 
-    #     # Identify `pt` columns in the CSV
-    #     pt_columns = [header for header in csv_headers if header.startswith('pt')]
+    job_id = submit_job(db, collection_name, ingest_upload, file_path, tags, collection_name, author, detection)
 
-    #     # Check if all `pt` columns are in the tags mapping
-    #     unmapped_pt_columns = [col for col in pt_columns if col not in tags]
-    #     if unmapped_pt_columns:
-    #         return jsonify({
-    #             "error": "Some `pt` columns in the CSV are not mapped.",
-    #             "unmapped_pt_columns": unmapped_pt_columns
-    #         }), 400
+    return jsonify({"message": "File accepted for processing", "job_id": job_id}), 202
 
-    # Rename the headers and save the new CSV
-    renamed_csv_path = os.path.join(UPLOAD_FOLDER, secure_filename(new_csv_name))
+def ingest_upload(progress, publish, file_path, tags, collection_name, author, detection=None):
+    # Background ingest job: one streaming pass over the saved upload, which also
+    # builds the summary, then the levels
+    summary = SummaryBuilder(detection)
     try:
-        rename_headers(file_path, renamed_csv_path, tags)
-    except Exception as e:
-        return jsonify({"error": f"Error renaming headers: {str(e)}"}), 500
+        with open(file_path, mode='r', newline='') as file:
+            try:
+                ingest_csv(
+                    file, tags, db, collection_name,
+                    progress=progress, on_batch=publish, bucketed=STORAGE_MODE == "buckets", detection=detection,
+                    summary=summary,
+                )
+            except ValueError as e:
+                raise ValueError(f"Error processing CSV: {str(e)}")
+            except Exception as e:
+                raise RuntimeError(f"Error inserting into MongoDB: {str(e)}")
+    finally:
+        os.remove(file_path)
+
+    finalize_event(
+        collection_name,
+        detection=detection,
+        summary=summary,
+        author=author,
+        uploadDate=upload_date(),
+        startTime=progress.get("start_time"),
+        endTime=progress.get("end_time"),
+        channels=progress.get("channels", []),
+    )
+
+@app.route('/upload/bulk', methods=['POST'])
+def upload_bulk():
+    # Many CSVs (and/or zip archives of them) in one request, each stored as an event
+    # named after its file (plus an optional prefix), all with the same tags and
+    # detection settings. Progress and a per-file report are on /jobs/<job_id>.
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({"error": "No files uploaded"}), 400
 
-    # Process the renamed CSV to calculate start and end times
-    try:
-        trimmed_data, trimmed_headers = process_csv(renamed_csv_path, tags)
-    except Exception as e:
-        return jsonify({"error": f"Error processing CSV: {str(e)}"}), 500
+    tags = request.form.get('tags')
+    if not tags:
+        return jsonify({"error": "No tags provided"}), 400
+    tags = json.loads(tags)
 
-    try:
-        save_trimmed_csv(renamed_csv_path, trimmed_headers, trimmed_data)
-    except Exception as e:
-        return jsonify({"error": f"Error saving trimmed CSV: {str(e)}"}), 500
+    author = request.form.get('author') or "admin"
+    prefix = request.form.get('prefix') or ""
 
     try:
-        collection_name = os.path.splitext(new_csv_name)[0]  # Use the file name without the .csv extension
-        insert_to_mongo(trimmed_headers, trimmed_data, collection_name)
+        detection = parse_detection(json.loads(request.form.get('detection') or '{}'))
+    except (ValueError, AttributeError) as e:
+        return jsonify({"error": f"Invalid detection settings: {str(e)}"}), 400
+
+    # Saved under their own names, which become the event names
+    directory = os.path.join(UPLOAD_FOLDER, uuid.uuid4().hex)
+    os.makedirs(directory)
+    paths = []
+    try:
+        for file in files:
+            path = os.path.join(directory, secure_filename(file.filename) or uuid.uuid4().hex)
+            if path in paths:
+                shutil.rmtree(directory)
+                return jsonify({"error": f"File {file.filename} was uploaded twice"}), 400
+            file.save(path)
+            paths.append(path)
+        sources = bulk_sources(paths, prefix)
     except Exception as e:
-        return jsonify({"error": f"Error inserting into MongoDB: {str(e)}"}), 500
+        shutil.rmtree(directory)
+        return jsonify({"error": f"Error reading uploads: {str(e)}"}), 400
 
-    return jsonify({"message": "File processed and saved successfully"}), 200
+    if not sources:
+        shutil.rmtree(directory)
+        return jsonify({"error": "No CSV files found"}), 400
 
+    errors = [error for error in (event_name_error(event) for event, path, member in sources) if error]
+    if errors:
+        shutil.rmtree(directory)
+        return jsonify({"error": "; ".join(errors)}), 400
 
-def rename_headers(input_path, output_path, tags):
-    with open(input_path, mode='r') as infile, open(output_path, mode='w', newline='') as outfile:
-        reader = csv.DictReader(infile)
-        original_headers = reader.fieldnames
-        if not original_headers:
-            raise ValueError("CSV file has no headers.")
+    events = [event for event, path, member in sources]
+    job_id = submit_job(db, events, ingest_bulk, directory, sources, tags, author, detection)
 
-        # Map original headers to new headers using tags
-        renamed_headers = [tags.get(header, header) for header in original_headers]
+    return jsonify({"message": "Files accepted for processing", "job_id": job_id, "events": events}), 202
 
-        writer = csv.DictWriter(outfile, fieldnames=renamed_headers)
-        writer.writeheader()
-        for row in reader:
-            renamed_row = {tags.get(key, key): value for key, value in row.items()}
-            writer.writerow(renamed_row)
+def ingest_bulk(progress, publish, directory, sources, tags, author, detection=None):
+    # Background bulk ingest job: the files are ingested across the bulk pool and each
+    # one finalized here as it finishes. The job fails if any file did, with the
+    # per-file report saying which ones to upload again.
+    progress.update(files=[], rows_parsed=0, rows_inserted=0)
 
-def process_csv(file_path, tags):
-    timestamps = []
-    manifold_values = []
-    data_rows = []
+    def on_file(report, file_progress):
+        finalize_bulk_file(report, file_progress, author, detection)
+        progress["files"].append(report)
+        progress["rows_parsed"] += report["rows_parsed"]
+        progress["rows_inserted"] += report["rows_inserted"]
+        publish()
 
-    # Read the renamed CSV and extract relevant data
     try:
-        with open(file_path, mode='r') as file:
-            reader = csv.DictReader(file)
-            headers = reader.fieldnames
+        reports = run_bulk(sources, tags, detection, on_file)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    progress["files"] = reports
+    failed = [report["file"] for report in reports if report["status"] != "succeeded"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(reports)} files failed: {', '.join(failed)}")
+
+def finalize_bulk_file(report, progress, author, detection=None):
+    # Levels and summary for one ingested bulk file (progress is None if it failed)
+    if progress is None:
+        return
+    try:
+        finalize_event(
+            report["event"],
+            detection=detection,
+            summary=progress.get("summary"),
+            author=author,
+            uploadDate=upload_date(),
+            startTime=progress.get("start_time"),
+            endTime=progress.get("end_time"),
+            channels=progress.get("channels", []),
+        )
+    except Exception as e:
+        report.update(status="failed", error=f"Error finalizing event: {str(e)}")
 
-            # Ensure the required columns exist
-            if 'Time' not in headers or 'Manifold' not in headers:
-                raise ValueError("CSV must contain 'Time' and 'Manifold' columns.")
+@app.route('/live/<event_id>', methods=['POST'])
+def start_live(event_id):
+    # Open a live recording, e.g. {"author": "...", "detection": {"proximity_threshold": 15}}
+    body = request.get_json(silent=True) or {}
+    try:
+        detection = parse_detection(body.get("detection") or {})
+    except (ValueError, AttributeError) as e:
+        return jsonify({"error": f"Invalid detection settings: {str(e)}"}), 400
 
-            for row in reader:
-                # Convert timestamp from nanoseconds to seconds
-                timestamps.append(int(row['Time']) / 1_000_000_000)
-                manifold_values.append(float(row['Manifold']))
-                data_rows.append(row)
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Error: File '{file_path}' not found.")
+    try:
+        if not start_session(db, event_id, detection, body.get("author") or "admin"):
+            return jsonify({"error": "Event already exists or is being recorded"}), 409
+
+        return jsonify({"message": "Live session started", "event": event_id}), 201
     except Exception as e:
-        raise ValueError(f"Error reading file: {str(e)}")
-    
-    start_time, end_time = find_start_and_end_times(timestamps, manifold_values)
-
-    # Trim the data to the range of interest
-    trimmed_data = [
-        row for i, row in enumerate(data_rows)
-        if start_time <= timestamps[i] <= end_time
-    ]
-
-    return trimmed_data, headers
-
-def find_start_and_end_times(timestamps, manifold_values, start_slope_threshold=5000, proximity_threshold=10, buffer_seconds=5):
-    start_index = None
-    end_index = None
-
-    # Detect the start of flow based on slope
-    for i in range(1, len(manifold_values)):
-        time_diff = timestamps[i] - timestamps[i - 1]
-        if time_diff == 0:
-            continue 
-        slope = (manifold_values[i] - manifold_values[i - 1]) / (timestamps[i] - timestamps[i - 1])
-        if start_index is None and slope > start_slope_threshold:
-            start_index = i
-            break
+        return jsonify({"error": f"Error starting live session: {str(e)}"}), 500
 
-    if start_index is None:
-        raise ValueError("Flow start could not be detected.")
+@app.route('/live/<event_id>/samples', methods=['POST'])
+def post_live_samples(event_id):
+    try:
+        session = get_session(db, event_id)
+        if session is None:
+            return jsonify({"error": "No live session for the given event ID"}), 404
 
-    # Calculate the average of manifold values before the start of flow
-    pre_flow_average = sum(manifold_values[:start_index]) / len(manifold_values[:start_index])
+        rows = append_samples(db, session, sample_documents(request.get_json(silent=True)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error appending samples: {str(e)}"}), 500
+
+    return jsonify({"rows": rows}), 200
+
+@app.route('/live/<event_id>/stream', methods=['GET'])
+def stream_live(event_id):
+    # Server-Sent Events: a "snapshot", then an "update" per sample batch and a final "end"
+    session = get_session(db, event_id)
+    if session is None:
+        return jsonify({"error": "No live session for the given event ID"}), 404
+
+    response = app.response_class(viewer_events(db, session), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # Keep proxies from buffering the stream
+    return response
+
+@app.route('/live/<event_id>/finish', methods=['POST'])
+def finish_live(event_id):
+    session = finish_session(db, event_id)
+    if session is None:
+        return jsonify({"error": "No live session for the given event ID"}), 404
+
+    if not session["rows"]:
+        db[event_id].drop()
+        end_session(db, event_id)
+        return jsonify({"message": "Live session ended without samples"}), 200
+
+    job_id = submit_job(db, event_id, finalize_live, session)
+    return jsonify({"message": "Live session finished", "rows": session["rows"], "job_id": job_id}), 202
+
+def finalize_live(progress, publish, session):
+    # Background job after a live recording: optional repacking, then levels and summary
+    event = session["_id"]
+    progress.update(rows_parsed=session["rows"], rows_inserted=session["rows"], channels=session["channels"])
+    progress["start_time"] = session["start_time"] / NS_PER_SECOND
+    progress["end_time"] = session["last_time"] / NS_PER_SECOND
+    try:
+        if STORAGE_MODE == "buckets":
+            migrate_collection(db[event], db[STAGING_PREFIX + event])
+
+        finalize_event(
+            event,
+            detection=session["detection"],
+            author=session["author"],
+            uploadDate=upload_date(),
+            startTime=progress["start_time"],
+            endTime=progress["end_time"],
+            channels=session["channels"],
+        )
+    finally:
+        # Viewers still tailing the event see the session go and end their streams
+        end_session(db, event)
 
-    # Detect the end of flow based on proximity to the pre-flow average
-    for i in range(start_index + 1, len(manifold_values)):
-        if abs(manifold_values[i] - pre_flow_average) <= proximity_threshold:
-            end_index = i
-            break
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_ingest_job(job_id):
+    try:
+        job = get_job(db, job_id)
 
-    if end_index is None:
-        raise ValueError("Flow end could not be detected.")
+        if job is None:
+            return jsonify({"error": "No job found for the given ID"}), 404
 
-    # Add a buffer to the start and end times
-    start_time = max(0, timestamps[start_index] - buffer_seconds)
-    end_time = timestamps[end_index] + buffer_seconds
+        return jsonify(job), 200
+    except Exception as e:
+        return jsonify({"error": f"Error fetching job: {str(e)}"}), 500
 
-    return start_time, end_time
 
-def save_trimmed_csv(file_path, headers, data):
-    with open(file_path, mode='w', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=headers)
-        writer.writeheader()
-        writer.writerows(data)
+def warm_up_in_background():
+    try:
+        app.logger.info("Mongo pool warmed up in %.0f ms", warm_up())
+    except Exception as e:
+        app.logger.warning("Error warming up Mongo connections: %s", e)
+
+if MONGO_WARM_UP:
+    threading.Thread(target=warm_up_in_background, daemon=True).start()
+
+startup["import_ms"] = (time.perf_counter() - BOOT_STARTED) * 1000
+app.logger.info("App imported in %.0f ms", startup["import_ms"])
+
+@app.cli.command("migrate-storage")
+@click.argument("events", nargs=-1)
+def migrate_storage(events):
+    """Repack row-per-sample events into bucketed storage (all events if none given)."""
+    if not events:
+        events = [
+            name for name in db.list_collection_names()
+            if name not in INTERNAL_COLLECTIONS and not name.startswith(STAGING_PREFIX)
+        ]
 
-def insert_to_mongo(headers, data, collection_name):
-    # Convert rows to MongoDB documents
-    documents = [
-        {header: row[header] for header in headers}
-        for row in data
-    ]
+    for name in events:
+        count = migrate_collection(db[name], db[STAGING_PREFIX + name])
+        if count:
+            click.echo(f"{name}: migrated {count} rows")
+        else:
+            click.echo(f"{name}: already bucketed, skipped")
+
+@app.cli.command("reindex-events")
+@click.argument("events", nargs=-1)
+def reindex_events(events):
+    """Type and index row-per-sample events stored before reads were index-backed (all events if none given)."""
+    if not events:
+        events = [
+            name for name in db.list_collection_names()
+            if name not in INTERNAL_COLLECTIONS and not name.startswith(STAGING_PREFIX)
+        ]
 
-    # Dynamically create a new collection with the given name
-    dynamic_collection = db[collection_name]
-    dynamic_collection.insert_many(documents)
+    for name in events:
+        count = reindex_collection(db[name], db[STAGING_PREFIX + name])
+        if count is None:
+            click.echo(f"{name}: bucketed or empty, skipped")
+        else:
+            click.echo(f"{name}: typed {count} rows, indexed" if count else f"{name}: indexed")
+
+@app.cli.command("bulk-ingest")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--tags", default="{}", help="Header mapping as JSON, or a JSON file holding it.")
+@click.option("--author", default="admin", help="Author recorded for every event.")
+@click.option("--prefix", default="", help="Prepended to every event name.")
+@click.option("--detection", default="{}", help="Flow detection settings as JSON.")
+def bulk_ingest(paths, tags, author, prefix, detection):
+    """Ingest many CSV files and/or zip archives of them in parallel, one event per CSV."""
+    try:
+        if os.path.isfile(tags):
+            with open(tags) as file:
+                tags = file.read()
+        tags = json.loads(tags)
+        detection = parse_detection(json.loads(detection))
+    except (ValueError, AttributeError) as e:
+        raise click.BadParameter(str(e))
+
+    sources = bulk_sources(paths, prefix)
+    errors = [error for error in (event_name_error(event) for event, path, member in sources) if error]
+    if errors:
+        raise click.BadParameter("; ".join(errors))
+
+    def on_file(report, progress):
+        finalize_bulk_file(report, progress, author, detection)
+        if report["status"] == "succeeded":
+            click.echo(f"{report['file']} -> {report['event']}: {report['rows_inserted']} rows in {report['seconds']:.1f} s")
+        else:
+            click.echo(f"{report['file']} -> {report['event']}: failed: {report['error']}", err=True)
+
+    reports = run_bulk(sources, tags, detection, on_file)
+    failed = [report["file"] for report in reports if report["status"] != "succeeded"]
+    click.echo(f"{len(reports) - len(failed)} of {len(reports)} files ingested, {sum(report['rows_inserted'] for report in reports)} rows")
+    if failed:
+        # Re-running a file replaces its event, so retrying never duplicates rows
+        raise click.ClickException(f"Failed (safe to re-run): {', '.join(failed)}")
+
+@app.cli.command("rebuild-catalog")
+@click.option("--all", "rebuild_all", is_flag=True, help="Also rebuild events that already have a summary.")
+def rebuild_catalog(rebuild_all):
+    """Add events uploaded before the catalog existed (or every event with --all)."""
+    catalogued = set(db[SUMMARIES_COLLECTION].distinct("_id"))
+    for name in db.list_collection_names():
+        if name in INTERNAL_COLLECTIONS or name.startswith(STAGING_PREFIX):
+            continue
+        if name in catalogued and not rebuild_all:
+            continue
+
+        # The first document's ObjectId records when the event was inserted
+        first = db[name].find_one({}, {"_id": 1})
+        if first is None:
+            continue
+        uploaded = first["_id"].generation_time.strftime("%Y-%m-%d %H:%M:%S")
+
+        fields = {} if name in catalogued else {"author": "admin", "uploadDate": uploaded}
+        finalize_event(name, **fields)
+        click.echo(f"{name}: catalogued")
+
+@app.cli.command("simulate-daq")
+@click.argument("event")
+@click.option("--url", default="http://127.0.0.1:5000", help="Base URL of the running backend.")
+@click.option("--rate", default=1000, help="Samples per second.")
+@click.option("--duration", default=12.0, help="Seconds of data to record.")
+@click.option("--batch-ms", default=50, help="Milliseconds of samples sent per request.")
+@click.option("--seed", type=int, default=None, help="Noise seed for a repeatable run.")
+def simulate_daq(event, url, rate, duration, batch_ms, seed):
+    """Record a simulated hot fire into a live session in real time and report viewer latency."""
+    def post(path, body):
+        req = urllib.request.Request(
+            url + path, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(req) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            raise click.ClickException(f"{path}: {e.code} {e.read().decode()}")
+
+    post(f"/live/{event}", {"author": "simulator"})
+
+    # Watch the stream like a viewer; latency runs from the last sample of a batch
+    # being taken to its update arriving
+    latencies = []
+
+    def watch():
+        with urllib.request.urlopen(f"{url}/live/{event}/stream") as stream:
+            for line in stream:
+                if line.startswith(b"data: "):
+                    update = json.loads(line[6:])
+                    if "lastTime" in update:
+                        latencies.append((time.time_ns() - update["lastTime"]) / 1e6)
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    time.sleep(0.2)
+
+    columns = synthetic_burn(rate, duration, time.time_ns(), seed=seed)
+    for batch in column_batches(columns, max(1, rate * batch_ms // 1000)):
+        # A batch is sent as soon as its last sample would have been taken
+        delay = (int(batch["Time"][-1]) - time.time_ns()) / NS_PER_SECOND
+        if delay > 0:
+            time.sleep(delay)
+        post(f"/live/{event}/samples", {name: values.tolist() for name, values in batch.items()})
+
+    result = post(f"/live/{event}/finish", {})
+    watcher.join(timeout=5)
+    click.echo(f"{event}: {result.get('rows', 0)} rows recorded, finalize job {result.get('job_id')}")
+    if latencies:
+        click.echo(
+            f"viewer latency over {len(latencies)} updates: mean {np.mean(latencies):.1f} ms, "
+            f"p95 {np.percentile(latencies, 95):.1f} ms, max {np.max(latencies):.1f} ms"
+        )
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
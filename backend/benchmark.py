@@ -0,0 +1,345 @@
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+
+import click
+import numpy as np
+
+from simulate import synthetic_burn, write_csv
+
+# Offline benchmarks for ingest, burn detection and every per-event GET route, e.g.
+#   python benchmark.py run                          # mongomock, 10k/100k/1M rows
+#   python benchmark.py run --mongo mongodb://localhost:27017 --sizes 100000
+#   python benchmark.py compare benchmarks/<old>.json benchmarks/<new>.json
+# The app is imported only once the database is chosen, since it reads its settings
+# (and the Mongo client class) at import.
+
+DEFAULT_SIZES = "10000,100000,1000000"
+
+# Results are saved here as <time>-<commit>.json
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+# A p50 this many times the baseline's is reported as a regression
+REGRESSION_RATIO = 1.25
+
+# Query strings timed for each route (by endpoint); routes not listed run with none.
+# Series routes also run downsampled (see route_queries).
+ROUTE_QUERIES = {
+    "get_dashboard": ["", "max_points=1000"],
+    "get_derived": ["expr=(Manifold-Chamber)/Chamber", "expr=rate(TankLC)&filter=savgol&max_points=1000"],
+    "get_mass_flow_rate": ["", "max_points=1000", "filter=savgol&max_points=1000"],
+    "export_event": ["format=csv", "format=parquet"],
+}
+
+# Live routes need a recording session, and their stream never ends
+SKIPPED_PREFIXES = ("/live/",)
+
+
+def git_commit():
+    # (short commit, has uncommitted changes) of the tree being measured
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain"], text=True, stderr=subprocess.DEVNULL).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def rss_bytes():
+    # Current resident set size; falls back to the process peak off Linux
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRSS:
+    # Highest resident set size seen while the block runs, sampled every 5 ms
+    def __init__(self):
+        self.start = self.peak = rss_bytes()
+        self.running = False
+
+    def _sample(self):
+        while self.running:
+            self.peak = max(self.peak, rss_bytes())
+            time.sleep(0.005)
+
+    def __enter__(self):
+        self.start = self.peak = rss_bytes()
+        self.running = True
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.running = False
+        self.thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+def summarize(size, name, query, latencies, rss, status=200, rows=None):
+    # One result row; rows_per_s is the event size over the median latency
+    latencies = np.asarray(latencies) * 1000
+    p50 = float(np.percentile(latencies, 50))
+    return {
+        "size": size,
+        "name": name,
+        "query": query,
+        "status": status,
+        "runs": len(latencies),
+        "p50_ms": p50,
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_ms": float(latencies.mean()),
+        "rows_per_s": (rows or size) / (p50 / 1000) if p50 > 0 else None,
+        "peak_rss_mb": rss.peak / 2**20,
+        "rss_growth_mb": (rss.peak - rss.start) / 2**20,
+    }
+
+
+def use_database(mongo):
+    # Point the app at mongomock (in process, nothing to install but the package) or a
+    # mongod URI, before it is imported
+    if mongo == "mongomock":
+        try:
+            import mongomock
+        except ImportError:
+            raise click.ClickException("mongomock is not installed (pip install mongomock)")
+        import database
+        database.MongoClient = mongomock.MongoClient
+    else:
+        os.environ["uri"] = mongo
+        os.environ.setdefault("MONGO_TLS", "false")
+
+    import app as server
+    return server
+
+
+def route_queries(server):
+    # (endpoint, path template, query) for every per-event GET route
+    for rule in sorted(server.app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if "GET" not in rule.methods or rule.arguments != {"event_id"} or rule.rule.startswith(SKIPPED_PREFIXES):
+            continue
+        name = rule.rule.split("/")[-1]
+        if rule.endpoint in ROUTE_QUERIES:
+            queries = ROUTE_QUERIES[rule.endpoint]
+        elif name in server.SERIES:
+            queries = ["", "max_points=1000"]
+        else:
+            queries = [""]
+        for query in queries:
+            if query == "format=parquet" and server.pa is None:
+                continue
+            yield rule.endpoint, rule.rule, query
+
+
+def ingest(server, client, event, path, repeat):
+    # Upload the CSV and wait for its ingest job; every burn is kept whole
+    latencies = []
+    with PeakRSS() as rss:
+        for run in range(repeat):
+            if run:
+                server.db.drop_collection(event)
+            started = time.perf_counter()
+            with open(path, "rb") as file:
+                response = client.post(
+                    "/upload",
+                    data={"file": (file, "bench.csv"), "tags": "{}", "new_csv_name": event, "detection": json.dumps({"buffer_seconds": 1e9})},
+                    content_type="multipart/form-data",
+                )
+            if response.status_code != 202:
+                raise click.ClickException(f"Upload failed: {response.status_code} {response.get_data(as_text=True)}")
+            job_id = response.get_json()["job_id"]
+            while True:
+                job = client.get(f"/jobs/{job_id}").get_json()
+                if job["status"] in ("succeeded", "failed"):
+                    break
+                time.sleep(0.01)
+            if job["status"] == "failed":
+                raise click.ClickException(f"Ingest failed: {job['error']}")
+            latencies.append(time.perf_counter() - started)
+    return latencies, rss, job["rows_inserted"]
+
+
+def detect(server, event, repeat):
+    # The burn detector on its own, over columns already in memory
+    columns, _ = server.read_columns(server.db[event], ["Time", "Manifold"])
+    detection = {**server.DETECTION_DEFAULTS, "buffer_seconds": 0}
+    latencies = []
+    with PeakRSS() as rss:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            detector = server.BurnDetector(**detection)
+            detector.push_many(columns["Time"] / server.NS_PER_SECOND, columns["Manifold"])
+            latencies.append(time.perf_counter() - started)
+    return latencies, rss
+
+
+def time_route(server, client, path, query, repeat, warm):
+    # Cold runs drop the cached responses and derived arrays before every request
+    latencies = []
+    status = 200
+    event = path.split("/")[1]
+    with PeakRSS() as rss:
+        for _ in range(repeat):
+            if not warm:
+                server.response_cache.invalidate(event)
+                server.derived_cache.invalidate(event)
+            started = time.perf_counter()
+            response = client.get(path, query_string=query)
+            response.get_data()  # Streamed bodies are produced here
+            latencies.append(time.perf_counter() - started)
+            status = response.status_code
+    return latencies, rss, status
+
+
+def print_results(results):
+    click.echo(f"{'rows':>9} {'benchmark':<40} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'rows/s':>12} {'peak MB':>9}")
+    for result in results:
+        label = result["name"] + (f"?{result['query']}" if result["query"] else "")
+        if result["status"] != 200:
+            label += f" [{result['status']}]"
+        rate = f"{result['rows_per_s']:.0f}" if result["rows_per_s"] else "-"
+        click.echo(
+            f"{result['size']:>9} {label[:40]:<40} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} "
+            f"{result['p99_ms']:>10.2f} {rate:>12} {result['peak_rss_mb']:>9.1f}"
+        )
+
+
+def compare_results(baseline, current, ratio=REGRESSION_RATIO):
+    # Print the p50 change of every benchmark both runs share; returns the regressions
+    previous = {(result["size"], result["name"], result["query"]): result for result in baseline["results"]}
+    regressions = []
+    click.echo(f"{baseline['commit']} -> {current['commit']}")
+    for result in current["results"]:
+        before = previous.get((result["size"], result["name"], result["query"]))
+        if before is None or not before["p50_ms"]:
+            continue
+        change = result["p50_ms"] / before["p50_ms"]
+        flag = ""
+        if change > ratio:
+            flag = "  REGRESSION"
+            regressions.append(result)
+        label = result["name"] + (f"?{result['query']}" if result["query"] else "")
+        click.echo(f"{result['size']:>9} {label[:40]:<40} {before['p50_ms']:>10.2f} -> {result['p50_ms']:>10.2f} ms  x{change:.2f}{flag}")
+    return regressions
+
+
+@click.group()
+def cli():
+    """Synthetic hot-fire data and backend benchmarks."""
+
+
+@cli.command()
+@click.argument("path", type=click.Path(dir_okay=False, writable=True))
+@click.option("--rows", default=100_000, help="Samples to generate.")
+@click.option("--rate", default=1000, help="Samples per second.")
+@click.option("--burn-seconds", type=float, default=None, help="Burn length (default: half the log).")
+@click.option("--seed", type=int, default=0, help="Noise seed.")
+def generate(path, rows, rate, burn_seconds, seed):
+    """Write a synthetic hot-fire CSV (Time, Manifold, Tank, Chamber, TankLC, ThrustLC)."""
+    duration = rows / rate
+    burn_seconds = burn_seconds if burn_seconds is not None else duration / 2
+    columns = synthetic_burn(rate, duration, time.time_ns(), burn_start=(duration - burn_seconds) / 2, burn_seconds=burn_seconds, seed=seed)
+    with open(path, "w") as file:
+        write_csv(columns, file)
+    click.echo(f"{path}: {len(columns['Time'])} rows at {rate} Hz")
+
+
+@cli.command()
+@click.option("--sizes", default=DEFAULT_SIZES, help="Comma-separated event sizes in rows.")
+@click.option("--rate", default=1000, help="Samples per second of the generated events.")
+@click.option("--mongo", default="mongomock", help="mongomock, or a mongod URI (e.g. mongodb://localhost:27017).")
+@click.option("--repeat", default=5, help="Timed runs per route.")
+@click.option("--ingest-repeat", default=1, help="Timed uploads per size.")
+@click.option("--warm", is_flag=True, help="Keep response caches between runs (measures cache hits).")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Results file (default: benchmarks/<time>-<commit>.json).")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), default=None, help="Earlier results to compare against.")
+def run(sizes, rate, mongo, repeat, ingest_repeat, warm, output, baseline):
+    """Time ingest, burn detection and every per-event GET route at each size."""
+    sizes = [int(size) for size in sizes.split(",") if size.strip()]
+    workdir = tempfile.mkdtemp(prefix="rp-bench-")
+    os.environ["UPLOAD_FOLDER"] = os.path.join(workdir, "uploads")
+    server = use_database(mongo)
+    client = server.app.test_client()
+    commit, dirty = git_commit()
+
+    results = []
+    for size in sizes:
+        event = f"bench_{size}"
+        path = os.path.join(workdir, f"{event}.csv")
+        duration = size / rate
+        columns = synthetic_burn(rate, duration, time.time_ns(), burn_start=duration / 4, burn_seconds=duration / 2, seed=size)
+        with open(path, "w") as file:
+            write_csv(columns, file)
+        del columns
+
+        server.db.drop_collection(event)
+        click.echo(f"{size} rows: ingest")
+        latencies, rss, rows = ingest(server, client, event, path, ingest_repeat)
+        results.append(summarize(size, "ingest", "", latencies, rss, rows=rows))
+
+        latencies, rss = detect(server, event, repeat)
+        results.append(summarize(size, "burn_detection", "", latencies, rss, rows=rows))
+
+        for endpoint, rule, query in route_queries(server):
+            click.echo(f"{size} rows: {rule}?{query}" if query else f"{size} rows: {rule}")
+            latencies, rss, status = time_route(server, client, rule.replace("<event_id>", event), query, repeat, warm)
+            results.append(summarize(size, rule.replace("/<event_id>/", ""), query, latencies, rss, status, rows))
+
+        server.db.drop_collection(event)
+        os.remove(path)
+
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mongo": "mongomock" if mongo == "mongomock" else "mongod",
+        "rate": rate,
+        "repeat": repeat,
+        "warm": warm,
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{commit}{'-dirty' if dirty else ''}.json")
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    print_results(results)
+    click.echo(f"Saved {output}")
+
+    if baseline:
+        with open(baseline) as file:
+            if compare_results(json.load(file), report):
+                sys.exit(1)
+
+
+@cli.command()
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False))
+@click.argument("current", type=click.Path(exists=True, dir_okay=False))
+@click.option("--ratio", default=REGRESSION_RATIO, help="p50 slowdown reported as a regression.")
+def compare(baseline, current, ratio):
+    """Compare two saved runs; exits 1 when any benchmark regressed."""
+    with open(baseline) as file:
+        baseline = json.load(file)
+    with open(current) as file:
+        current = json.load(file)
+    if compare_results(baseline, current, ratio):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,127 @@
+import io
+import os
+import time
+import zipfile
+import multiprocessing
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from werkzeug.utils import secure_filename
+
+from database import LazyDatabase
+from ingest import INSERT_CONCURRENCY, ingest_csv
+from storage import STORAGE_MODE
+from summary import SummaryBuilder
+
+# Files parsed at once by a bulk ingest. Each runs in its own process (CSV parsing
+# and burn detection are pure Python, so threads would share one core); 0 parses in
+# threads of this process instead, for hosts that can't start processes.
+BULK_PROCESSES = int(os.getenv("BULK_PROCESSES", str(os.cpu_count() or 1)))
+
+# Created on first use; spawned rather than forked, as the app runs other threads
+_executor = None
+
+# The worker processes' own connection (see database.py)
+db = LazyDatabase()
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        if BULK_PROCESSES:
+            _executor = ProcessPoolExecutor(max_workers=BULK_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bulk")
+    return _executor
+
+
+def _reset_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def bulk_sources(paths, prefix=""):
+    # (event, path, zip member or None) for every CSV among the given files and zip
+    # archives; events are named after the file, e.g. prefix + "hf_12" for hf_12.csv
+    sources = []
+    for path in paths:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                members = [
+                    info.filename for info in archive.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith(".csv")
+                    and not os.path.basename(info.filename).startswith(".")
+                ]
+            sources += [(_event_name(member, prefix), path, member) for member in members]
+        else:
+            sources.append((_event_name(path, prefix), path, None))
+    return sources
+
+
+def _event_name(path, prefix):
+    return secure_filename(prefix + os.path.splitext(os.path.basename(path))[0])
+
+
+def ingest_file(path, member, tags, event, detection=None, bucketed=False):
+    # Worker side of a bulk ingest: the same streaming ingest as /upload, with
+    # parallel inserts. Re-running a file replaces its event, so a failed or
+    # interrupted file can simply be retried.
+    if member is None:
+        with open(path, mode="r", newline="") as file:
+            return _ingest(file, tags, event, detection, bucketed)
+
+    with zipfile.ZipFile(path) as archive, archive.open(member) as raw:
+        return _ingest(io.TextIOWrapper(raw, newline=""), tags, event, detection, bucketed)
+
+
+def _ingest(lines, tags, event, detection, bucketed):
+    # The summary is built in the worker as the file is written and sent back with
+    # the progress, for finalize_event
+    progress = {}
+    summary = SummaryBuilder(detection)
+    started = time.perf_counter()
+    ingest_csv(lines, tags, db, event, progress=progress, bucketed=bucketed, detection=detection, concurrency=INSERT_CONCURRENCY, summary=summary)
+    progress["seconds"] = round(time.perf_counter() - started, 3)
+    progress["summary"] = summary
+    return progress
+
+
+def run_bulk(sources, tags, detection=None, on_file=None):
+    # Ingest every source across the pool. on_file(report, progress) is called in this
+    # process as each file finishes, with the worker's progress dict for a file that
+    # succeeded (None otherwise). Returns the per-file reports in source order.
+    reports = []
+    futures = {}
+    seen = set()
+    for event, path, member in sources:
+        report = {"file": member or os.path.basename(path), "event": event, "status": "queued", "rows_parsed": 0, "rows_inserted": 0, "seconds": None, "error": None}
+        reports.append(report)
+        # Two files for one event would overwrite each other
+        if event in seen:
+            report.update(status="failed", error=f"Another file in this ingest is also named {event}")
+            if on_file:
+                on_file(report, None)
+            continue
+        seen.add(event)
+        futures[_pool().submit(ingest_file, path, member, tags, event, detection, STORAGE_MODE == "buckets")] = report
+
+    for future in as_completed(futures):
+        report = futures[future]
+        progress = None
+        try:
+            progress = future.result()
+            report.update(
+                status="succeeded", rows_parsed=progress.get("rows_parsed", 0),
+                rows_inserted=progress.get("rows_inserted", 0), seconds=progress["seconds"],
+            )
+        except BrokenExecutor as e:
+            # A worker died (e.g. out of memory); start a fresh pool for the next ingest
+            _reset_pool()
+            report.update(status="failed", error=f"Worker process failed: {str(e)}")
+        except Exception as e:
+            report.update(status="failed", error=str(e))
+        if on_file:
+            on_file(report, progress)
+
+    return reports
@@ -0,0 +1,143 @@
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Memory budget for cached response bodies; least recently used entries go first
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Memory budget for evaluated derived-channel arrays
+DERIVED_CACHE_MAX_BYTES = int(os.getenv("DERIVED_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Optional directory for a second tier that survives restarts
+CACHE_DIR = os.getenv("CACHE_DIR")
+
+# Disk budget for CACHE_DIR, shared by every worker writing to it; the least
+# recently used files go first
+CACHE_DIR_MAX_BYTES = int(os.getenv("CACHE_DIR_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+
+def cache_key(event_id, version, path, args, *variant):
+    # Query parameters are sorted so ?a=1&b=2 and ?b=2&a=1 share an entry; variant
+    # holds anything else the body depends on (negotiated format and encoding)
+    return (event_id, version, path, tuple(sorted(args.items(multi=True))), *variant)
+
+
+def entry_etag(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, directory=CACHE_DIR, disk_max_bytes=CACHE_DIR_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        # Bytes this process has written to the directory since it was last pruned
+        self.disk_written = 0
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._prune_disk()
+
+    def _path(self, key):
+        # Files are prefixed by the event so one event can be dropped without an index
+        event_hash = hashlib.sha1(key[0].encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{event_hash}_{entry_etag(key)}.pickle")
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+
+        if self.directory:
+            try:
+                path = self._path(key)
+                with open(path, "rb") as file:
+                    entry = pickle.load(file)
+                # Reads count as use, so pruning keeps the files any worker still serves
+                os.utime(path)
+            except (OSError, pickle.PickleError, EOFError):
+                return None
+            self._remember(key, entry)
+            return entry
+
+        return None
+
+    def put(self, key, entry):
+        self._remember(key, entry)
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path + ".tmp", "wb") as file:
+                    pickle.dump(entry, file)
+                os.replace(path + ".tmp", path)
+            except OSError:
+                # The memory tier still has the entry
+                return
+
+            # Other workers write to the same directory, so it is rescanned after every
+            # tenth of the budget this process writes rather than tracked exactly
+            with self.lock:
+                self.disk_written += len(entry["body"])
+                prune = self.disk_written >= self.disk_max_bytes // 10
+                if prune:
+                    self.disk_written = 0
+            if prune:
+                self._prune_disk()
+
+    def _prune_disk(self):
+        # Delete the least recently used files until the directory fits its budget
+        files = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for item in scan:
+                    try:
+                        stat = item.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, item.path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def _remember(self, key, entry):
+        size = len(entry["body"])
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key)["body"])
+            self.entries[key] = entry
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted["body"])
+
+    def invalidate(self, event_id):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == event_id]:
+                self.size -= len(self.entries.pop(key)["body"])
+
+        if self.directory:
+            prefix = hashlib.sha1(event_id.encode()).hexdigest()[:16] + "_"
+            for name in os.listdir(self.directory):
+                if name.startswith(prefix):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
@@ -0,0 +1,107 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import MongoClient, ReadPreference
+from pymongo.server_api import ServerApi
+
+DB_NAME = "rp-analysis"
+
+# Connection pool and timeout settings; a small pool suits serverless instances,
+# gunicorn workers with many threads may want more
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "10"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+
+# Read preference for event data reads (e.g. "secondaryPreferred" to keep dashboards
+# off the primary). Events never change after upload, so slightly stale replicas are safe.
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+
+# How long after an event changes its responses stay uncached when reads may come
+# from a lagging secondary
+REPLICA_SETTLE_SECONDS = 0 if MONGO_READ_PREFERENCE == "primary" else int(os.getenv("MONGO_REPLICA_SETTLE_SECONDS", "30"))
+
+# Documents per cursor batch when reading event data; the driver's first batch is
+# only 101 documents otherwise
+MONGO_BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", "10000"))
+
+# Atlas requires TLS; a local mongod (e.g. for benchmark.py) usually has none
+MONGO_TLS = os.getenv("MONGO_TLS", "true").lower() in ("1", "true", "yes")
+
+# Open MONGO_MIN_POOL_SIZE (at least one) connections as soon as the app is imported
+MONGO_WARM_UP = os.getenv("MONGO_WARM_UP", "").lower() in ("1", "true", "yes")
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+# Milliseconds spent creating the client and warming the pool, per process
+timings = {"connect_ms": None, "warm_up_ms": None}
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    # The client is created on first use, and again in a forked child (e.g. a
+    # gunicorn worker), because a MongoClient must not be shared across fork
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            started = time.perf_counter()
+            # Enable TLS/SSL and do not allow invalid certificates
+            tls_options = {"tls": True, "tlsAllowInvalidCertificates": False} if MONGO_TLS else {}
+            _client = MongoClient(
+                os.getenv("uri"),
+                **tls_options,
+                server_api=ServerApi('1'),  # Use Server API version 1
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            )
+            _client_pid = os.getpid()
+            timings["connect_ms"] = (time.perf_counter() - started) * 1000
+    return _client
+
+
+class LazyDatabase:
+    # Stands in for the pymongo Database and only connects when first used, so
+    # importing the app (cold start, gunicorn master) opens no connections
+    def __init__(self, read_preference="primary"):
+        if read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Unknown read preference: {read_preference}")
+        self.read_preference = READ_PREFERENCES[read_preference]
+
+    def database(self):
+        return get_client().get_database(DB_NAME, read_preference=self.read_preference)
+
+    def __getitem__(self, name):
+        return self.database()[name]
+
+    def __getattr__(self, name):
+        return getattr(self.database(), name)
+
+
+def warm_up(connections=None):
+    # Ping the server from several threads at once so the pool holds that many open
+    # (TLS-negotiated) connections before the first request needs one
+    connections = connections or max(MONGO_MIN_POOL_SIZE, 1)
+    started = time.perf_counter()
+    client = get_client()
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        list(pool.map(lambda _: client.admin.command("ping"), range(connections)))
+    timings["warm_up_ms"] = (time.perf_counter() - started) * 1000
+    return timings["warm_up_ms"]
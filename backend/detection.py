@@ -0,0 +1,132 @@
+import numpy as np
+
+# Flow detection settings, overridable per event:
+#   start_slope_threshold  Manifold rise (PSI/s) that marks the start of flow
+#   proximity_threshold    distance (PSI) from the pre-flow mean that marks its end
+#   buffer_seconds         data kept on each side of a burn when trimming at ingest
+#   max_burns              burns to look for in one log (0 for no limit)
+DETECTION_DEFAULTS = {"start_slope_threshold": 5000, "proximity_threshold": 10, "buffer_seconds": 5, "max_burns": 1}
+
+
+def parse_detection(values):
+    # Validated detection overrides from a request (JSON body, form or query args)
+    unknown = [key for key in values if key not in DETECTION_DEFAULTS]
+    if unknown:
+        raise ValueError(f"Unknown detection thresholds: {', '.join(unknown)}")
+
+    detection = {}
+    for key, value in values.items():
+        try:
+            detection[key] = int(value) if key == "max_burns" else float(value)
+        except (TypeError, ValueError):
+            raise ValueError("Detection thresholds must be numbers")
+    return detection
+
+
+class BurnDetector:
+    # Single-pass flow detector. Feed it Manifold samples in time order, one at a
+    # time with push() or as arrays with push_many(); it keeps only a running pre-flow
+    # sum and the previous sample. A burn starts at the first sample whose slope from
+    # the previous one exceeds start_slope_threshold and ends at the first later sample
+    # back within proximity_threshold of the mean of the samples before the start.
+    # After a burn ends, the search for the next one starts from its end sample.
+    def __init__(self, start_slope_threshold=5000, proximity_threshold=10, buffer_seconds=5, max_burns=1):
+        self.start_slope_threshold = start_slope_threshold
+        self.proximity_threshold = proximity_threshold
+        self.buffer_seconds = buffer_seconds
+        self.max_burns = max_burns
+        self.burns = []
+        self.flow_start = None
+        self.pre_flow_average = None
+        self.previous = None
+        self.pre_flow_sum = 0.0
+        self.pre_flow_count = 0
+
+    @property
+    def done(self):
+        return bool(self.max_burns) and len(self.burns) >= self.max_burns
+
+    def _start(self, timestamp):
+        self.pre_flow_average = self.pre_flow_sum / self.pre_flow_count
+        self.flow_start = timestamp
+
+    def _end(self, timestamp, manifold):
+        self.burns.append((self.flow_start, timestamp))
+        self.flow_start = None
+        # The end sample opens the pre-flow period of the next burn
+        self.previous = (timestamp, manifold)
+        self.pre_flow_sum = manifold
+        self.pre_flow_count = 1
+
+    def push(self, timestamp, manifold):
+        # Returns "start" or "end" when the sample starts or ends a burn, else None
+        if self.done:
+            return None
+
+        if self.flow_start is not None:
+            if abs(manifold - self.pre_flow_average) <= self.proximity_threshold:
+                self._end(timestamp, manifold)
+                return "end"
+            return None
+
+        if self.previous is not None:
+            time_diff = timestamp - self.previous[0]
+            if time_diff != 0 and (manifold - self.previous[1]) / time_diff > self.start_slope_threshold:
+                self._start(timestamp)
+                return "start"
+
+        self.pre_flow_sum += manifold
+        self.pre_flow_count += 1
+        self.previous = (timestamp, manifold)
+        return None
+
+    def push_many(self, timestamps, manifold):
+        # Vectorized push() over a chunk of samples (seconds, PSI)
+        i = 0
+        n = len(timestamps)
+        while i < n and not self.done:
+            if self.flow_start is not None:
+                close = np.abs(manifold[i:] - self.pre_flow_average) <= self.proximity_threshold
+                if not close.any():
+                    return
+                j = i + int(close.argmax())
+                self._end(float(timestamps[j]), float(manifold[j]))
+                i = j + 1
+                continue
+
+            if self.previous is None:
+                self.push(float(timestamps[i]), float(manifold[i]))
+                i += 1
+                continue
+
+            time_diff = np.diff(timestamps[i:], prepend=self.previous[0])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                slope = np.diff(manifold[i:], prepend=self.previous[1]) / time_diff
+            rising = (time_diff != 0) & (slope > self.start_slope_threshold)
+            j = i + int(rising.argmax()) if rising.any() else n
+
+            self.pre_flow_sum += float(manifold[i:j].sum())
+            self.pre_flow_count += j - i
+            if j == n:
+                self.previous = (float(timestamps[-1]), float(manifold[-1]))
+                return
+            self._start(float(timestamps[j]))
+            i = j + 1
+
+    def result(self):
+        # The first burn in the shape /burntime has always returned, plus every burn
+        # found. A burn still in progress at the end of the log is listed with no end.
+        if not self.burns:
+            if self.flow_start is None:
+                raise ValueError("Flow start could not be detected.")
+            raise ValueError("Flow end could not be detected.")
+
+        burns = [
+            {"start_time": start, "end_time": end, "burn_time": end - start}
+            for start, end in self.burns
+        ]
+        if self.flow_start is not None:
+            burns.append({"start_time": self.flow_start, "end_time": None, "burn_time": None})
+
+        first = burns[0]
+        return {"burn_time": first["burn_time"], "start_time": first["start_time"], "end_time": first["end_time"], "burns": burns}
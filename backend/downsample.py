@@ -0,0 +1,183 @@
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+# Point budgets precomputed for every series at upload, coarsest first
+LEVEL_SIZES = (1_000, 10_000, 100_000)
+
+
+def window_mask(time, t0=None, t1=None):
+    mask = np.ones(time.shape, dtype=bool)
+    if t0 is not None:
+        mask &= time >= t0
+    if t1 is not None:
+        mask &= time <= t1
+    return mask
+
+
+def lttb_indices(x, y, n_out):
+    # Largest-triangle-three-buckets: keeps the first and last point and, for each
+    # bucket in between, the point forming the largest triangle with the previously
+    # kept point and the average of the next bucket
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y, n_out):
+    # Keep the minimum and maximum of each of n_out / 2 equal-width buckets
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(np.int64)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = y[start:end]
+        selected.append(start + int(bucket.argmin()))
+        selected.append(start + int(bucket.argmax()))
+    return np.unique(selected)
+
+
+def downsample_indices(time, channels, max_points, method="lttb"):
+    # Indices to keep so every channel is shape-preserved within max_points total.
+    # The budget is split across channels and each channel's global min/max is
+    # always kept so peaks survive any reduction.
+    n = len(time)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+
+    budget = max(max_points // max(len(channels), 1), 4)
+    selected = []
+    for values in channels.values():
+        if method == "minmax":
+            selected.append(minmax_indices(values, budget))
+        else:
+            selected.append(lttb_indices(time, values, budget - 2))
+            selected.append([int(values.argmin()), int(values.argmax())])
+    return np.unique(np.concatenate(selected).astype(np.int64))
+
+
+def shape_series(time, channels, max_points=None, t0=None, t1=None, method="lttb"):
+    # Apply the optional time window and downsample, returning new arrays
+    if t0 is not None or t1 is not None:
+        mask = window_mask(time, t0, t1)
+        time = time[mask]
+        channels = {name: values[mask] for name, values in channels.items()}
+
+    if max_points is not None and len(time) > max_points:
+        keep = downsample_indices(time, channels, max_points, method)
+        time = time[keep]
+        channels = {name: values[keep] for name, values in channels.items()}
+
+    return time, channels
+
+
+def build_levels(time, channels):
+    # Peak-preserving min/max reductions of a full series at each LEVEL_SIZES budget
+    levels = []
+    for size in LEVEL_SIZES:
+        if size * 2 > len(time):
+            break
+        keep = downsample_indices(time, channels, size, method="minmax")
+        levels.append((size, time[keep], {name: values[keep] for name, values in channels.items()}))
+    return levels
+
+
+class LevelBuilder:
+    # build_levels for a series that arrives in time-ordered chunks (see
+    # analysis.series_chunks), holding only each channel's running min and max per
+    # bucket rather than the series. Buckets split [t_first, t_last] into equal spans
+    # of time, which is also how pick_level estimates a window's share of a level.
+    def __init__(self, channels, t_first, t_last, sizes=LEVEL_SIZES):
+        self.channels = list(channels)
+        self.t_first = t_first
+        self.span = t_last - t_first
+        self.count = 0
+        self.first = None
+        self.last = None
+        # size -> (buckets, [(sign, key, time, values)] for each channel's min and max);
+        # the smallest sign * value per bucket wins, with its sample's time and channels
+        self.levels = {}
+        for size in sizes:
+            buckets = max(size // max(len(self.channels), 1), 4) // 2
+            extremes = [
+                (sign, np.full(buckets, np.inf), np.full(buckets, np.nan), np.full((buckets, len(self.channels)), np.nan))
+                for _ in self.channels for sign in (1, -1)
+            ]
+            self.levels[size] = (buckets, extremes)
+
+    def add(self, time, channels):
+        if not len(time):
+            return
+        self.count += len(time)
+        self.first = float(time[0]) if self.first is None else self.first
+        self.last = float(time[-1])
+        values = np.column_stack([channels[name] for name in self.channels])
+        position = (time - self.t_first) / self.span if self.span > 0 else np.zeros(len(time))
+
+        for buckets, extremes in self.levels.values():
+            bucket = np.clip((position * buckets).astype(np.int64), 0, buckets - 1)
+            for i, (sign, key, times, rows) in enumerate(extremes):
+                candidate = sign * values[:, i // 2]
+                valid = np.flatnonzero(~np.isnan(candidate))
+                if not valid.size:
+                    continue
+                # The first smallest key of each bucket this chunk touches
+                order = valid[np.lexsort((candidate[valid], bucket[valid]))]
+                winners = order[np.r_[True, bucket[order][1:] != bucket[order][:-1]]]
+                better = winners[candidate[winners] < key[bucket[winners]]]
+                key[bucket[better]] = candidate[better]
+                times[bucket[better]] = time[better]
+                rows[bucket[better]] = values[better]
+
+    def result(self):
+        # [(size, time, channels)] as build_levels returns them
+        levels = []
+        for size, (buckets, extremes) in sorted(self.levels.items()):
+            if size * 2 > self.count:
+                break
+            kept = [(times[np.isfinite(key)], rows[np.isfinite(key)]) for _, key, times, rows in extremes]
+            time, keep = np.unique(np.concatenate([times for times, _ in kept]), return_index=True)
+            rows = np.concatenate([rows for _, rows in kept])[keep]
+            levels.append((size, time, {name: rows[:, i] for i, name in enumerate(self.channels)}))
+        return levels
+
+
+def pick_level(levels, max_points, t0=None, t1=None):
+    # Coarsest precomputed level that still has at least max_points samples inside
+    # the requested window, or None when only the raw data is detailed enough.
+    # levels is a list of {"size", "t_first", "t_last"} dicts.
+    for level in sorted(levels, key=lambda level: level["size"]):
+        span = level["t_last"] - level["t_first"]
+        lo = level["t_first"] if t0 is None else max(t0, level["t_first"])
+        hi = level["t_last"] if t1 is None else min(t1, level["t_last"])
+        fraction = (hi - lo) / span if span > 0 else 1.0
+        if level["size"] * fraction >= max_points:
+            return level
+    return None
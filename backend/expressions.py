@@ -0,0 +1,246 @@
+import re
+import functools
+
+import numpy as np
+
+import filters
+
+# Derived channels every event has, by name. Expressions may use these names like
+# stored channels (e.g. "Impulse / Time"); Time is seconds from the event start.
+DERIVED_CHANNELS = {
+    "DP": "Tank - Manifold",
+    "Stiffness": "(Manifold - Chamber) / Chamber",
+    "Mdot": "rate(TankLC)",
+    "Impulse": "integrate(ThrustLC)",
+}
+
+# Longest expression accepted from a request
+MAX_EXPRESSION_LENGTH = 500
+
+# Deepest nesting of parentheses, calls, signs and powers accepted, well inside
+# Python's recursion limit
+MAX_EXPRESSION_DEPTH = 50
+
+TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|([A-Za-z_][A-Za-z0-9_]*)|(\*\*|[-+*/^(),]))")
+
+
+def _diff(values, time):
+    # Step from the previous sample; the first sample has none
+    return np.concatenate([[np.nan], np.diff(values)])
+
+
+def _integrate(values, time):
+    # Running trapezoidal integral over Time (seconds). Steps with a missing value or
+    # no forward time step add nothing.
+    steps = (values[1:] + values[:-1]) / 2 * np.diff(time)
+    steps[~np.isfinite(steps) | ~(np.diff(time) > 0)] = 0.0
+    return np.concatenate([[0.0], np.cumsum(steps)])
+
+
+def _rate(values, time):
+    # Raw rate of change per second; filtered requests use filters.rate instead.
+    # Steps where time doesn't move forward (repeated or out-of-order samples) have
+    # no rate, as in the original per-row mdot loop.
+    step = _diff(time, time)
+    return np.where(step > 0, _diff(values, time) / step, np.nan)
+
+
+# Functions an expression may call: name -> (arity, implementation(values..., time))
+FUNCTIONS = {
+    "diff": (1, _diff),
+    "rate": (1, _rate),
+    "integrate": (1, _integrate),
+    "abs": (1, lambda values, time: np.abs(values)),
+    "sqrt": (1, lambda values, time: np.sqrt(values)),
+    "log": (1, lambda values, time: np.log(values)),
+    "exp": (1, lambda values, time: np.exp(values)),
+    "min": (2, lambda a, b, time: np.minimum(a, b)),
+    "max": (2, lambda a, b, time: np.maximum(a, b)),
+}
+
+OPERATORS = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.divide,
+    "^": np.power,
+}
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Unexpected character at position {position}: {text[position:].lstrip()[:1]!r}")
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(("num", float(number)))
+        elif name is not None:
+            tokens.append(("name", name))
+        else:
+            tokens.append(("op", "^" if symbol == "**" else symbol))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    # Recursive descent over the usual precedence: + - below * / below unary minus
+    # below ^ (right associative). Nodes are hashable tuples so equal subexpressions
+    # share one memo entry when evaluated.
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.position = 0
+        self.depth = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, symbol=None):
+        token = self.peek()
+        if token[0] is None or (symbol is not None and token != ("op", symbol)):
+            raise ValueError(f"Expected {symbol!r}" if symbol else "Unexpected end of expression")
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.sum()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected {self.peek()[1]!r}")
+        return node
+
+    def sum(self):
+        node = self.product()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            node = ("op", self.take()[1], node, self.product())
+        return node
+
+    def product(self):
+        node = self.unary()
+        while self.peek() in (("op", "*"), ("op", "/")):
+            node = ("op", self.take()[1], node, self.unary())
+        return node
+
+    def unary(self):
+        # Every nested operand passes through here, so this bounds the recursion
+        self.depth += 1
+        if self.depth > MAX_EXPRESSION_DEPTH:
+            raise ValueError(f"Expressions may nest at most {MAX_EXPRESSION_DEPTH} levels deep")
+        try:
+            if self.peek() in (("op", "-"), ("op", "+")):
+                sign = self.take()[1]
+                node = self.unary()
+                return ("neg", node) if sign == "-" else node
+            return self.power()
+        finally:
+            self.depth -= 1
+
+    def power(self):
+        node = self.atom()
+        if self.peek() == ("op", "^"):
+            self.take()
+            node = ("op", "^", node, self.unary())
+        return node
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == "num":
+            return ("num", value)
+        if kind == "name":
+            if self.peek() != ("op", "("):
+                return ("name", value)
+            if value not in FUNCTIONS:
+                raise ValueError(f"Unknown function: {value}")
+            self.take("(")
+            args = [self.sum()]
+            while self.peek() == ("op", ","):
+                self.take()
+                args.append(self.sum())
+            self.take(")")
+            if len(args) != FUNCTIONS[value][0]:
+                raise ValueError(f"{value}() takes {FUNCTIONS[value][0]} argument(s)")
+            return ("call", value, tuple(args))
+        if value == "(":
+            node = self.sum()
+            self.take(")")
+            return node
+        raise ValueError(f"Unexpected {value!r}")
+
+
+def _names(node, seen=()):
+    # Stored channels a node reads, following derived channel names
+    kind = node[0]
+    if kind == "name":
+        if node[1] in DERIVED_CHANNELS and node[1] not in seen:
+            return _names(compile_expression(DERIVED_CHANNELS[node[1]]).tree, (*seen, node[1]))
+        return {node[1]}
+    if kind == "neg":
+        return _names(node[1], seen)
+    if kind == "op":
+        return _names(node[2], seen) | _names(node[3], seen)
+    if kind == "call":
+        return set().union(*(_names(arg, seen) for arg in node[2]))
+    return set()
+
+
+class Expression:
+    # A parsed expression, evaluated as whole-column numpy operations
+    def __init__(self, text):
+        if len(text) > MAX_EXPRESSION_LENGTH:
+            raise ValueError(f"Expressions are limited to {MAX_EXPRESSION_LENGTH} characters")
+        self.text = text
+        self.tree = _Parser(text).parse()
+        self.channels = sorted(_names(self.tree) - {"Time"})
+
+    def evaluate(self, columns, time, memo=None, filtering=None):
+        # Values per row, NaN where an input is missing or the result is undefined.
+        # time is relative seconds (NaN for rows without one). With a filter (see
+        # filters.parse_filter) every stored channel is smoothed and rate() uses the
+        # filter's derivative of its raw input. Pass the same memo to several
+        # evaluations over the same columns and filter to share their subexpressions.
+        memo = {} if memo is None else memo
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            values = self._evaluate(self.tree, columns, time, memo, (), filtering, filtering is not None)
+        return np.broadcast_to(values, time.shape).astype(np.float64)
+
+    def _evaluate(self, node, columns, time, memo, seen, filtering, smoothed):
+        if (node, smoothed) in memo:
+            return memo[node, smoothed]
+
+        kind = node[0]
+        if kind == "num":
+            values = node[1]
+        elif kind == "name":
+            name = node[1]
+            if name == "Time":
+                values = time
+            elif name in columns:
+                values = filters.smooth(columns[name], time, filtering) if smoothed else columns[name]
+            elif name in DERIVED_CHANNELS and name not in seen:
+                derived = compile_expression(DERIVED_CHANNELS[name])
+                values = derived._evaluate(derived.tree, columns, time, memo, (*seen, name), filtering, smoothed)
+            else:
+                raise ValueError(f"Unknown channel: {name}")
+        elif kind == "neg":
+            values = -self._evaluate(node[1], columns, time, memo, seen, filtering, smoothed)
+        elif kind == "op":
+            left = self._evaluate(node[2], columns, time, memo, seen, filtering, smoothed)
+            right = self._evaluate(node[3], columns, time, memo, seen, filtering, smoothed)
+            values = OPERATORS[node[1]](left, right)
+        elif node[1] == "rate" and filtering is not None:
+            raw = self._evaluate(node[2][0], columns, time, memo, seen, filtering, False)
+            values = filters.rate(np.broadcast_to(raw, time.shape).astype(np.float64), time, filtering)
+        else:
+            args = [np.broadcast_to(self._evaluate(arg, columns, time, memo, seen, filtering, smoothed), time.shape) for arg in node[2]]
+            values = FUNCTIONS[node[1]][1](*args, time)
+
+        memo[node, smoothed] = values
+        return values
+
+
+@functools.lru_cache(maxsize=256)
+def compile_expression(text):
+    # Parsed once per distinct text; raises ValueError for a malformed expression
+    return Expression(text)
@@ -0,0 +1,143 @@
+import math
+
+import numpy as np
+
+# Optional dependency: without scipy the Butterworth filter is not offered
+try:
+    from scipy import signal
+except ImportError:
+    signal = None
+
+# Filters a request may select with ?filter=, and the settings each one takes:
+#   moving_average  window  samples averaged around each point
+#   savgol          window, order  Savitzky-Golay polynomial fit (order < window)
+#   regression      window  moving-average values; rates are the least-squares
+#                           slope over the window
+#   butterworth     cutoff (Hz), order  zero-phase low-pass
+FILTER_DEFAULTS = {
+    "moving_average": {"window": 51},
+    "savgol": {"window": 51, "order": 2},
+    "regression": {"window": 51},
+    "butterworth": {"cutoff": 50.0, "order": 4},
+}
+
+FILTERS = ("none", *FILTER_DEFAULTS)
+
+
+def parse_filter(args):
+    # Validated filter settings from the query, or None for raw data (filter=none)
+    name = args.get("filter", "none")
+    if name == "none":
+        return None
+    if name not in FILTER_DEFAULTS:
+        raise ValueError(f"Unknown filter: {name}")
+    if name == "butterworth" and signal is None:
+        raise ValueError("The butterworth filter is not available on this server")
+
+    spec = {"filter": name}
+    for key, default in FILTER_DEFAULTS[name].items():
+        try:
+            spec[key] = type(default)(args.get(key, default))
+        except (TypeError, ValueError):
+            raise ValueError(f"Filter {key} must be a number")
+
+    if "window" in spec and (spec["window"] < 3 or spec["window"] % 2 == 0):
+        raise ValueError("Filter window must be an odd number of samples, at least 3")
+    if name == "savgol" and not 0 < spec["order"] < spec["window"]:
+        raise ValueError("Savitzky-Golay order must be between 1 and window - 1")
+    if name == "butterworth" and (spec["cutoff"] <= 0 or not 1 <= spec["order"] <= 8):
+        raise ValueError("Butterworth cutoff must be positive and order between 1 and 8")
+    return spec
+
+
+def filter_key(spec):
+    # Hashable form of the settings, for cache keys
+    return tuple(sorted(spec.items())) if spec else None
+
+
+def sample_interval(time):
+    # Median step (s) between increasing timestamps; window filters assume this spacing
+    steps = np.diff(time)
+    steps = steps[np.isfinite(steps) & (steps > 0)]
+    if not steps.size:
+        raise ValueError("Filtering needs at least two increasing timestamps")
+    return float(np.median(steps))
+
+
+def _fill_gaps(values):
+    # Missing samples are interpolated for filtering and reported missing again after
+    gaps = np.isnan(values)
+    if gaps.any() and not gaps.all():
+        index = np.arange(len(values))
+        values = values.copy()
+        values[gaps] = np.interp(index[gaps], index[~gaps], values[~gaps])
+    return values, gaps
+
+
+def _savgol_coefficients(window, order, deriv=0):
+    # Weights whose dot product with a window of samples gives the fitted polynomial's
+    # deriv-th derivative at the centre sample (per sample step)
+    half = window // 2
+    design = np.vander(np.arange(-half, half + 1), order + 1, increasing=True)
+    return np.linalg.pinv(design)[deriv] * math.factorial(deriv)
+
+
+def _correlate(values, weights, edges="nearest"):
+    # sum(weights[k] * values[i + k - half]) for every i. With edges="nearest" the
+    # ends are padded with the first/last value; with edges="nan" the half windows
+    # at the ends have no result.
+    half = len(weights) // 2
+    if edges == "nearest":
+        return np.convolve(np.pad(values, half, mode="edge"), weights[::-1], mode="valid")
+    result = np.full(len(values), np.nan)
+    if len(values) >= len(weights):
+        result[half:len(values) - half] = np.convolve(values, weights[::-1], mode="valid")
+    return result
+
+
+def _moving_average(values, window):
+    # Running sums, so the cost does not grow with the window
+    half = window // 2
+    sums = np.concatenate([[0.0], np.cumsum(np.pad(values, half, mode="edge"))])
+    return (sums[window:] - sums[:-window]) / window
+
+
+def _butterworth(values, time, spec):
+    rate = 1.0 / sample_interval(time)
+    if spec["cutoff"] >= rate / 2:
+        raise ValueError(f"Butterworth cutoff must be below half the sample rate ({rate / 2:.0f} Hz)")
+    sections = signal.butter(spec["order"], spec["cutoff"], fs=rate, output="sos")
+    if len(values) <= 3 * (2 * len(sections) + 1):
+        raise ValueError("Too few samples for the butterworth filter")
+    return signal.sosfiltfilt(sections, values)
+
+
+def smooth(values, time, spec):
+    # Filtered copy of one channel over the whole event; time is seconds
+    filled, gaps = _fill_gaps(values)
+    name = spec["filter"]
+    if name in ("moving_average", "regression"):
+        result = _moving_average(filled, spec["window"])
+    elif name == "savgol":
+        result = _correlate(filled, _savgol_coefficients(spec["window"], spec["order"]))
+    else:
+        result = _butterworth(filled, time, spec)
+    result[gaps] = np.nan
+    return result
+
+
+def rate(values, time, spec):
+    # d(values)/d(time) per sample. Savitzky-Golay and regression differentiate the
+    # fitted polynomial over the window (no result for the half windows at the ends);
+    # the others take the central difference of the smoothed channel.
+    filled, gaps = _fill_gaps(values)
+    name = spec["filter"]
+    if name in ("savgol", "regression"):
+        order = spec.get("order", 1)
+        weights = _savgol_coefficients(spec["window"], order, deriv=1) / sample_interval(time)
+        result = _correlate(filled, weights, edges="nan")
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = np.gradient(smooth(filled, time, spec), time)
+    result[gaps] = np.nan
+    return result
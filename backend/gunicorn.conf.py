@@ -0,0 +1,17 @@
+import os
+
+# Workers share nothing but Mongo (live sessions included, see live.py), so any
+# number of them may serve the app
+workers = int(os.getenv("WEB_CONCURRENCY", str(2 * (os.cpu_count() or 1) + 1)))
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+
+
+def post_worker_init(worker):
+    # Each worker opens its own Mongo connections (a client must not cross fork)
+    # before it takes requests, so the first request doesn't pay for the handshake
+    from database import warm_up
+
+    try:
+        worker.log.info("Mongo pool warmed up in %.0f ms", warm_up())
+    except Exception as e:
+        worker.log.warning("Error warming up Mongo connections: %s", e)
@@ -0,0 +1,223 @@
+import os
+import csv
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from analysis import METRICS, event_fields
+from detection import DETECTION_DEFAULTS, BurnDetector
+from storage import BUCKET_ROWS, pack_bucket, typed_row, create_event_indexes, document_columns
+
+NS_PER_SECOND = 1_000_000_000
+
+# Documents per insert_many call; bounds the memory held by the ingest pipeline
+INSERT_BATCH_SIZE = 5_000
+
+# Attempts per batch when the connection drops mid-insert
+INSERT_ATTEMPTS = 3
+
+# Batches in flight at once for bulk ingest (see insert_batches)
+INSERT_CONCURRENCY = int(os.getenv("INSERT_CONCURRENCY", "4"))
+
+# Events are written here first and renamed into place once the whole file is in
+STAGING_PREFIX = "ingest."
+
+
+def read_renamed_rows(lines, tags):
+    # Stream the CSV rows with the headers remapped through the tags on the fly
+    reader = csv.reader(lines)
+    original_headers = next(reader, None)
+    if not original_headers:
+        raise ValueError("CSV file has no headers.")
+
+    headers = [tags.get(header, header) for header in original_headers]
+
+    def rows():
+        for values in reader:
+            yield dict(zip(headers, values))
+
+    return headers, rows()
+
+
+def trim_to_burn_window(rows, progress=None, **detection):
+    # Yield only the rows inside the detected burn windows (each burn plus
+    # buffer_seconds on either side) in a single pass. Rows are held back only while
+    # waiting for a burn to start, and then only the last buffer_seconds of them.
+    # Reading stops after the last window once max_burns burns have been found. The
+    # optional progress dict is updated with rows_parsed and the start_time/end_time
+    # spanning every window.
+    if progress is None:
+        progress = {}
+    progress.setdefault("rows_parsed", 0)
+    detector = BurnDetector(**{**DETECTION_DEFAULTS, **detection})
+    lookback = deque()
+    window_end = None
+
+    for row in rows:
+        try:
+            timestamp = int(row["Time"]) / NS_PER_SECOND
+            manifold = float(row["Manifold"])
+        except Exception as e:
+            raise ValueError(f"Error reading file: {str(e)}")
+        progress["rows_parsed"] += 1
+
+        change = detector.push(timestamp, manifold)
+        if change == "start":
+            window_start = max(0, timestamp - detector.buffer_seconds)
+            progress.setdefault("start_time", window_start)
+            for buffered_timestamp, buffered_row in lookback:
+                if buffered_timestamp >= window_start:
+                    yield buffered_row
+            lookback.clear()
+        elif change == "end":
+            window_end = timestamp + detector.buffer_seconds
+            progress["end_time"] = window_end
+
+        if detector.flow_start is not None or change == "end" or (window_end is not None and timestamp <= window_end):
+            yield row
+            continue
+
+        # Logs are time-ordered, so once every burn is found nothing later can fall inside a window
+        if detector.done:
+            return
+
+        lookback.append((timestamp, row))
+        while lookback and lookback[0][0] < timestamp - detector.buffer_seconds:
+            lookback.popleft()
+
+    # The burn result raises if no burn was completed
+    detector.result()
+
+
+def insert_documents(collection, documents, ordered=True):
+    # insert_many that survives a dropped connection. A retry resends the same
+    # documents, which pymongo gave their _id on the first attempt, so any that
+    # already made it in are rejected as duplicates instead of stored twice.
+    for attempt in range(INSERT_ATTEMPTS):
+        try:
+            collection.insert_many(documents, ordered=ordered)
+            return
+        except BulkWriteError as e:
+            duplicates = all(error["code"] == 11000 for error in e.details.get("writeErrors", []))
+            if attempt and duplicates and not e.details.get("writeConcernErrors"):
+                return
+            raise
+        except AutoReconnect:
+            if attempt == INSERT_ATTEMPTS - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+        # Unordered, so one duplicate doesn't stop the rest of the batch going in
+        ordered = False
+
+
+def _batches(rows, batch_size):
+    batch = []
+    index = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch, index
+            batch = []
+            index += 1
+    if batch:
+        yield batch, index
+
+
+def insert_batches(collection, rows, batch_size=INSERT_BATCH_SIZE, progress=None, on_batch=None, pack=None, concurrency=1, on_read=None):
+    # Ordered inserts of fixed-size batches so only one batch is ever in memory.
+    # pack(batch, index) turns a batch of rows into the documents to insert (one
+    # per row by default). on_read(documents) sees every batch's documents in order
+    # before they are inserted, e.g. to summarize the event in the same pass.
+    # on_batch is called after every insert, e.g. to publish progress.
+    # With concurrency > 1 that many unordered inserts run at once and reading waits
+    # while they are all busy, so at most concurrency + 1 batches are held. Reads
+    # sort on Time (or _bucket), so the order batches land in doesn't matter.
+    if progress is None:
+        progress = {}
+    progress["rows_inserted"] = 0
+    lock = threading.Lock()
+
+    def read(batches):
+        for batch, index in batches:
+            documents = [pack(batch, index)] if pack else batch
+            if on_read:
+                on_read(documents)
+            yield documents, len(batch)
+
+    def flush(documents, count):
+        insert_documents(collection, documents, ordered=concurrency == 1)
+        with lock:
+            progress["rows_inserted"] += count
+        if on_batch:
+            on_batch()
+
+    if concurrency == 1:
+        for documents, count in read(_batches(rows, batch_size)):
+            flush(documents, count)
+        return progress["rows_inserted"]
+
+    slots = threading.BoundedSemaphore(concurrency)
+    pending = []
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="insert") as pool:
+        for documents, count in read(_batches(rows, batch_size)):
+            slots.acquire()
+            future = pool.submit(flush, documents, count)
+            future.add_done_callback(lambda future: slots.release())
+            pending.append(future)
+
+            # Stop reading at the first failed batch
+            for future in [future for future in pending if future.done()]:
+                pending.remove(future)
+                future.result()
+
+        for future in pending:
+            future.result()
+
+    return progress["rows_inserted"]
+
+
+def ingest_csv(lines, tags, db, collection_name, progress=None, on_batch=None, bucketed=False, detection=None, concurrency=1, summary=None):
+    # Read, remap, trim and insert the CSV in one streaming pass. The event is
+    # staged under a temporary name so a failed ingest never leaves partial data,
+    # and re-uploading an event replaces it. Rows are stored typed (see typed_row)
+    # and indexed once they are all in; bucketed=True writes packed BUCKET_ROWS-sample
+    # documents instead of one document per row. detection overrides the
+    # DETECTION_DEFAULTS used to find the burn windows; concurrency is passed on to
+    # insert_batches. A SummaryBuilder passed as summary is fed the stored rows as
+    # they are written.
+    if progress is None:
+        progress = {}
+    headers, rows = read_renamed_rows(lines, tags)
+
+    # Ensure the required columns exist
+    if 'Time' not in headers or 'Manifold' not in headers:
+        raise ValueError("CSV must contain 'Time' and 'Manifold' columns.")
+    progress["channels"] = [header for header in dict.fromkeys(headers) if header != "Time"]
+
+    on_read = None
+    if summary is not None:
+        fields = event_fields(metrics=METRICS)
+        on_read = lambda documents: summary.add(*document_columns(documents, fields))
+
+    staging = db[STAGING_PREFIX + collection_name]
+    staging.drop()
+    try:
+        trimmed = trim_to_burn_window(rows, progress=progress, **(detection or {}))
+        if bucketed:
+            staging.create_index("_bucket")
+            count = insert_batches(staging, trimmed, BUCKET_ROWS, progress, on_batch, pack=pack_bucket, concurrency=concurrency, on_read=on_read)
+        else:
+            count = insert_batches(staging, map(typed_row, trimmed), progress=progress, on_batch=on_batch, concurrency=concurrency, on_read=on_read)
+        if count == 0:
+            raise ValueError("No rows found inside the burn window.")
+        if not bucketed:
+            create_event_indexes(staging, progress["channels"])
+        staging.rename(collection_name, dropTarget=True)
+    except Exception:
+        staging.drop()
+        raise
+
+    return count
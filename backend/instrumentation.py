@@ -0,0 +1,209 @@
+import io
+import os
+import time
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+from pymongo import monitoring
+
+# Request latency histogram buckets (seconds) reported by /metrics
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ?profile=1 returns a cProfile summary instead of the response. It bypasses the cache
+# and exposes source paths, so it is refused unless PROFILING=1 (e.g. in development).
+PROFILING = os.getenv("PROFILING", "0").lower() in ("1", "true", "yes")
+
+# Functions listed in a ?profile=1 summary
+PROFILE_LINES = 40
+
+# Each request's time is split into these phases. db and serialize are measured where
+# they happen; compute is whatever is left of the request's own time.
+PHASES = ("db", "compute", "serialize")
+
+
+def start_request(profile=False):
+    g.timing = {"started": time.perf_counter(), "db": 0.0, "serialize": 0.0, "queries": 0, "rows": 0, "cache": None, "stack": []}
+    if profile and PROFILING:
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _timing():
+    return g.timing if has_request_context() and "timing" in g else None
+
+
+@contextmanager
+def phase(name):
+    # Charge the block's time to a phase of the current request (a no-op outside one,
+    # e.g. in ingest jobs). Nested phases pause the outer one, so nothing counts twice.
+    timing = _timing()
+    if timing is None:
+        yield
+        return
+
+    stack = timing["stack"]
+    now = time.perf_counter()
+    if stack:
+        timing[stack[-1][0]] += now - stack[-1][1]
+    stack.append([name, now])
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        name, started = stack.pop()
+        timing[name] += now - started
+        if stack:
+            stack[-1][1] = now
+
+
+def count_rows(count):
+    # Event rows read from Mongo for the current request
+    timing = _timing()
+    if timing is not None:
+        timing["rows"] += count
+
+
+def mark_cache(result):
+    # How the response cache answered: "hit", "miss" or "not_modified"
+    timing = _timing()
+    if timing is not None:
+        timing["cache"] = result
+
+
+def profiling():
+    return has_request_context() and "profiler" in g
+
+
+class CommandTimer(monitoring.CommandListener):
+    # Every Mongo command's round trip counts as db time unless it already ran inside
+    # a phase("db") block, so small lookups (summaries, event_start) are not missed
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event.duration_micros)
+
+    def failed(self, event):
+        self._record(event.duration_micros)
+
+    def _record(self, micros):
+        timing = _timing()
+        if timing is None:
+            return
+        timing["queries"] += 1
+        if not timing["stack"]:
+            timing["db"] += micros / 1_000_000
+
+
+def request_phases(timing, total):
+    # {"db", "compute", "serialize"} seconds for a finished request
+    phases = {"db": timing["db"], "serialize": timing["serialize"]}
+    phases["compute"] = max(total - phases["db"] - phases["serialize"], 0.0)
+    return phases
+
+
+def server_timing(timing, total):
+    # Server-Timing header value, shown per request in the browser's network panel
+    phases = request_phases(timing, total)
+    entries = [f'db;dur={phases["db"] * 1000:.2f};desc="{timing["queries"]} queries"']
+    entries += [f"{name};dur={phases[name] * 1000:.2f}" for name in ("compute", "serialize")]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    entries.append(f'rows;desc="{timing["rows"]}"')
+    if timing["cache"]:
+        entries.append(f'cache;desc="{timing["cache"]}"')
+    return ", ".join(entries)
+
+
+def profile_summary():
+    # Stop the request's profiler and render its busiest functions
+    profiler = g.pop("profiler")
+    profiler.disable()
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return output.getvalue()
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class RequestMetrics:
+    # Counters and histograms for /metrics (Prometheus text format), per process
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.durations = {}
+        self.phase_seconds = {}
+        self.rows = {}
+        self.bytes = {}
+        self.queries = {}
+        self.cache = {}
+
+    def observe(self, route, method, status, timing, total, size):
+        phases = request_phases(timing, total)
+        with self.lock:
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            buckets = self.durations.setdefault(route, [0] * len(DURATION_BUCKETS) + [0, 0.0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+            buckets[-2] += 1
+            buckets[-1] += total
+
+            for name in PHASES:
+                self.phase_seconds[route, name] = self.phase_seconds.get((route, name), 0.0) + phases[name]
+            self.rows[route] = self.rows.get(route, 0) + timing["rows"]
+            self.bytes[route] = self.bytes.get(route, 0) + size
+            self.queries[route] = self.queries.get(route, 0) + timing["queries"]
+            if timing["cache"]:
+                self.cache[timing["cache"]] = self.cache.get(timing["cache"], 0) + 1
+
+    def render(self, gauges=None):
+        # gauges: {name: (help, value)} for point-in-time values owned by the app
+        lines = []
+
+        def family(name, kind, help):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            family("rp_requests_total", "counter", "Requests handled, by route, method and status.")
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f"rp_requests_total{_labels(route=route, method=method, status=status)} {count}")
+
+            family("rp_request_duration_seconds", "histogram", "Request latency, by route.")
+            for route, buckets in sorted(self.durations.items()):
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f"rp_request_duration_seconds_bucket{_labels(route=route, le=bound)} {count}")
+                lines.append(f"rp_request_duration_seconds_bucket{_labels(route=route, le='+Inf')} {buckets[-2]}")
+                lines.append(f"rp_request_duration_seconds_count{_labels(route=route)} {buckets[-2]}")
+                lines.append(f"rp_request_duration_seconds_sum{_labels(route=route)} {buckets[-1]:.6f}")
+
+            family("rp_request_phase_seconds_total", "counter", "Request time spent in the db, compute and serialize phases.")
+            for (route, name), seconds in sorted(self.phase_seconds.items()):
+                lines.append(f"rp_request_phase_seconds_total{_labels(route=route, phase=name)} {seconds:.6f}")
+
+            for name, help, values in (
+                ("rp_rows_scanned_total", "Event rows read from Mongo.", self.rows),
+                ("rp_response_bytes_total", "Response body bytes sent.", self.bytes),
+                ("rp_db_queries_total", "Mongo commands issued.", self.queries),
+            ):
+                family(name, "counter", help + " By route.")
+                for route, value in sorted(values.items()):
+                    lines.append(f"{name}{_labels(route=route)} {value}")
+
+            family("rp_response_cache_total", "counter", "Cached event route lookups, by result.")
+            for result, count in sorted(self.cache.items()):
+                lines.append(f"rp_response_cache_total{_labels(result=result)} {count}")
+
+        for name, (help, value) in (gauges or {}).items():
+            family(name, "gauge", help)
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
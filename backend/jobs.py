@@ -0,0 +1,58 @@
+import os
+import uuid
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+# Job state lives in Mongo so any worker process can answer /jobs/<id>
+JOBS_COLLECTION = "ingest_jobs"
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def submit_job(db, event, target, *args):
+    # Record a queued job and run target(progress, on_batch, *args) on the worker pool.
+    # target updates the progress dict in place and calls on_batch to publish it.
+    jobs = db[JOBS_COLLECTION]
+    job_id = uuid.uuid4().hex
+    jobs.insert_one({
+        "_id": job_id,
+        "event": event,
+        "status": "queued",
+        "rows_parsed": 0,
+        "rows_inserted": 0,
+        "start_time": None,
+        "end_time": None,
+        "error": None,
+        "created": _now(),
+        "finished": None,
+    })
+    executor.submit(run_job, jobs, job_id, target, args)
+    return job_id
+
+
+def run_job(jobs, job_id, target, args):
+    progress = {}
+
+    def publish(**fields):
+        jobs.update_one({"_id": job_id}, {"$set": {**progress, **fields}})
+
+    publish(status="running")
+    try:
+        target(progress, publish, *args)
+    except Exception as e:
+        publish(status="failed", error=str(e), finished=_now())
+    else:
+        publish(status="succeeded", finished=_now())
+
+
+def get_job(db, job_id):
+    job = db[JOBS_COLLECTION].find_one({"_id": job_id})
+    if job is not None:
+        job["id"] = job.pop("_id")
+    return job
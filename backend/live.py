@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import threading
+
+import numpy as np
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from analysis import NS_PER_SECOND, IncrementalSeries, extract_columns
+from detection import DETECTION_DEFAULTS, BurnDetector
+from downsample import shape_series
+from ingest import insert_documents
+from simulate import DAQ_CHANNELS
+from storage import typed_row, create_event_indexes
+
+# Series pushed to viewers with every batch, and the points each may use per update
+LIVE_SERIES = ("pressures", "dp", "mdot", "stiff", "thrustlc", "tanklc")
+LIVE_MAX_POINTS = 200
+
+# Longest a viewer waits before checking Mongo for new samples itself. Commits wake
+# viewers at once through a change stream (replica sets) or, for commits made by the
+# viewer's own worker, in process; this bounds the delay for the rest.
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "0.02"))
+
+# Longest a change stream read waits for a commit before returning empty
+LIVE_STREAM_WAIT_MS = 1000
+
+# Rows a viewer reads per query while catching up
+LIVE_READ_ROWS = 10_000
+
+# Seconds between SSE keep-alive comments when no samples arrive
+HEARTBEAT_SECONDS = 15
+
+# Running peaks kept per session and the series/channel each one tracks
+LIVE_PEAKS = {"peakThrust": ("thrustlc", "ThrustLC"), "peakChamber": ("pressures", "Chamber"), "peakMdot": ("mdot", "Mdot")}
+
+# One document per recording in progress: {_id: event, author, detection, start_time,
+# last_time, rows, channels, finished}. Sessions live in Mongo rather than in a
+# process, so the DAQ and its viewers may reach any worker.
+LIVE_COLLECTION = "live_sessions"
+
+
+def sample_documents(body):
+    # Row documents from a samples request: either {"Time": [...], "Manifold": [...], ...}
+    # columns or a list of {"Time": ..., "Manifold": ..., ...} rows
+    if isinstance(body, dict):
+        names = list(body)
+        if "Time" not in names:
+            raise ValueError("Samples must include Time")
+        lengths = {len(values) for values in body.values() if isinstance(values, list)}
+        if len(lengths) != 1 or len(names) != sum(isinstance(values, list) for values in body.values()):
+            raise ValueError("Sample columns must be lists of equal length")
+        return [dict(zip(names, values)) for values in zip(*body.values())]
+
+    if isinstance(body, list) and all(isinstance(row, dict) and "Time" in row for row in body):
+        return body
+
+    raise ValueError("Samples must be a list of rows or an object of columns, each with Time")
+
+
+class LiveView:
+    # One viewer's running state: the incremental series, running peaks and burn
+    # detector over the session's rows so far, fed in time order a batch at a time
+    def __init__(self, event, detection=None):
+        self.event = event
+        self.series = None
+        self.start_time = None
+        self.last_time = None
+        self.rows = 0
+        self.peaks = {name: None for name in LIVE_PEAKS}
+        self.detector = BurnDetector(**{**DETECTION_DEFAULTS, **(detection or {}), "buffer_seconds": 0, "max_burns": 0})
+
+    def burns(self):
+        burns = [{"start_time": start, "end_time": end} for start, end in self.detector.burns]
+        if self.detector.flow_start is not None:
+            burns.append({"start_time": self.detector.flow_start, "end_time": None})
+        return burns
+
+    def snapshot(self):
+        return {"event": self.event, "rows": self.rows, "startTime": self.start_time, "metrics": dict(self.peaks), "burns": self.burns()}
+
+    def apply(self, documents):
+        # The "update" message for the next batch of stored rows
+        columns, column_errors = extract_columns(documents, ["Time", *DAQ_CHANNELS])
+        times = columns["Time"]
+        if self.series is None:
+            self.start_time = int(times[0])
+            self.series = {name: IncrementalSeries(name, self.start_time) for name in LIVE_SERIES}
+
+        update = {"series": {}, "errors": {}}
+        for name, series in self.series.items():
+            try:
+                time, channels = series.update(columns, column_errors)
+            except Exception as e:
+                update["errors"][name] = str(e)
+                continue
+            self._update_peaks(name, channels)
+            time, channels = shape_series(time, channels, LIVE_MAX_POINTS, method="minmax")
+            update["series"][name] = {"Time": time.tolist(), **{channel: values.tolist() for channel, values in channels.items()}}
+
+        manifold = columns["Manifold"]
+        valid = ~np.isnan(manifold)
+        self.detector.push_many(times[valid] / NS_PER_SECOND, manifold[valid])
+
+        self.rows += len(documents)
+        self.last_time = int(times[-1])
+        update.update(rows=self.rows, lastTime=self.last_time, metrics=dict(self.peaks), burns=self.burns())
+        return update
+
+    def _update_peaks(self, series_name, channels):
+        for peak, (name, channel) in LIVE_PEAKS.items():
+            if name != series_name or channel not in channels:
+                continue
+            values = channels[channel][~np.isnan(channels[channel])]
+            if values.size and (self.peaks[peak] is None or values.max() > self.peaks[peak]):
+                self.peaks[peak] = float(values.max())
+
+
+# Bumped and announced whenever this process commits a batch or finishes a session
+_commits = threading.Condition()
+_commit_count = 0
+
+
+def _notify_commit():
+    global _commit_count
+    with _commits:
+        _commit_count += 1
+        _commits.notify_all()
+
+
+def _watch_session(db, event):
+    # Change stream of the session document, or None where Mongo has none
+    # (standalone servers); viewers then fall back to waiting on this process
+    try:
+        return db[LIVE_COLLECTION].watch([{"$match": {"documentKey._id": event}}], max_await_time_ms=LIVE_STREAM_WAIT_MS)
+    except Exception:
+        return None
+
+
+def _wait_for_commit(stream, count, timeout):
+    # Returns when a commit may have happened since _commit_count was count
+    if stream is not None:
+        stream.try_next()
+        return
+    with _commits:
+        _commits.wait_for(lambda: _commit_count != count, timeout)
+
+
+def _message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+def start_session(db, event, detection=None, author="admin"):
+    # False when the event already exists or is being recorded
+    if db[event].find_one({}, {"_id": 1}) is not None:
+        return False
+    try:
+        db[LIVE_COLLECTION].insert_one({
+            "_id": event,
+            "author": author,
+            "detection": detection or {},
+            "start_time": None,
+            "last_time": None,
+            "rows": 0,
+            "channels": [],
+            "finished": False,
+        })
+    except DuplicateKeyError:
+        return False
+    # Indexed up front so reads while recording are sorted by the index too
+    create_event_indexes(db[event], DAQ_CHANNELS)
+    return True
+
+
+def get_session(db, event):
+    return db[LIVE_COLLECTION].find_one({"_id": event})
+
+
+def append_samples(db, session, documents):
+    # Store one batch of row documents and commit it to the session; returns the
+    # session row count. Viewers only read up to the committed last_time.
+    if not documents:
+        return session["rows"]
+    columns, column_errors = extract_columns(documents, ["Time", *DAQ_CHANNELS])
+    if "Time" in column_errors or not columns["_time_valid"].all():
+        raise ValueError("Every sample needs an integer nanosecond Time")
+    if session["finished"]:
+        raise ValueError("Live session has already finished")
+    times = columns["Time"]
+    last_time = session["last_time"]
+    # Strictly increasing, as viewers resume reading after the last Time they saw
+    if (last_time is not None and times[0] <= last_time) or (np.diff(times) <= 0).any():
+        raise ValueError("Samples must arrive in time order, one per timestamp")
+
+    # Stored before the session moves on, so a batch that fails to write leaves
+    # nothing behind and the DAQ can send it again. Only this batch's own rows are
+    # removed, never rows another request committed over the same times.
+    collection = db[session["_id"]]
+    stored = [{"_id": ObjectId(), **typed_row(document)} for document in documents]
+    batch = {"_id": {"$in": [document["_id"] for document in stored]}}
+    try:
+        insert_documents(collection, stored)
+    except Exception:
+        collection.delete_many(batch)
+        raise
+
+    channels = []
+    for document in documents:
+        channels += [name for name in document if name != "Time" and name not in channels]
+    # Only commits on top of the state this batch was checked against
+    committed = db[LIVE_COLLECTION].find_one_and_update(
+        {"_id": session["_id"], "last_time": last_time, "finished": False},
+        {
+            "$set": {"last_time": int(times[-1]), "start_time": session["start_time"] if session["start_time"] is not None else int(times[0])},
+            "$inc": {"rows": len(documents)},
+            "$addToSet": {"channels": {"$each": channels}},
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    if committed is None:
+        collection.delete_many(batch)
+        raise ValueError("Live session changed while storing samples; send them again")
+    _notify_commit()
+    return committed["rows"]
+
+
+def finish_session(db, event):
+    # Stop accepting samples; returns the session, or None if none is recording
+    session = db[LIVE_COLLECTION].find_one_and_update(
+        {"_id": event, "finished": False}, {"$set": {"finished": True}}, return_document=ReturnDocument.AFTER,
+    )
+    _notify_commit()
+    return session
+
+
+def end_session(db, event):
+    # Forget a finished session once its event is stored
+    db[LIVE_COLLECTION].delete_one({"_id": event})
+
+
+def viewer_events(db, session, poll_seconds=LIVE_POLL_SECONDS):
+    # SSE body for one viewer: a "snapshot" of the recording so far, an "update" for
+    # each batch of newly committed rows and a final "end". Each viewer tails the
+    # event collection itself, so it may be served by any worker.
+    event = session["_id"]
+    view = LiveView(event, session["detection"])
+    seen = None
+
+    def committed_rows(session):
+        nonlocal seen
+        last_time = session["last_time"]
+        while last_time is not None and (seen is None or seen < last_time):
+            query = {"Time": {"$lte": last_time, **({"$gt": seen} if seen is not None else {})}}
+            documents = list(db[event].find(query, {"_id": 0}).sort("Time", 1).limit(LIVE_READ_ROWS))
+            if not documents:
+                return
+            seen = documents[-1]["Time"]
+            yield view.apply(documents)
+
+    # Opened before the first read, so no commit falls between the two
+    stream = _watch_session(db, event)
+    try:
+        for _ in committed_rows(session):
+            pass
+        yield _message("snapshot", view.snapshot())
+
+        last_message = time.monotonic()
+        while True:
+            count = _commit_count
+            current = get_session(db, event)
+            if current is None or current["finished"]:
+                # Rows committed before the session finished are still sent
+                for update in committed_rows(current or session):
+                    yield _message("update", update)
+                yield _message("end", view.snapshot())
+                return
+
+            sent = False
+            for update in committed_rows(current):
+                sent = True
+                yield _message("update", update)
+            if sent:
+                last_message = time.monotonic()
+                continue
+
+            if time.monotonic() - last_message >= HEARTBEAT_SECONDS:
+                last_message = time.monotonic()
+                yield b": keep-alive\n\n"
+            _wait_for_commit(stream, count, poll_seconds)
+    finally:
+        if stream is not None:
+            stream.close()
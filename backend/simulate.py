@@ -0,0 +1,47 @@
+import numpy as np
+
+from analysis import NS_PER_SECOND
+
+# Channels a test stand DAQ reports, in CSV column order
+DAQ_CHANNELS = ("Manifold", "Tank", "Chamber", "TankLC", "ThrustLC")
+
+
+def synthetic_burn(rate=1000, duration=12.0, start_ns=0, burn_start=3.0, burn_seconds=4.0, seed=None):
+    # Columns for a simulated hot fire sampled at rate Hz: quiet pre-flow, a sharp
+    # valve opening, a steady burn with tank blowdown, shutdown and a quiet tail.
+    # Time is int64 ns from start_ns; channels are float64 with sensor noise.
+    rng = np.random.default_rng(seed)
+    count = int(duration * rate)
+    seconds = np.arange(count) / rate
+
+    # Flow fraction: 50 ms opening ramp (fast enough to trip the slope detector), 200 ms close
+    opening = np.clip((seconds - burn_start) / 0.05, 0, 1)
+    closing = np.clip((burn_start + burn_seconds - seconds) / 0.2, 0, 1)
+    flow = np.minimum(opening, closing)
+    burned = np.clip((seconds - burn_start) / burn_seconds, 0, 1)
+
+    return {
+        "Time": start_ns + (seconds * NS_PER_SECOND).astype(np.int64),
+        "Manifold": 14.7 + 400 * flow + rng.normal(0, 0.5, count),
+        "Tank": 750 - 150 * burned + rng.normal(0, 1.0, count),
+        "Chamber": 300 * flow + rng.normal(0, 1.0, count),
+        "TankLC": 60 - 25 * burned + rng.normal(0, 0.01, count),
+        "ThrustLC": 550 * flow + rng.normal(0, 3.0, count),
+    }
+
+
+def column_batches(columns, batch_size):
+    # Consecutive slices of every column, e.g. the sample batches a DAQ would send
+    count = len(columns["Time"])
+    for start in range(0, count, batch_size):
+        yield {name: values[start:start + batch_size] for name, values in columns.items()}
+
+
+def write_csv(columns, file, batch_size=100_000):
+    # A synthetic event as the DAQ CSV the upload route accepts (Time in int ns),
+    # written in batches so million-row files never build one big string
+    names = ["Time", *DAQ_CHANNELS]
+    file.write(",".join(names) + "\n")
+    for batch in column_batches({name: columns[name] for name in names}, batch_size):
+        rows = zip(batch["Time"].tolist(), *(np.round(batch[name], 4).tolist() for name in DAQ_CHANNELS))
+        file.write("".join(",".join(map(str, row)) + "\n" for row in rows))
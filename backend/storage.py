@@ -0,0 +1,325 @@
+import os
+from itertools import islice
+
+import numpy as np
+from bson.binary import Binary
+
+from analysis import extract_columns
+from database import MONGO_BATCH_SIZE
+from simulate import DAQ_CHANNELS
+from instrumentation import phase, count_rows
+
+# "rows" stores one document per CSV sample; "buckets" packs BUCKET_ROWS samples per
+# document as little-endian binary columns (int64 ns Time, float64 channels)
+STORAGE_MODE = os.getenv("STORAGE_MODE", "rows")
+
+BUCKET_ROWS = 10_000
+
+# Row events are indexed on Time plus the DAQ channels, so reads of those channels
+# are sorted and answered from the index alone (covered). COVERING_INDEX=0 indexes
+# Time only, trading slower channel reads for less index storage.
+COVERING_INDEX = os.getenv("COVERING_INDEX", "1").lower() in ("1", "true", "yes")
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def pack_bucket(rows, index):
+    # One bucket document from a batch of CSV row dicts. Values that are missing or
+    # not numeric are stored as NaN.
+    names = []
+    for row in rows:
+        for name in row:
+            if name != "Time" and name not in names:
+                names.append(name)
+
+    times = np.array([int(row["Time"]) for row in rows], dtype="<i8")
+    channels = {
+        name: Binary(np.array([_to_float(row.get(name)) for row in rows], dtype="<f8").tobytes())
+        for name in names
+    }
+    return {
+        "_bucket": index,
+        "count": len(rows),
+        "t_first": int(times[0]),
+        "t_last": int(times[-1]),
+        "Time": Binary(times.tobytes()),
+        "channels": channels,
+    }
+
+
+def typed_row(row):
+    # A CSV row as stored: Time as int64 nanoseconds and numeric channels as doubles.
+    # Values that are not numbers are kept as given, so only the series using that
+    # channel fail when it is read.
+    document = {}
+    for name, value in row.items():
+        if name == "Time":
+            document[name] = int(value)
+            continue
+        try:
+            document[name] = float(value)
+        except (TypeError, ValueError):
+            document[name] = value
+    return document
+
+
+def create_event_indexes(collection, channels):
+    # Time first, so every index also serves sorted and t0/t1 range reads
+    keys = [("Time", 1)]
+    if COVERING_INDEX:
+        keys += [(name, 1) for name in DAQ_CHANNELS if name in channels]
+    collection.create_index(keys)
+
+
+def event_layout(collection):
+    # "buckets", "rows" (typed, indexed rows read in Time order) or "legacy" (rows
+    # stored before Time was typed, read in insertion order until reindex_collection
+    # converts them); None for an empty event
+    document = collection.find_one({}, {"_bucket": 1, "Time": 1})
+    if document is None:
+        return None
+    if "_bucket" in document:
+        return "buckets"
+    return "legacy" if isinstance(document.get("Time"), str) else "rows"
+
+
+def is_bucketed(collection):
+    # Bucketed events hold nothing but bucket documents
+    return event_layout(collection) == "buckets"
+
+
+def event_start(collection):
+    # Absolute first timestamp (ns) of an event, without reading the rest of it
+    layout = event_layout(collection)
+    if layout == "buckets":
+        bucket = collection.find_one({}, {"t_first": 1}, sort=[("_bucket", 1)])
+        return bucket["t_first"] if bucket else None
+
+    sort = [("Time", 1)] if layout == "rows" else None
+    document = collection.find_one({}, {"Time": 1}, sort=sort)
+    return int(document["Time"]) if document and document.get("Time") is not None else None
+
+
+def event_channels(collection):
+    # Channel names of an event in stored order, or None when the event is empty
+    if is_bucketed(collection):
+        bucket = collection.find_one({}, {"channels": 1}, sort=[("_bucket", 1)])
+        return list(bucket["channels"]) if bucket else None
+
+    document = collection.find_one({}, {"_id": 0})
+    return [name for name in document if name != "Time"] if document else None
+
+
+def _find_buckets(collection, fields, time_range=None):
+    # Buckets in time order with only the requested columns; time_range=(lo_ns, hi_ns)
+    # keeps just the buckets overlapping that window
+    query = {}
+    if time_range is not None:
+        lo, hi = time_range
+        if lo is not None:
+            query["t_last"] = {"$gte": lo}
+        if hi is not None:
+            query["t_first"] = {"$lte": hi}
+
+    projection = {"_id": 0, "count": 1}
+    for field in fields:
+        projection["Time" if field == "Time" else f"channels.{field}"] = 1
+
+    return collection.find(query, projection).sort("_bucket", 1)
+
+
+def _bucket_arrays(bucket, fields):
+    arrays = {}
+    for field in fields:
+        if field == "Time":
+            arrays[field] = np.frombuffer(bucket["Time"], dtype="<i8")
+            continue
+        packed = bucket.get("channels", {}).get(field)
+        arrays[field] = np.frombuffer(packed, dtype="<f8") if packed is not None else np.full(bucket["count"], np.nan)
+    return arrays
+
+
+def _typed_columns(parts, fields, count):
+    columns = {"_count": count}
+    for field in fields:
+        dtype = np.int64 if field == "Time" else np.float64
+        columns[field] = np.concatenate(parts[field]).astype(dtype, copy=False) if parts[field] else np.empty(0, dtype=dtype)
+    if "Time" in fields:
+        columns["_time_valid"] = np.ones(count, dtype=bool)
+    return columns
+
+
+def _find_rows(collection, fields, layout, time_range=None):
+    # Row documents in Time order through the Time index, restricted to
+    # time_range=(lo_ns, hi_ns) when given; legacy events come in insertion order
+    projection = {"_id": 0, **{field: 1 for field in fields}}
+    if layout == "legacy":
+        return collection.find({}, projection)
+
+    query = {}
+    if time_range is not None:
+        lo, hi = time_range
+        bounds = {**({"$gte": lo} if lo is not None else {}), **({"$lte": hi} if hi is not None else {})}
+        if bounds:
+            query["Time"] = bounds
+    return collection.find(query, projection).sort("Time", 1)
+
+
+def _row_batches(collection, fields, layout, batch_rows, time_range=None):
+    # Row documents batch_rows at a time. Waiting on the cursor counts as the
+    # request's db time, and the rows it returns as rows scanned.
+    cursor = _find_rows(collection, fields, layout, time_range).batch_size(batch_rows)
+    while True:
+        with phase("db"):
+            batch = list(islice(cursor, batch_rows))
+        if not batch:
+            return
+        count_rows(len(batch))
+        yield batch
+
+
+def _buckets(collection, fields, time_range):
+    # _find_buckets, timed like _row_batches
+    cursor = _find_buckets(collection, fields, time_range)
+    while True:
+        with phase("db"):
+            bucket = next(cursor, None)
+        if bucket is None:
+            return
+        count_rows(bucket["count"])
+        yield bucket
+
+
+def read_columns(collection, fields, time_range=None):
+    # Typed columns for the requested fields in either storage layout. Only the
+    # requested channels are fetched, and time_range=(lo_ns, hi_ns) restricts the
+    # read to that window (to the buckets overlapping it, for bucketed events).
+    parts = {field: [] for field in fields}
+    count = 0
+    layout = event_layout(collection)
+    if layout != "buckets":
+        # Converted a batch at a time so the documents are never all held at once;
+        # a field that fails to parse in any batch is an error for the whole event
+        valid = []
+        errors = {}
+        for batch in _row_batches(collection, fields, layout, MONGO_BATCH_SIZE, time_range):
+            columns, batch_errors = extract_columns(batch, fields)
+            count += columns["_count"]
+            for field in fields:
+                if field in batch_errors:
+                    errors.setdefault(field, batch_errors[field])
+                elif field not in errors:
+                    parts[field].append(columns[field])
+            if "_time_valid" in columns:
+                valid.append(columns["_time_valid"])
+
+        fields = [field for field in fields if field not in errors]
+        columns = _typed_columns(parts, fields, count)
+        if "Time" in fields:
+            columns["_time_valid"] = np.concatenate(valid) if valid else np.empty(0, dtype=bool)
+        return columns, errors
+
+    for bucket in _buckets(collection, fields, time_range):
+        count += bucket["count"]
+        for field, values in _bucket_arrays(bucket, fields).items():
+            parts[field].append(values)
+    return _typed_columns(parts, fields, count), {}
+
+
+def document_columns(documents, fields):
+    # read_columns for a batch of documents as they are stored (typed rows or
+    # buckets), e.g. to summarize an event while it is written
+    if documents and "_bucket" in documents[0]:
+        parts = {field: [] for field in fields}
+        for bucket in documents:
+            for field, values in _bucket_arrays(bucket, fields).items():
+                parts[field].append(values)
+        return _typed_columns(parts, fields, sum(bucket["count"] for bucket in documents)), {}
+    return extract_columns(documents, fields)
+
+
+def iter_columns(collection, fields, time_range=None, batch_rows=BUCKET_ROWS):
+    # read_columns one batch at a time, so streaming responses hold a single batch
+    # (one bucket, or batch_rows row documents) in memory whatever the event size
+    layout = event_layout(collection)
+    if layout != "buckets":
+        for batch in _row_batches(collection, fields, layout, batch_rows, time_range):
+            yield extract_columns(batch, fields)
+        return
+
+    for bucket in _buckets(collection, fields, time_range):
+        arrays = _bucket_arrays(bucket, fields)
+        yield _typed_columns({field: [values] for field, values in arrays.items()}, fields, bucket["count"]), {}
+
+
+def migrate_collection(collection, staging):
+    # Repack a row-per-sample event into buckets, in time order, then swap the
+    # bucketed copy into place. Returns the number of rows migrated.
+    layout = event_layout(collection)
+    if layout == "buckets":
+        return 0
+
+    staging.drop()
+    try:
+        staging.create_index("_bucket")
+        count = 0
+        batch = []
+        for document in _find_rows(collection, (), layout):
+            batch.append(document)
+            if len(batch) == BUCKET_ROWS:
+                staging.insert_one(pack_bucket(batch, count // BUCKET_ROWS))
+                count += len(batch)
+                batch = []
+        if batch:
+            staging.insert_one(pack_bucket(batch, count // BUCKET_ROWS))
+            count += len(batch)
+
+        if count:
+            staging.rename(collection.name, dropTarget=True)
+    except Exception:
+        staging.drop()
+        raise
+
+    return count
+
+
+def reindex_collection(collection, staging):
+    # Bring a row-per-sample event up to the typed, indexed layout. Legacy events are
+    # rewritten through staging with typed values and swapped into place; the rest
+    # just get their indexes. Returns the number of rows rewritten, or None for
+    # bucketed and empty events.
+    layout = event_layout(collection)
+    if layout not in ("rows", "legacy"):
+        return None
+
+    channels = event_channels(collection)
+    if layout == "rows":
+        create_event_indexes(collection, channels)
+        return 0
+
+    staging.drop()
+    try:
+        count = 0
+        batch = []
+        for document in collection.find({}, {"_id": 0}):
+            batch.append(typed_row(document))
+            if len(batch) == BUCKET_ROWS:
+                staging.insert_many(batch, ordered=True)
+                count += len(batch)
+                batch = []
+        if batch:
+            staging.insert_many(batch, ordered=True)
+            count += len(batch)
+
+        create_event_indexes(staging, channels)
+        staging.rename(collection.name, dropTarget=True)
+    except Exception:
+        staging.drop()
+        raise
+
+    return count
@@ -0,0 +1,264 @@
+import re
+import json
+import base64
+from datetime import datetime, timezone
+
+import numpy as np
+
+from analysis import NS_PER_SECOND, METRICS, METRIC_FIELDS, IncrementalSeries, event_fields
+from detection import DETECTION_DEFAULTS, BurnDetector
+from storage import iter_columns
+
+# One document per event with the scalars that never change after upload. It is
+# also the event catalog behind /collections.
+SUMMARIES_COLLECTION = "event_summaries"
+
+# /collections sort keys and the summary field each one reads
+CATALOG_SORTS = {"name": "_id", "uploadDate": "uploadDate", "author": "author", "rowCount": "rowCount"}
+
+CATALOG_PROJECTION = {"author": 1, "uploadDate": 1, "rowCount": 1, "size": 1, "metrics": 1}
+
+
+def upload_date():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SummaryBuilder:
+    # Every scalar metric of an event (what compute_event reports for METRICS), built
+    # from its column batches in stored order, e.g. while the event is ingested. Only
+    # running state is kept: peaks, time steps, the mdot carry, the burn detector and
+    # the running ThrustLC integral read off at each burn's start and end.
+    def __init__(self, detection=None):
+        self.detection = {**DETECTION_DEFAULTS, **(detection or {})}
+        self.count = 0
+        self.column_errors = {}
+        # First row's Time (the series origin), the earliest and latest Time, and
+        # whether every Time so far was later than the one before
+        self.start_time = None
+        self.time_range = None
+        self.increasing = True
+        self.times_valid = True
+        self.manifold_valid = True
+        self.previous_time = None
+        self.step_sum = 0.0
+        self.steps = 0
+        self.peaks = {"ThrustLC": None, "Chamber": None}
+        self.peak_mdot = None
+        self.mdot = None
+        self.detector = BurnDetector(**{**self.detection, "buffer_seconds": 0})
+        self.impulse = 0.0
+        self.previous_thrust = None
+        self.boundaries = {}
+
+    def add(self, columns, column_errors):
+        # One batch from extract_columns or iter_columns with event_fields(metrics=METRICS)
+        count = columns["_count"]
+        if not count:
+            return
+        self.count += count
+        for field, error in column_errors.items():
+            self.column_errors.setdefault(field, error)
+
+        for channel in self.peaks:
+            if channel not in self.column_errors:
+                values = columns[channel][~np.isnan(columns[channel])]
+                if values.size and (self.peaks[channel] is None or values.max() > self.peaks[channel]):
+                    self.peaks[channel] = float(values.max())
+
+        if "Time" in self.column_errors or not self.times_valid:
+            return
+        if not columns["_time_valid"].all():
+            self.times_valid = False
+            return
+
+        times = columns["Time"]
+        if self.start_time is None:
+            self.start_time = int(times[0])
+            self.time_range = (int(times.min()), int(times.max()))
+            self.mdot = IncrementalSeries("mdot", self.start_time)
+        else:
+            self.time_range = (min(self.time_range[0], int(times.min())), max(self.time_range[1], int(times.max())))
+        steps = np.diff(times, prepend=self.previous_time) if self.previous_time is not None else np.diff(times)
+        self.increasing = self.increasing and bool((steps > 0).all())
+        self.step_sum += float((steps / NS_PER_SECOND).sum())
+        self.steps += len(steps)
+        self.previous_time = int(times[-1])
+
+        if "TankLC" not in self.column_errors:
+            _, channels = self.mdot.update(columns, column_errors)
+            if channels["Mdot"].size and (self.peak_mdot is None or channels["Mdot"].max() > self.peak_mdot):
+                self.peak_mdot = float(channels["Mdot"].max())
+
+        if "Manifold" in self.column_errors or not self.manifold_valid:
+            return
+        if np.isnan(columns["Manifold"]).any():
+            self.manifold_valid = False
+            return
+        burns, flow_start = len(self.detector.burns), self.detector.flow_start
+        self.detector.push_many(times / NS_PER_SECOND, columns["Manifold"])
+        if "ThrustLC" not in self.column_errors:
+            self._integrate(columns, burns, flow_start)
+
+    def _integrate(self, columns, burns, flow_start):
+        # Continue the running trapezoidal integral of ThrustLC (as integrate() does over
+        # the whole event) and note its value at burn boundaries found in this batch
+        time = (columns["Time"] - self.start_time) / NS_PER_SECOND
+        thrust = columns["ThrustLC"]
+        if self.previous_thrust is not None:
+            time = np.concatenate([[self.previous_thrust[0]], time])
+            thrust = np.concatenate([[self.previous_thrust[1]], thrust])
+        with np.errstate(invalid="ignore"):
+            steps = (thrust[1:] + thrust[:-1]) / 2 * np.diff(time)
+        steps[~np.isfinite(steps) | ~(np.diff(time) > 0)] = 0.0
+        impulse = np.cumsum(np.concatenate([[self.impulse], steps]))
+
+        offset = self.start_time / NS_PER_SECOND
+        found = [timestamp for burn in self.detector.burns[burns:] for timestamp in burn]
+        if self.detector.flow_start is not None and self.detector.flow_start != flow_start:
+            found.append(self.detector.flow_start)
+        for timestamp in found:
+            self.boundaries.setdefault(timestamp, float(np.interp(timestamp - offset, time, impulse)))
+
+        self.impulse = float(impulse[-1])
+        self.previous_thrust = (time[-1], thrust[-1])
+
+    def _metric(self, name):
+        if name in ("peakThrust", "peakChamber"):
+            peak = self.peaks["ThrustLC" if name == "peakThrust" else "Chamber"]
+            if peak is None:
+                raise ValueError("max() arg is an empty sequence")
+            return peak
+        if not self.times_valid or not self.count:
+            raise KeyError("Time")
+        if name == "peakMdot":
+            return self.peak_mdot
+        if name == "dataRate":
+            return 1.0 / (self.step_sum / self.steps if self.steps else 0)
+        if not self.manifold_valid:
+            raise KeyError("Manifold")
+        burntime = self.detector.result()
+        if name == "burntime":
+            return burntime
+
+        burns = [burn for burn in burntime["burns"] if burn["end_time"] is not None]
+        impulse = sum(self.boundaries[burn["end_time"]] - self.boundaries[burn["start_time"]] for burn in burns)
+        if name == "totalImpulse":
+            return impulse
+        burn_time = sum(burn["burn_time"] for burn in burns)
+        return impulse / burn_time if burn_time > 0 else None
+
+    def result(self):
+        # The summary fields for save_summary
+        metrics = {}
+        errors = {}
+        for name in METRICS:
+            try:
+                for field in METRIC_FIELDS[name]:
+                    if field in self.column_errors:
+                        raise self.column_errors[field]
+                metrics[name] = self._metric(name)
+            except Exception as e:
+                errors[name] = str(e)
+        return {"rowCount": self.count, "metrics": metrics, "errors": errors, "detection": self.detection}
+
+
+def summarize_event(collection, detection=None):
+    # SummaryBuilder over a stored event, read a batch at a time
+    summary = SummaryBuilder(detection)
+    for columns, column_errors in iter_columns(collection, event_fields(metrics=METRICS)):
+        summary.add(columns, column_errors)
+    return summary
+
+
+def save_summary(db, event, **fields):
+    # "updated" versions the event's derived data, e.g. for response caching. It keeps
+    # sub-second precision, so changes within one second still get a new ETag.
+    fields["updated"] = datetime.now(timezone.utc)
+    db[SUMMARIES_COLLECTION].update_one({"_id": event}, {"$set": fields}, upsert=True)
+
+
+def event_version(db, event):
+    # When the event's data last changed (aware UTC datetime), or None without a summary
+    summary = db[SUMMARIES_COLLECTION].find_one({"_id": event}, {"updated": 1})
+    if summary is None or summary.get("updated") is None:
+        return None
+    return summary["updated"].replace(tzinfo=timezone.utc)
+
+
+def load_summary_metrics(db, event, metrics):
+    # (metrics, errors) for the names the summary can answer, or None without a summary
+    projection = {f"metrics.{name}": 1 for name in metrics}
+    projection.update({f"errors.{name}": 1 for name in metrics})
+    summary = db[SUMMARIES_COLLECTION].find_one({"_id": event}, projection)
+    if summary is None:
+        return None
+    return summary.get("metrics", {}), summary.get("errors", {})
+
+
+def ensure_catalog_indexes(db):
+    # Each sort key is paired with _id so pages have a stable order to resume from.
+    # Name prefix search uses the _id index.
+    summaries = db[SUMMARIES_COLLECTION]
+    for field in CATALOG_SORTS.values():
+        if field != "_id":
+            summaries.create_index([(field, 1), ("_id", 1)])
+
+
+def collection_size(db, event):
+    # Stored size in bytes, when the server reports it
+    try:
+        return db.command("collStats", event).get("size")
+    except Exception:
+        return None
+
+
+def encode_cursor(value, event):
+    return base64.urlsafe_b64encode(json.dumps([value, event]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, event = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return value, event
+
+
+def _after_cursor(field, value, event, compare):
+    # Rows after (value, event) in sort order. Events without the field (null or
+    # missing) sort below every value, so first ascending and last descending, and
+    # range operators never match them, so they are handled on their own.
+    tie = {field: value, "_id": {compare: event}}
+    if value is None:
+        return tie if compare == "$lt" else {"$or": [tie, {field: {"$ne": None}}]}
+    if compare == "$lt":
+        return {"$or": [{field: {"$lt": value}}, tie, {field: None}]}
+    return {"$or": [{field: {"$gt": value}}, tie]}
+
+
+def list_catalog(db, sort="uploadDate", descending=True, limit=100, prefix=None, cursor=None):
+    # One page of the catalog as (events, next_cursor); next_cursor is None on the last page
+    field = CATALOG_SORTS[sort]
+    direction = -1 if descending else 1
+    compare = "$lt" if descending else "$gt"
+
+    filters = []
+    if prefix:
+        filters.append({"_id": {"$regex": "^" + re.escape(prefix)}})
+    if cursor is not None:
+        value, event = decode_cursor(cursor)
+        if field == "_id":
+            filters.append({"_id": {compare: event}})
+        else:
+            filters.append(_after_cursor(field, value, event, compare))
+
+    query = filters[0] if len(filters) == 1 else ({"$and": filters} if filters else {})
+    order = [(field, direction)] if field == "_id" else [(field, direction), ("_id", direction)]
+    events = list(db[SUMMARIES_COLLECTION].find(query, CATALOG_PROJECTION).sort(order).limit(limit + 1))
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        last = events[-1]
+        next_cursor = encode_cursor(last.get(field) if field != "_id" else None, last["_id"])
+    return events, next_cursor
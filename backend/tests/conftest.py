@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+# The backend modules import each other by name, as they do when run from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.environ.setdefault("uri", "mongodb://localhost")
+os.environ.setdefault("MONGO_TLS", "0")
+
+import database
+
+# Every test talks to one in-memory mongomock server instead of a real cluster
+_server = mongomock.MongoClient()
+database.MongoClient = lambda *args, **kwargs: _server
+
+NS_PER_SECOND = 1_000_000_000
+START_NS = 1_700_000_000_000_000_000
+
+
+def make_rows(count=3000, rate=1000, burns=((1.0, 2.0),), start_ns=START_NS):
+    # CSV-style string rows for a hot fire sampled at rate Hz with a step in
+    # Manifold for each (start, end) burn in seconds
+    rows = []
+    for i in range(count):
+        seconds = i / rate
+        burning = any(start <= seconds <= end for start, end in burns)
+        rows.append({
+            "Time": str(start_ns + i * (NS_PER_SECOND // rate)),
+            "Manifold": f"{14.0 + (i % 7) * 0.1 + (400 if burning else 0):.3f}",
+            "Tank": f"{700 - 100 * min(max(seconds - 1, 0), 1) + (i % 5) * 0.2:.3f}",
+            "Chamber": f"{(300 if burning else 0) + 1 + (i % 3) * 0.5:.3f}",
+            "TankLC": f"{50 - 20 * min(max(seconds - 1, 0), 1) + (i % 4) * 0.01:.4f}",
+            "ThrustLC": f"{(500 if burning else 0) + (i % 6) * 0.5:.3f}",
+        })
+    return rows
+
+
+def rows_csv(rows):
+    names = list(rows[0])
+    lines = [",".join(names)] + [",".join(row[name] for name in names) for row in rows]
+    return ("\n".join(lines) + "\n").encode()
+
+
+@pytest.fixture(scope="session")
+def server():
+    import app
+    return app
+
+
+@pytest.fixture
+def db(server):
+    yield server.db
+    for name in server.db.list_collection_names():
+        server.db.drop_collection(name)
+    server.response_cache.entries.clear()
+    server.response_cache.size = 0
+    server.derived_cache.entries.clear()
+    server.derived_cache.size = 0
+
+
+@pytest.fixture
+def client(server, db):
+    return server.app.test_client()
+
+
+def wait_for_job(client, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").get_json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise TimeoutError(f"Job {job_id} did not finish")
+
+
+def upload(client, rows, name, **form):
+    import io
+
+    response = client.post("/upload", data={
+        "file": (io.BytesIO(rows_csv(rows)), f"{name}.csv"),
+        "tags": "{}",
+        "new_csv_name": name,
+        **form,
+    }, content_type="multipart/form-data")
+    assert response.status_code == 202, response.get_json()
+    return wait_for_job(client, response.get_json()["job_id"])
@@ -0,0 +1,104 @@
+import io
+import zipfile
+
+import pytest
+
+import bulk
+from conftest import make_rows, rows_csv, wait_for_job
+from summary import SUMMARIES_COLLECTION
+
+
+@pytest.fixture(autouse=True)
+def threads(monkeypatch):
+    # Worker processes would each get their own mongomock server, so the files are
+    # parsed in threads of this process
+    monkeypatch.setattr(bulk, "BULK_PROCESSES", 0)
+    monkeypatch.setattr(bulk, "_executor", None)
+
+
+def archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zipped:
+        for name, data in files.items():
+            zipped.writestr(name, data)
+    return buffer.getvalue()
+
+
+def bulk_upload(client, files, **form):
+    response = client.post("/upload/bulk", data={
+        "files": [(io.BytesIO(data), name) for name, data in files],
+        "tags": "{}",
+        **form,
+    }, content_type="multipart/form-data")
+    return response
+
+
+def test_csvs_and_zip_members_become_events(client, db):
+    first = make_rows(3000)
+    second = make_rows(3000, burns=((1.5, 2.5),))
+    response = bulk_upload(client, [
+        ("hf_1.csv", rows_csv(first)),
+        ("campaign.zip", archive({"day1/hf_2.csv": rows_csv(second), "day1/notes.txt": b"ignored", "__MACOSX/._hf_2.csv": b""})),
+    ], prefix="b_", author="tester")
+    assert response.status_code == 202
+    assert sorted(response.get_json()["events"]) == ["b_hf_1", "b_hf_2"]
+
+    job = wait_for_job(client, response.get_json()["job_id"])
+    assert job["status"] == "succeeded"
+    assert sorted(report["file"] for report in job["files"]) == ["day1/hf_2.csv", "hf_1.csv"]
+    assert all(report["status"] == "succeeded" for report in job["files"])
+    assert job["rows_parsed"] == 6000
+
+    # Each event is summarized and catalogued like a single upload
+    for name, rows in (("b_hf_1", first), ("b_hf_2", second)):
+        summary = db[SUMMARIES_COLLECTION].find_one({"_id": name})
+        assert summary["author"] == "tester" and summary["rowCount"] == db[name].count_documents({})
+        assert summary["metrics"]["peakThrust"] == max(float(row["ThrustLC"]) for row in rows)
+    assert client.get("/b_hf_2/burntime").get_json()["start_time"] > client.get("/b_hf_1/burntime").get_json()["start_time"]
+
+
+def test_a_failed_file_fails_the_job_but_keeps_the_rest(client, db):
+    broken = rows_csv(make_rows(3000)).replace(b"\n1", b"\nnot-a-time", 1)
+    response = bulk_upload(client, [("hf_ok.csv", rows_csv(make_rows(3000))), ("hf_bad.csv", broken)])
+    job = wait_for_job(client, response.get_json()["job_id"])
+
+    assert job["status"] == "failed"
+    assert "1 of 2 files failed: hf_bad.csv" in job["error"]
+    reports = {report["file"]: report for report in job["files"]}
+    assert reports["hf_ok.csv"]["status"] == "succeeded" and reports["hf_bad.csv"]["status"] == "failed"
+    assert reports["hf_bad.csv"]["error"]
+    assert db[SUMMARIES_COLLECTION].find_one({"_id": "hf_ok"}) is not None
+    assert client.get("/hf_bad/summary").status_code == 404
+
+
+def test_two_files_for_one_event_are_reported(client, db):
+    rows = rows_csv(make_rows(3000))
+    response = bulk_upload(client, [("hf_1.csv", rows), ("more.zip", archive({"hf_1.csv": rows}))])
+    job = wait_for_job(client, response.get_json()["job_id"])
+
+    assert job["status"] == "failed"
+    assert sorted(report["status"] for report in job["files"]) == ["failed", "succeeded"]
+    assert any("also named hf_1" in (report["error"] or "") for report in job["files"])
+
+
+@pytest.mark.parametrize("files, error", [
+    ([], "No files uploaded"),
+    ([("notes.zip", archive({"notes.txt": b"x"}))], "No CSV files found"),
+    ([("event_summaries.csv", b"Time\n1\n")], "reserved"),
+])
+def test_bad_bulk_requests_are_rejected(client, db, files, error):
+    response = bulk_upload(client, files)
+    assert response.status_code == 400
+    assert error in response.get_json()["error"]
+
+
+def test_bulk_ingest_command_reports_failures(db, server, tmp_path):
+    good = tmp_path / "hf_cli.csv"
+    good.write_bytes(rows_csv(make_rows(3000)))
+    bad = tmp_path / "hf_cli_bad.csv"
+    bad.write_bytes(b"Time,Manifold\nnot-a-time,1\n")
+
+    result = server.app.test_cli_runner().invoke(args=["bulk-ingest", str(good), str(bad)])
+    assert result.exit_code != 0
+    assert "hf_cli_bad.csv" in result.output and "safe to re-run" in result.output
+    assert db[SUMMARIES_COLLECTION].find_one({"_id": "hf_cli"})["author"] == "admin"
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from conftest import NS_PER_SECOND, make_rows
+from detection import BurnDetector
+from ingest import trim_to_burn_window
+
+
+def find_start_and_end_times(timestamps, manifold_values, start_slope_threshold=5000, proximity_threshold=10, buffer_seconds=5):
+    # The original detector from app.py, kept as the reference
+    start_index = None
+    end_index = None
+
+    for i in range(1, len(manifold_values)):
+        time_diff = timestamps[i] - timestamps[i - 1]
+        if time_diff == 0:
+            continue
+        slope = (manifold_values[i] - manifold_values[i - 1]) / (timestamps[i] - timestamps[i - 1])
+        if start_index is None and slope > start_slope_threshold:
+            start_index = i
+            break
+
+    if start_index is None:
+        raise ValueError("Flow start could not be detected.")
+
+    pre_flow_average = sum(manifold_values[:start_index]) / len(manifold_values[:start_index])
+
+    for i in range(start_index + 1, len(manifold_values)):
+        if abs(manifold_values[i] - pre_flow_average) <= proximity_threshold:
+            end_index = i
+            break
+
+    if end_index is None:
+        raise ValueError("Flow end could not be detected.")
+
+    start_time = max(0, timestamps[start_index] - buffer_seconds)
+    end_time = timestamps[end_index] + buffer_seconds
+
+    return start_time, end_time
+
+
+def baseline_burns(timestamps, manifold):
+    # Every completed burn, re-running the original detector from each burn's end sample
+    burns = []
+    offset = 0
+    while True:
+        try:
+            start, end = find_start_and_end_times(timestamps[offset:], manifold[offset:], buffer_seconds=0)
+        except ValueError:
+            return burns
+        burns.append((start, end))
+        offset = timestamps.index(end, offset)
+
+
+def samples(rows):
+    return [int(row["Time"]) / NS_PER_SECOND for row in rows], [float(row["Manifold"]) for row in rows]
+
+
+MULTI_BURN = ((1.0, 2.0), (3.0, 3.5), (5.0, 6.25))
+
+
+def test_push_matches_baseline():
+    timestamps, manifold = samples(make_rows(4000))
+    detector = BurnDetector(buffer_seconds=0)
+    for timestamp, value in zip(timestamps, manifold):
+        detector.push(timestamp, value)
+
+    result = detector.result()
+    assert (result["start_time"], result["end_time"]) == find_start_and_end_times(timestamps, manifold, buffer_seconds=0)
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 1000, 10_000])
+def test_push_many_matches_baseline_across_several_burns(chunk):
+    timestamps, manifold = samples(make_rows(8000, burns=MULTI_BURN))
+    detector = BurnDetector(buffer_seconds=0, max_burns=0)
+    for i in range(0, len(timestamps), chunk):
+        detector.push_many(np.array(timestamps[i:i + chunk]), np.array(manifold[i:i + chunk]))
+
+    expected = baseline_burns(timestamps, manifold)
+    assert len(expected) == len(MULTI_BURN)
+    assert detector.burns == expected
+    assert detector.flow_start is None
+
+
+def test_push_and_push_many_agree():
+    timestamps, manifold = samples(make_rows(8000, burns=MULTI_BURN))
+    single = BurnDetector(buffer_seconds=0, max_burns=0)
+    for timestamp, value in zip(timestamps, manifold):
+        single.push(timestamp, value)
+    batched = BurnDetector(buffer_seconds=0, max_burns=0)
+    batched.push_many(np.array(timestamps), np.array(manifold))
+
+    assert single.burns == batched.burns
+
+
+def test_max_burns_stops_after_the_first():
+    timestamps, manifold = samples(make_rows(8000, burns=MULTI_BURN))
+    detector = BurnDetector(buffer_seconds=0)
+    detector.push_many(np.array(timestamps), np.array(manifold))
+
+    assert detector.burns == baseline_burns(timestamps, manifold)[:1]
+    assert detector.result()["burns"] == [{"start_time": detector.burns[0][0], "end_time": detector.burns[0][1], "burn_time": detector.burns[0][1] - detector.burns[0][0]}]
+
+
+@pytest.mark.parametrize("burns, message", [((), "Flow start could not be detected."), (((1.0, 10.0),), "Flow end could not be detected.")])
+def test_missing_start_or_end_raises_like_baseline(burns, message):
+    timestamps, manifold = samples(make_rows(3000, burns=burns))
+    with pytest.raises(ValueError, match=message):
+        find_start_and_end_times(timestamps, manifold)
+
+    detector = BurnDetector()
+    detector.push_many(np.array(timestamps), np.array(manifold))
+    with pytest.raises(ValueError, match=message):
+        detector.result()
+
+
+def test_trim_matches_baseline_window():
+    rows = make_rows(15_000, burns=((7.0, 8.0),))
+    timestamps, manifold = samples(rows)
+    start, end = find_start_and_end_times(timestamps, manifold)
+    expected = [row for timestamp, row in zip(timestamps, rows) if start <= timestamp <= end]
+
+    progress = {}
+    trimmed = list(trim_to_burn_window(iter(rows), progress))
+
+    assert trimmed == expected
+    assert len(trimmed) < len(rows)
+    assert (progress["start_time"], progress["end_time"]) == (start, end)
+    assert progress["rows_parsed"] <= len(rows)
+
+
+def test_trim_keeps_a_window_around_every_burn():
+    rows = make_rows(8000, burns=MULTI_BURN)
+    timestamps, manifold = samples(rows)
+    windows = [(start - 0.25, end + 0.25) for start, end in baseline_burns(timestamps, manifold)]
+    expected = [row for timestamp, row in zip(timestamps, rows) if any(lo <= timestamp <= hi for lo, hi in windows)]
+
+    trimmed = list(trim_to_burn_window(iter(rows), buffer_seconds=0.25, max_burns=0))
+
+    assert trimmed == expected
+    assert len({row["Time"] for row in trimmed}) == len(trimmed)
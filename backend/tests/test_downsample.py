@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from downsample import build_levels, downsample_indices, lttb_indices, minmax_indices, pick_level, shape_series
+
+
+@pytest.fixture
+def spiky():
+    rng = np.random.default_rng(1)
+    time = np.arange(50_000) / 1000.0
+    values = np.sin(time) + rng.normal(0, 0.05, time.size)
+    values[12_345] = 40.0
+    values[33_333] = -25.0
+    return time, {"Thrust": values, "Chamber": np.cos(time)}
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsampling_keeps_global_peaks(spiky, method):
+    time, channels = spiky
+    keep = downsample_indices(time, channels, 500, method)
+
+    assert len(keep) <= 500
+    assert (np.diff(keep) > 0).all()
+    for values in channels.values():
+        assert values.argmax() in keep and values.argmin() in keep
+
+
+def test_lttb_keeps_the_ends():
+    x = np.arange(1000.0)
+    keep = lttb_indices(x, np.sin(x / 50), 100)
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 999
+    assert (np.diff(keep) > 0).all()
+
+
+def test_minmax_keeps_each_bucket_extreme():
+    y = np.tile([0.0, 5.0, -5.0, 1.0], 250)
+    keep = minmax_indices(y, 20)
+    assert set(y[keep]) == {5.0, -5.0}
+
+
+def test_short_series_are_returned_whole():
+    time = np.arange(10.0)
+    assert list(downsample_indices(time, {"a": time}, 100)) == list(range(10))
+    shaped, channels = shape_series(time, {"a": time * 2}, t0=2, t1=4)
+    assert list(shaped) == [2.0, 3.0, 4.0] and list(channels["a"]) == [4.0, 6.0, 8.0]
+
+
+def test_levels_keep_peaks_and_pick_the_coarsest_detailed_enough(spiky):
+    time, channels = spiky
+    levels = build_levels(time, channels)
+    assert [size for size, _, _ in levels] == [1_000, 10_000]
+    for _, _, reduced in levels:
+        assert reduced["Thrust"].max() == 40.0 and reduced["Thrust"].min() == -25.0
+
+    meta = [{"size": size, "t_first": float(t[0]), "t_last": float(t[-1])} for size, t, _ in levels]
+    assert pick_level(meta, 800)["size"] == 1_000
+    assert pick_level(meta, 5_000)["size"] == 10_000
+    # A narrow window needs the raw data
+    assert pick_level(meta, 800, t0=10.0, t1=11.0) is None
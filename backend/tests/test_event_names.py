@@ -0,0 +1,28 @@
+import io
+
+import pytest
+
+from conftest import make_rows, rows_csv
+
+
+@pytest.mark.parametrize("name", ["event_summaries", "series_levels", "ingest_jobs", "ingest.hf_1", "system.views"])
+def test_reserved_names_are_rejected(client, db, name):
+    response = client.post("/upload", data={
+        "file": (io.BytesIO(rows_csv(make_rows(100))), "x.csv"), "tags": "{}", "new_csv_name": name,
+    }, content_type="multipart/form-data")
+    assert response.status_code == 400
+
+    response = client.post("/upload/bulk", data={
+        "files": [(io.BytesIO(rows_csv(make_rows(100))), f"{name}.csv")], "tags": "{}",
+    }, content_type="multipart/form-data")
+    assert response.status_code == 400
+
+    assert client.post(f"/live/{name}", json={}).status_code == 400
+    assert client.get(f"/{name}/export").status_code == 400
+
+
+def test_catalog_survives_a_reserved_upload(client, db):
+    client.post("/upload", data={
+        "file": (io.BytesIO(rows_csv(make_rows(100))), "x.csv"), "tags": "{}", "new_csv_name": "event_summaries",
+    }, content_type="multipart/form-data")
+    assert client.get("/collections").status_code == 200
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from analysis import extract_columns, series_mdot, metric_peak_mdot
+from expressions import Expression, compile_expression
+from conftest import make_rows, upload
+
+
+def baseline_mdot(data):
+    # The original /mdot loop over the stored rows, in stored order
+    start_time = int(data[0]["Time"])
+    points = []
+    for i in range(1, len(data)):
+        time_diff = (int(data[i]["Time"]) - int(data[i - 1]["Time"])) / 1_000_000_000
+        if time_diff > 0:
+            mdot = (float(data[i]["TankLC"]) - float(data[i - 1]["TankLC"])) / time_diff
+            points.append(((int(data[i]["Time"]) - start_time) / 1_000_000_000, mdot))
+    return points
+
+
+def test_mdot_matches_baseline_with_repeated_and_backward_steps():
+    rows = make_rows(3000)
+    rows[200]["Time"], rows[201]["Time"] = rows[201]["Time"], rows[200]["Time"]
+    rows[500]["Time"] = rows[499]["Time"]
+
+    columns, errors = extract_columns(rows, ["Time", "TankLC"])
+    time, channels = series_mdot(columns, int(rows[0]["Time"]))
+    expected = baseline_mdot(rows)
+
+    assert not errors
+    assert len(time) == len(expected)
+    np.testing.assert_allclose(time, [t for t, _ in expected])
+    np.testing.assert_allclose(channels["Mdot"], [m for _, m in expected], rtol=1e-9)
+    assert metric_peak_mdot(columns, {}) == pytest.approx(max(m for _, m in expected))
+
+
+@pytest.mark.parametrize("text", ["(" * 240 + "Tank" + ")" * 240, "-" * 400 + "Tank", "Tank^" * 90 + "Tank", "abs(" * 99 + "Tank" + ")" * 99])
+def test_deep_nesting_is_a_value_error(text):
+    with pytest.raises(ValueError, match="nest"):
+        Expression(text)
+
+
+def test_derived_route_rejects_deep_nesting(client, db):
+    response = client.get("/hf_1/derived", query_string={"expr": "(" * 240 + "Tank" + ")" * 240})
+    assert response.status_code == 400
+    assert "nest" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("name", ["Time", "Manifold", "ThrustLC", "Mdot", "Impulse"])
+def test_derived_name_cannot_shadow_a_channel(client, db, name):
+    upload(client, make_rows(3000), "hf_named")
+    response = client.get("/hf_named/derived", query_string={"expr": "Tank - Manifold", "name": name})
+    assert response.status_code == 400
+    assert "already a channel" in response.get_json()["error"]
+
+
+def test_derived_name_is_used_for_the_values(client, db):
+    upload(client, make_rows(3000), "hf_named")
+    data = client.get("/hf_named/derived", query_string={"expr": "Tank - Manifold", "name": "Drop"}).get_json()["data"]
+    assert len(data) == 3000 and set(data[0]) == {"Time", "Drop"}
+    assert data[0]["Time"] == 0.0
+
+
+def evaluate(text, **columns):
+    time = np.arange(len(next(iter(columns.values())))) / 10.0 if columns else np.arange(3) / 10.0
+    return compile_expression(text).evaluate({name: np.asarray(values, dtype=float) for name, values in columns.items()}, time)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2 + 3 * 4", 14.0),
+    ("(2 + 3) * 4", 20.0),
+    ("-2 ^ 2", -4.0),
+    ("2 ** 3 ^ 2", 512.0),
+    ("10 / 4 - 1", 1.5),
+    ("max(1, min(5, 3))", 3.0),
+    ("1e3 + .5", 1000.5),
+])
+def test_precedence_and_functions(text, expected):
+    assert evaluate(text).tolist() == [expected] * 3
+
+
+def test_channels_and_derived_names():
+    expression = Expression("Stiffness + DP / Time")
+    assert expression.channels == ["Chamber", "Manifold", "Tank"]
+    values = evaluate("DP", Tank=[10, 20, 30], Manifold=[1, 2, 3])
+    assert values.tolist() == [9.0, 18.0, 27.0]
+
+
+def test_rate_and_integrate_over_time():
+    assert np.isnan(evaluate("rate(TankLC)", TankLC=[5, 4, 3])[0])
+    assert evaluate("rate(TankLC)", TankLC=[5, 4, 3])[1:].tolist() == pytest.approx([-10.0, -10.0])
+    assert evaluate("integrate(ThrustLC)", ThrustLC=[2, 2, 2]).tolist() == pytest.approx([0.0, 0.2, 0.4])
+
+
+@pytest.mark.parametrize("text, error", [
+    ("Tank +", "end of expression"),
+    ("(Tank", "Expected"),
+    ("Tank Tank", "Unexpected"),
+    ("foo(Tank)", "Unknown function"),
+    ("max(Tank)", "argument"),
+    ("Tank $ 2", "Unexpected character"),
+    ("Tank + " * 100 + "Tank", "limited to"),
+])
+def test_malformed_expressions(text, error):
+    with pytest.raises(ValueError, match=error):
+        Expression(text)
+
+
+def test_unknown_channel_is_raised_on_evaluation():
+    with pytest.raises(ValueError, match="Unknown channel: Nope"):
+        evaluate("Nope * 2", Tank=[1, 2, 3])
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import filters
+from filters import parse_filter
+
+
+@pytest.mark.parametrize("args, error", [
+    ({"filter": "kalman"}, "Unknown filter"),
+    ({"filter": "moving_average", "window": "4"}, "odd number"),
+    ({"filter": "moving_average", "window": "abc"}, "must be a number"),
+    ({"filter": "savgol", "window": "5", "order": "5"}, "order"),
+])
+def test_invalid_filters_are_rejected(args, error):
+    with pytest.raises(ValueError, match=error):
+        parse_filter(args)
+
+
+def test_parse_filter_defaults():
+    assert parse_filter({}) is None
+    assert parse_filter({"filter": "savgol", "window": "11"}) == {"filter": "savgol", "window": 11, "order": 2}
+
+
+def test_smoothing_keeps_lines_and_gaps():
+    time = np.arange(200) / 100.0
+    values = 3.0 * time + 1.0
+    values[50] = np.nan
+    for spec in ({"filter": "moving_average", "window": 5}, {"filter": "savgol", "window": 7, "order": 2}):
+        smoothed = filters.smooth(values, time, spec)
+        assert np.isnan(smoothed[50])
+        interior = np.r_[10:50, 51:190]
+        np.testing.assert_allclose(smoothed[interior], values[interior])
+
+
+@pytest.mark.parametrize("name", ["savgol", "regression", "moving_average"])
+def test_filtered_rate_of_a_line_is_its_slope(name):
+    time = np.arange(500) / 1000.0
+    values = 50.0 - 20.0 * time
+    rate = filters.rate(values, time, parse_filter({"filter": name, "window": "21"}))
+    # Away from the half windows at the ends, which are either undefined or padded
+    assert np.isfinite(rate[10:-10]).all()
+    np.testing.assert_allclose(rate[20:-20], -20.0, rtol=1e-6)
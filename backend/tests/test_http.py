@@ -0,0 +1,155 @@
+import pytest
+
+from cache import ResponseCache
+from conftest import make_rows, upload
+from summary import SUMMARIES_COLLECTION, save_summary
+
+
+@pytest.fixture
+def event(client, db):
+    upload(client, make_rows(3000), "hf_http")
+
+
+def test_etag_revalidation(client, event):
+    first = client.get("/hf_http/manifold")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert "cache;desc=\"miss\"" in first.headers["Server-Timing"]
+
+    again = client.get("/hf_http/manifold")
+    assert again.headers["ETag"] == etag and again.get_data() == first.get_data()
+    assert "cache;desc=\"hit\"" in again.headers["Server-Timing"]
+
+    revalidated = client.get("/hf_http/manifold", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.get_data() == b""
+    assert revalidated.headers["ETag"] == etag
+
+    since = client.get("/hf_http/manifold", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 304
+
+
+def test_each_representation_has_its_own_etag(client, event):
+    full = client.get("/hf_http/manifold")
+    windowed = client.get("/hf_http/manifold?t0=1&t1=2")
+    assert windowed.status_code == 200
+    assert windowed.headers["ETag"] != full.headers["ETag"]
+    assert client.get("/hf_http/manifold?t0=1&t1=2", headers={"If-None-Match": full.headers["ETag"]}).status_code == 200
+
+
+def test_profiling_is_off_by_default(client, event):
+    response = client.get("/hf_http/peakThrust?profile=1")
+    assert response.status_code == 200
+    assert response.is_json and "peakThrust" in response.get_json()
+    assert "X-Profiled-Status" not in response.headers
+
+
+def seed_catalog(db):
+    # Ties on uploadDate page in _id order
+    dates = ["2024-01-01 00:00:00", "2024-01-02 00:00:00", "2024-01-02 00:00:00", "2024-01-03 00:00:00", "2024-01-02 00:00:00"]
+    for i, date in enumerate(dates):
+        save_summary(db, f"hf_{i}", author="admin", uploadDate=date, rowCount=1000 * (i + 1), size=None, metrics={})
+    save_summary(db, "cold_1", author="admin", uploadDate="2024-01-04 00:00:00", rowCount=1, size=None, metrics={})
+
+
+def pages(client, query):
+    names = []
+    cursor = None
+    while True:
+        body = client.get("/collections", query_string={**query, **({"cursor": cursor} if cursor else {})}).get_json()
+        assert len(body["collections"]) <= query["limit"]
+        names += [event["name"] for event in body["collections"]]
+        cursor = body["nextCursor"]
+        if cursor is None:
+            return names
+
+
+def test_catalog_cursor_paging(client, db):
+    seed_catalog(db)
+    assert pages(client, {"limit": 2}) == ["cold_1", "hf_3", "hf_4", "hf_2", "hf_1", "hf_0"]
+    assert pages(client, {"limit": 2, "order": "asc"}) == ["hf_0", "hf_1", "hf_2", "hf_4", "hf_3", "cold_1"]
+    assert pages(client, {"limit": 4, "sort": "name", "prefix": "hf_"}) == ["hf_4", "hf_3", "hf_2", "hf_1", "hf_0"]
+    assert pages(client, {"limit": 1, "sort": "rowCount", "order": "asc"}) == ["cold_1", "hf_0", "hf_1", "hf_2", "hf_3", "hf_4"]
+
+
+@pytest.mark.parametrize("sort", ["author", "uploadDate", "rowCount"])
+def test_catalog_pages_past_missing_sort_values(client, db, sort):
+    seed_catalog(db)
+    # Summaries written without these fields, e.g. by an older version
+    for name in ("old_1", "old_2", "old_3"):
+        db[SUMMARIES_COLLECTION].insert_one({"_id": name, "metrics": {}})
+
+    everything = {"cold_1", "hf_0", "hf_1", "hf_2", "hf_3", "hf_4", "old_1", "old_2", "old_3"}
+    for order in ("desc", "asc"):
+        names = pages(client, {"limit": 2, "sort": sort, "order": order})
+        assert sorted(names) == sorted(everything)
+        missing = [i for i, name in enumerate(names) if name.startswith("old_")]
+        assert missing == ([6, 7, 8] if order == "desc" else [0, 1, 2])
+
+
+@pytest.mark.parametrize("query", [{"cursor": "not-a-cursor"}, {"sort": "size"}, {"order": "up"}])
+def test_catalog_rejects_bad_queries(client, db, query):
+    assert client.get("/collections", query_string=query).status_code == 400
+
+
+def test_reupload_changes_the_etag(client, event):
+    first = client.get("/hf_http/manifold")
+    upload(client, make_rows(3000, rate=500), "hf_http")
+
+    # A re-upload within the same second is a new version too
+    again = client.get("/hf_http/manifold", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 200
+    assert again.headers["ETag"] != first.headers["ETag"]
+
+
+def test_disk_cache_stays_within_its_budget(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path), disk_max_bytes=10_000)
+    keys = [("hf_disk", "v1", f"/hf_disk/{i}", ()) for i in range(20)]
+    for key in keys:
+        cache.put(key, {"body": b"x" * 1000, "mimetype": "application/json", "encoding": None})
+
+    assert sum(path.stat().st_size for path in tmp_path.iterdir()) <= 10_000
+    # A fresh process (an empty memory tier) still finds the most recent entries on disk
+    assert ResponseCache(directory=str(tmp_path), disk_max_bytes=10_000).get(keys[-1])["body"] == b"x" * 1000
+
+
+@pytest.fixture
+def compared(client, db):
+    upload(client, make_rows(3000, burns=((1.0, 2.0),)), "hf_cmp_a")
+    upload(client, make_rows(3000, burns=((1.5, 2.5),)), "hf_cmp_b")
+
+
+def test_compare_aligns_events_on_burn_start(client, compared):
+    response = client.get("/compare?events=hf_cmp_a,hf_cmp_b,hf_missing&series=thrustlc&max_points=200")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [row["event"] for row in body["table"]] == ["hf_cmp_a", "hf_cmp_b"]
+    assert body["events"]["hf_missing"] == {"error": "No data found for the given event ID"}
+
+    # The thrust step lands at t=0 in both once aligned
+    for name in ("hf_cmp_a", "hf_cmp_b"):
+        points = body["events"][name]["series"]["thrustlc"]
+        first_burning = next(point["Time"] for point in points if point["ThrustLC"] > 100)
+        assert first_burning == pytest.approx(0, abs=0.02)
+    assert body["events"]["hf_cmp_b"]["offset"] - body["events"]["hf_cmp_a"]["offset"] == pytest.approx(0.5, abs=0.01)
+
+
+@pytest.mark.parametrize("name", ["event_summaries", "series_levels", "ingest_jobs", "ingest.hf_1", "system.views"])
+def test_compare_rejects_reserved_names(client, compared, name):
+    response = client.get(f"/compare?events=hf_cmp_a,{name}")
+    assert response.status_code == 400
+    assert "reserved" in response.get_json()["error"]
+
+
+def test_compare_reports_a_failing_event_under_its_errors(client, server, compared, monkeypatch):
+    original = server.compare_event
+    def compare_event(event_id, *args):
+        if event_id == "hf_cmp_b":
+            raise RuntimeError("lost connection")
+        return original(event_id, *args)
+    monkeypatch.setattr(server, "compare_event", compare_event)
+
+    response = client.get("/compare?events=hf_cmp_a,hf_cmp_b")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["events"]["hf_cmp_b"]["errors"] == {"event": "Error loading event: lost connection"}
+    assert [row["event"] for row in body["table"]] == ["hf_cmp_a"]
@@ -0,0 +1,78 @@
+import re
+
+import pytest
+
+import instrumentation
+from conftest import make_rows, upload
+
+
+@pytest.fixture
+def event(client, db):
+    upload(client, make_rows(3000), "hf_timing")
+
+
+def server_timing(response):
+    # {name: {"dur": ms, "desc": text}} from a Server-Timing header
+    entries = {}
+    for entry in response.headers["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        entries[name] = {key: value.strip('"') for key, value in (param.split("=", 1) for param in params)}
+    return entries
+
+
+def metrics(client):
+    # {"name{labels}": value} for every sample /metrics reports
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.mimetype == "text/plain"
+    return {key: float(value) for key, value in re.findall(r"^(rp_\S+) (\S+)$", response.get_data(as_text=True), re.M)}
+
+
+def test_server_timing_splits_the_request(client, event):
+    timing = server_timing(client.get("/hf_timing/manifold"))
+    assert set(timing) == {"db", "compute", "serialize", "total", "rows", "cache"}
+    assert timing["rows"]["desc"] == "3000"
+    assert timing["cache"]["desc"] == "miss"
+    phases = sum(float(timing[name]["dur"]) for name in ("db", "compute", "serialize"))
+    assert phases == pytest.approx(float(timing["total"]["dur"]), abs=0.05)
+
+    # A cached answer reads no rows
+    timing = server_timing(client.get("/hf_timing/manifold"))
+    assert timing["rows"]["desc"] == "0" and timing["cache"]["desc"] == "hit"
+
+
+def test_metrics_count_requests_rows_and_bytes(client, event):
+    route = '{route="/<event_id>/manifold"}'
+    before = metrics(client)
+    first = client.get("/hf_timing/manifold")
+    client.get("/hf_timing/manifold")
+    client.get("/hf_timing/manifold?format=xml")
+    after = metrics(client)
+
+    def added(key):
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert added('rp_requests_total{route="/<event_id>/manifold",method="GET",status="200"}') == 2
+    assert added('rp_requests_total{route="/<event_id>/manifold",method="GET",status="400"}') == 1
+    assert added(f"rp_request_duration_seconds_count{route}") == 3
+    assert added(f"rp_rows_scanned_total{route}") == 3000
+    assert added(f"rp_response_bytes_total{route}") >= 2 * len(first.get_data())
+    assert added('rp_response_cache_total{result="hit"}') == 1
+    assert "rp_response_cache_bytes" in after and "rp_derived_cache_bytes" in after
+
+
+def test_streamed_responses_are_measured_once_sent(client, event):
+    route = '{route="/<event_id>/thrustlc"}'
+    before = metrics(client)
+    body = client.get("/hf_timing/thrustlc?format=ndjson").get_data()
+    after = metrics(client)
+
+    assert after[f"rp_rows_scanned_total{route}"] - before.get(f"rp_rows_scanned_total{route}", 0) == 3000
+    assert after[f"rp_response_bytes_total{route}"] - before.get(f"rp_response_bytes_total{route}", 0) == len(body)
+
+
+def test_profile_replaces_the_body_when_enabled(client, event, monkeypatch):
+    monkeypatch.setattr(instrumentation, "PROFILING", True)
+    response = client.get("/hf_timing/peakThrust?profile=1")
+    assert response.status_code == 200 and response.mimetype == "text/plain"
+    assert response.headers["X-Profiled-Status"] == "200"
+    assert "function calls" in response.get_data(as_text=True)
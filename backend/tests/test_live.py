@@ -0,0 +1,119 @@
+import json
+import time
+import threading
+
+import pytest
+
+import live
+from conftest import START_NS, wait_for_job
+
+
+def samples(first, count):
+    return {
+        "Time": [START_NS + (first + i) * 1_000_000 for i in range(count)],
+        "Manifold": [14.0] * count,
+        "TankLC": [50.0 - (first + i) * 0.01 for i in range(count)],
+    }
+
+
+def messages(body):
+    # (event, data) per SSE message, skipping keep-alive comments
+    parsed = []
+    for block in body.decode().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if lines:
+            parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def test_failed_write_can_be_retried(client, db, monkeypatch):
+    assert client.post("/live/hf_live", json={}).status_code == 201
+    assert client.post("/live/hf_live/samples", json=samples(0, 3)).get_json() == {"rows": 3}
+
+    original = live.insert_documents
+    def fail_once(collection, documents):
+        monkeypatch.setattr(live, "insert_documents", original)
+        collection.insert_many(documents[:1])
+        raise ConnectionError("connection lost")
+    monkeypatch.setattr(live, "insert_documents", fail_once)
+
+    assert client.post("/live/hf_live/samples", json=samples(3, 2)).status_code == 500
+    assert db["hf_live"].count_documents({}) == 3
+    assert live.get_session(db, "hf_live")["rows"] == 3
+
+    assert client.post("/live/hf_live/samples", json=samples(3, 2)).get_json() == {"rows": 5}
+    assert db["hf_live"].count_documents({}) == 5
+    wait_for_job(client, client.post("/live/hf_live/finish").get_json()["job_id"])
+
+
+def test_viewers_follow_committed_rows(client, db):
+    # The stream reads the session from Mongo, so it works from any worker
+    assert client.post("/live/hf_live", json={}).status_code == 201
+    assert client.post("/live/hf_live/samples", json=samples(0, 3)).status_code == 200
+
+    stream = live.viewer_events(db, live.get_session(db, "hf_live"), poll_seconds=0)
+    event, snapshot = messages(next(stream))[0]
+    assert event == "snapshot" and snapshot["rows"] == 3 and snapshot["startTime"] == START_NS
+
+    assert client.post("/live/hf_live/samples", json=samples(3, 2)).status_code == 200
+    event, update = messages(next(stream))[0]
+    assert event == "update" and update["rows"] == 5 and update["lastTime"] == START_NS + 4_000_000
+    assert update["series"]["tanklc"]["TankLC"][-1] == 50.0 - 0.04
+
+    job_id = client.post("/live/hf_live/finish").get_json()["job_id"]
+    event, end = messages(b"".join(stream))[-1]
+    assert event == "end" and end["rows"] == 5
+    wait_for_job(client, job_id)
+
+
+def test_live_sessions_reject_out_of_order_samples(client, db):
+    assert client.post("/live/hf_live", json={}).status_code == 201
+    assert client.post("/live/hf_live", json={}).status_code == 409
+    assert client.post("/live/hf_live/samples", json=samples(5, 2)).status_code == 200
+    assert client.post("/live/hf_live/samples", json=samples(0, 2)).status_code == 400
+    repeated = samples(7, 2)
+    repeated["Time"][1] = repeated["Time"][0]
+    assert client.post("/live/hf_live/samples", json=repeated).status_code == 400
+    finished = client.post("/live/hf_live/finish")
+    assert finished.status_code == 202
+    assert client.post("/live/hf_live/samples", json=samples(10, 2)).status_code in (400, 404)
+
+    assert wait_for_job(client, finished.get_json()["job_id"])["status"] == "succeeded"
+    assert live.get_session(db, "hf_live") is None
+    assert client.post("/live/hf_live/samples", json=samples(10, 2)).status_code == 404
+    assert client.get("/hf_live/summary").status_code == 200
+
+
+def test_a_lost_commit_keeps_the_winners_rows(client, db):
+    # Two batches checked against the same state: the second to commit backs out
+    # only its own rows
+    assert client.post("/live/hf_live", json={}).status_code == 201
+    session = live.get_session(db, "hf_live")
+    assert live.append_samples(db, session, live.sample_documents(samples(0, 3))) == 3
+
+    with pytest.raises(ValueError, match="send them again"):
+        live.append_samples(db, session, live.sample_documents(samples(0, 5)))
+
+    assert db["hf_live"].count_documents({}) == 3
+    assert live.get_session(db, "hf_live")["rows"] == 3
+    wait_for_job(client, client.post("/live/hf_live/finish").get_json()["job_id"])
+
+
+def test_a_commit_wakes_waiting_viewers(client, db):
+    assert client.post("/live/hf_live", json={}).status_code == 201
+    assert client.post("/live/hf_live/samples", json=samples(0, 3)).status_code == 200
+
+    # A poll interval far longer than the test, so only the commit can wake the viewer
+    stream = live.viewer_events(db, live.get_session(db, "hf_live"), poll_seconds=30)
+    next(stream)
+    timer = threading.Timer(0.2, lambda: live.append_samples(db, live.get_session(db, "hf_live"), live.sample_documents(samples(3, 2))))
+    timer.start()
+    started = time.monotonic()
+    event, update = messages(next(stream))[0]
+    assert event == "update" and update["rows"] == 5
+    assert time.monotonic() - started < 5
+    timer.join()
+
+    job_id = client.post("/live/hf_live/finish").get_json()["job_id"]
+    assert messages(b"".join(stream))[-1][0] == "end"
+    wait_for_job(client, job_id)
@@ -0,0 +1,97 @@
+from conftest import make_rows, upload
+from storage import event_layout, read_columns
+
+FIELDS = ["Time", "Manifold", "Tank", "Chamber", "TankLC", "ThrustLC"]
+
+
+def stored_columns(db, name):
+    columns, errors = read_columns(db[name], FIELDS)
+    assert errors == {}
+    return {field: columns[field].tolist() for field in FIELDS}
+
+
+def responses(client, server, name):
+    # Fresh answers from storage rather than the response cache
+    server.response_cache.invalidate(name)
+    return {route: client.get(f"/{name}/{route}").get_data() for route in ("pressures", "mdot", "dashboard?max_points=200", "export")}
+
+
+def test_migrate_storage_repacks_rows_into_buckets(client, db, server):
+    upload(client, make_rows(12_000), "hf_migrate", detection='{"buffer_seconds": 30}')
+    assert event_layout(db["hf_migrate"]) == "rows"
+    columns = stored_columns(db, "hf_migrate")
+    before = responses(client, server, "hf_migrate")
+
+    result = server.app.test_cli_runner().invoke(args=["migrate-storage", "hf_migrate"])
+    assert result.exit_code == 0 and "hf_migrate: migrated 12000 rows" in result.output
+
+    assert event_layout(db["hf_migrate"]) == "buckets"
+    assert db["hf_migrate"].count_documents({}) == 2
+    assert stored_columns(db, "hf_migrate") == columns
+    assert responses(client, server, "hf_migrate") == before
+    assert not any(name.startswith("ingest.") for name in db.list_collection_names())
+
+    again = server.app.test_cli_runner().invoke(args=["migrate-storage"])
+    assert "hf_migrate: already bucketed, skipped" in again.output
+
+
+def test_bucketed_uploads_read_like_rows(client, db, server, monkeypatch):
+    rows = make_rows(3000)
+    upload(client, rows, "hf_rows")
+    monkeypatch.setattr(server, "STORAGE_MODE", "buckets")
+    upload(client, rows, "hf_buckets")
+
+    assert event_layout(db["hf_buckets"]) == "buckets"
+    assert stored_columns(db, "hf_buckets") == stored_columns(db, "hf_rows")
+    for route in ("pressures", "mdot", "peakThrust", "burntime", "thrustlc?t0=0.5&t1=1.5"):
+        assert client.get(f"/hf_buckets/{route}").get_json() == client.get(f"/hf_rows/{route}").get_json()
+
+
+def test_migrate_storage_skips_app_collections_by_default(client, db, server):
+    upload(client, make_rows(3000), "hf_migrate")
+    db["ingest.hf_partial"].insert_one({"Time": 1})
+
+    result = server.app.test_cli_runner().invoke(args=["migrate-storage"])
+    assert result.output.splitlines() == ["hf_migrate: migrated 3000 rows"]
+    assert event_layout(db["ingest.hf_partial"]) == "rows"
+
+
+def index_keys(db, name):
+    return [info["key"] for info in db[name].index_information().values()]
+
+
+def test_uploads_are_typed_and_indexed(client, db, server):
+    upload(client, make_rows(3000), "hf_indexed")
+    document = db["hf_indexed"].find_one({}, {"_id": 0})
+    assert isinstance(document["Time"], int) and isinstance(document["Manifold"], float)
+    assert [("Time", 1), ("Manifold", 1), ("Tank", 1), ("Chamber", 1), ("TankLC", 1), ("ThrustLC", 1)] in index_keys(db, "hf_indexed")
+
+    # A window reads only its own rows
+    timing = client.get("/hf_indexed/manifold?t0=1&t1=1.5").headers["Server-Timing"]
+    assert 'rows;desc="501"' in timing
+
+
+def test_reindex_events_types_and_indexes_legacy_rows(client, db, server):
+    # Stored the way the original upload did: every value a string, no index
+    db["hf_legacy"].insert_many([dict(row) for row in make_rows(3000)])
+    assert event_layout(db["hf_legacy"]) == "legacy"
+    before = responses(client, server, "hf_legacy")
+
+    result = server.app.test_cli_runner().invoke(args=["reindex-events", "hf_legacy"])
+    assert result.exit_code == 0 and "hf_legacy: typed 3000 rows, indexed" in result.output
+
+    assert event_layout(db["hf_legacy"]) == "rows"
+    assert isinstance(db["hf_legacy"].find_one()["Time"], int)
+    assert any(keys[0] == ("Time", 1) for keys in index_keys(db, "hf_legacy"))
+    assert responses(client, server, "hf_legacy") == before
+    assert not any(name.startswith("ingest.") for name in db.list_collection_names())
+
+    again = server.app.test_cli_runner().invoke(args=["reindex-events", "hf_legacy"])
+    assert "hf_legacy: indexed" in again.output
+
+
+def test_reindex_events_skips_bucketed_events(client, db, server, monkeypatch):
+    monkeypatch.setattr(server, "STORAGE_MODE", "buckets")
+    upload(client, make_rows(3000), "hf_buckets")
+    result = server.app.test_cli_runner().invoke(args=["reindex-events"])
+    assert "hf_buckets: bucketed or empty, skipped" in result.output
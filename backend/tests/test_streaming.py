@@ -0,0 +1,87 @@
+import io
+import json
+import functools
+
+import pytest
+
+import storage
+from conftest import make_rows, upload
+
+
+@pytest.fixture
+def event(client, db, server, monkeypatch):
+    # Read back in small batches, so every stream spans several of them
+    monkeypatch.setattr(server, "iter_columns", functools.partial(storage.iter_columns, batch_rows=700))
+    upload(client, make_rows(3000), "hf_stream")
+
+
+def ndjson_points(response):
+    return [json.loads(line) for line in response.get_data().decode().splitlines()]
+
+
+def csv_points(response):
+    lines = response.get_data().decode().splitlines()
+    names = lines[0].split(",")
+    return [{name: float(value) for name, value in zip(names, line.split(","))} for line in lines[1:]]
+
+
+@pytest.mark.parametrize("name", ["pressures", "mdot"])
+def test_ndjson_and_csv_stream_the_full_series(client, event, name):
+    # mdot carries its difference across the stored batches
+    expected = client.get(f"/hf_stream/{name}").get_json()["data"]
+
+    ndjson = client.get(f"/hf_stream/{name}?format=ndjson")
+    assert ndjson.is_streamed and ndjson.mimetype == "application/x-ndjson"
+    assert ndjson_points(ndjson) == expected
+
+    csv = client.get(f"/hf_stream/{name}", headers={"Accept": "text/csv"})
+    assert csv.is_streamed and csv.mimetype == "text/csv"
+    assert csv_points(csv) == expected
+
+
+def test_streamed_window_matches_json(client, event):
+    expected = client.get("/hf_stream/thrustlc?t0=0.75&t1=2.25").get_json()["data"]
+    streamed = ndjson_points(client.get("/hf_stream/thrustlc?t0=0.75&t1=2.25&format=ndjson"))
+    assert streamed == expected and len(streamed) > 0
+
+
+def test_stream_failure_ends_ndjson_with_an_error_line(client, server, event, monkeypatch):
+    original = server.series_chunks
+    def failing(*args, **kwargs):
+        chunks = original(*args, **kwargs)
+        yield next(chunks)
+        raise RuntimeError("lost connection")
+    monkeypatch.setattr(server, "series_chunks", failing)
+
+    lines = client.get("/hf_stream/thrustlc?format=ndjson").get_data().decode().splitlines()
+    assert json.loads(lines[-1]) == {"error": "lost connection"}
+    assert len(lines) > 1
+
+
+def test_csv_export_returns_the_stored_rows(client, db, event):
+    response = client.get("/hf_stream/export")
+    assert response.is_streamed
+    assert response.headers["Content-Disposition"] == 'attachment; filename="hf_stream.csv"'
+
+    lines = response.get_data().decode().splitlines()
+    assert lines[0] == "Time,Manifold,Tank,Chamber,TankLC,ThrustLC"
+    stored = list(db["hf_stream"].find({}, {"_id": 0}).sort("Time", 1))
+    assert len(lines) - 1 == len(stored)
+    for line, document in zip(lines[1:], stored):
+        values = line.split(",")
+        assert int(values[0]) == document["Time"]
+        assert [float(value) for value in values[1:]] == [document[name] for name in lines[0].split(",")[1:]]
+
+
+def test_parquet_export_returns_the_stored_rows(client, db, event):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(client.get("/hf_stream/export?format=parquet").get_data()))
+    stored = list(db["hf_stream"].find({}, {"_id": 0}).sort("Time", 1))
+    assert table.num_rows == len(stored)
+    assert table.column("Time").to_pylist() == [document["Time"] for document in stored]
+    assert table.column("ThrustLC").to_pylist() == [document["ThrustLC"] for document in stored]
+
+
+def test_export_rejects_unknown_formats(client, event):
+    assert client.get("/hf_stream/export?format=xlsx").status_code == 400
+    assert client.get("/hf_missing/export").status_code == 404
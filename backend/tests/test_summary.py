@@ -0,0 +1,99 @@
+import pytest
+
+from analysis import METRICS, compute_event, event_fields, extract_columns
+from conftest import make_rows, upload
+from summary import SUMMARIES_COLLECTION, SummaryBuilder
+
+FIELDS = event_fields(metrics=METRICS)
+
+
+def streamed(rows, batch, detection=None):
+    summary = SummaryBuilder(detection)
+    for i in range(0, len(rows), batch):
+        summary.add(*extract_columns(rows[i:i + batch], FIELDS))
+    return summary.result()
+
+
+def assert_same(result, expected):
+    assert result["errors"] == expected["errors"]
+    assert result["metrics"].keys() == expected["metrics"].keys()
+    for name, value in expected["metrics"].items():
+        if isinstance(value, dict):
+            assert result["metrics"][name] == value
+        else:
+            assert result["metrics"][name] == pytest.approx(value, rel=1e-9)
+
+
+def with_bad_thrust(rows):
+    rows[2500]["ThrustLC"] = "n/a"
+    return rows
+
+
+def without_chamber(rows):
+    for row in rows:
+        del row["Chamber"]
+    return rows
+
+
+@pytest.mark.parametrize("rows, detection", [
+    (make_rows(4000), None),
+    (make_rows(9000, burns=((1.0, 2.0), (3.0, 3.5), (5.0, 6.25))), {"max_burns": 0}),
+    (make_rows(9000, burns=((1.0, 2.0), (3.0, 3.5), (5.0, 6.25))), {"max_burns": 2, "proximity_threshold": 5}),
+    (make_rows(3000, burns=()), None),
+    (make_rows(3000, burns=((1.0, 10.0),)), None),
+    (with_bad_thrust(make_rows(4000)), None),
+    (without_chamber(make_rows(4000)), None),
+])
+@pytest.mark.parametrize("batch", [1, 333, 5000, 100_000])
+def test_streamed_summary_matches_compute_event(rows, detection, batch):
+    columns, column_errors = extract_columns(rows, FIELDS)
+    expected = compute_event(columns, column_errors, metrics=list(METRICS), detection=detection)
+    result = streamed(rows, batch, detection)
+
+    assert result["rowCount"] == len(rows)
+    assert_same(result, expected)
+
+
+def test_upload_summary_matches_recompute(client, db):
+    upload(client, make_rows(12_000, burns=((1.0, 2.0), (4.0, 5.0))), "hf_sum", detection='{"max_burns": 0}')
+    stored = db[SUMMARIES_COLLECTION].find_one({"_id": "hf_sum"})
+
+    recomputed = client.post("/hf_sum/summary/recompute", json={}).get_json()
+    assert stored["rowCount"] == recomputed["rowCount"]
+    assert_same(stored, recomputed)
+    assert len(stored["metrics"]["burntime"]["burns"]) == 2
+
+
+def test_recompute_without_a_summary_leaves_the_catalog_alone(client, db):
+    upload(client, make_rows(2000), "hf_uncatalogued")
+    db[SUMMARIES_COLLECTION].delete_one({"_id": "hf_uncatalogued"})
+
+    response = client.post("/hf_uncatalogued/summary/recompute", json={})
+    assert response.status_code == 404
+    assert db[SUMMARIES_COLLECTION].find_one({"_id": "hf_uncatalogued"}) is None
+
+
+def test_out_of_order_upload_is_summarized_from_storage(client, db):
+    rows = make_rows(4000)
+    rows[1500], rows[1501] = rows[1501], rows[1500]
+    upload(client, rows, "hf_unordered")
+
+    columns, column_errors = extract_columns(sorted(rows, key=lambda row: int(row["Time"])), FIELDS)
+    expected = compute_event(columns, column_errors, metrics=list(METRICS))
+    assert_same(db[SUMMARIES_COLLECTION].find_one({"_id": "hf_unordered"}), expected)
+
+
+def test_levels_are_built_from_batches(client, db):
+    rows = make_rows(25_000)
+    upload(client, rows, "hf_levels", detection='{"buffer_seconds": 30}')
+
+    levels = list(db["series_levels"].find({"event": "hf_levels", "series": "thrustlc"}))
+    assert [level["size"] for level in levels] == [1_000, 10_000]
+    for level in levels:
+        assert len(level["Time"]) <= level["size"]
+        assert max(level["channels"]["ThrustLC"]) == max(float(row["ThrustLC"]) for row in rows)
+        assert level["t_first"] == 0.0 and level["t_last"] == pytest.approx(24.999)
+
+    served = client.get("/hf_levels/thrustlc?max_points=500").get_json()["data"]
+    assert len(served) <= 500
+    assert max(point["ThrustLC"] for point in served) == max(float(row["ThrustLC"]) for row in rows)
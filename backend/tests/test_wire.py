@@ -0,0 +1,71 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from conftest import make_rows, upload
+
+
+@pytest.fixture
+def event(client, db):
+    upload(client, make_rows(3000), "hf_wire")
+
+
+def decode_columns(body):
+    # The inverse of wire.encode_columns: (header, {series: {column: values}})
+    length, = struct.unpack_from("<I", body)
+    header = json.loads(body[4:4 + length])
+    values = np.frombuffer(body, dtype="<f8", offset=4 + length)
+    series = {}
+    for name, layout in header["series"].items():
+        series[name] = {}
+        for column in layout["columns"]:
+            series[name][column], values = values[:layout["length"]], values[layout["length"]:]
+    assert values.size == 0
+    return header, series
+
+
+def json_columns(points):
+    return {name: [point[name] for point in points] for name in points[0]}
+
+
+@pytest.mark.parametrize("query, headers", [("?format=columns", {}), ("", {"Accept": "application/x-rp-columns"})])
+def test_columns_round_trip(client, event, query, headers):
+    expected = json_columns(client.get("/hf_wire/pressures").get_json()["data"])
+
+    response = client.get(f"/hf_wire/pressures{query}", headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-rp-columns"
+    header, series = decode_columns(response.get_data())
+    assert header["series"]["data"]["columns"] == ["Time", "Chamber", "Manifold", "Tank"]
+    assert {name: values.tolist() for name, values in series["data"].items()} == expected
+
+
+def test_dashboard_columns_carry_every_series_and_the_metrics(client, event):
+    expected = client.get("/hf_wire/dashboard?series=thrustlc,dp&metrics=peakThrust").get_json()
+
+    header, series = decode_columns(client.get("/hf_wire/dashboard?series=thrustlc,dp&metrics=peakThrust&format=columns").get_data())
+    assert header["metrics"] == expected["metrics"]
+    for name in ("thrustlc", "dp"):
+        assert {column: values.tolist() for column, values in series[name].items()} == json_columns(expected["series"][name])
+
+
+def test_arrow_round_trip(client, event):
+    pa = pytest.importorskip("pyarrow")
+    expected = json_columns(client.get("/hf_wire/thrustlc?max_points=500").get_json()["data"])
+
+    response = client.get("/hf_wire/thrustlc?max_points=500", headers={"Accept": "application/vnd.apache.arrow.stream"})
+    assert response.status_code == 200
+    assert response.mimetype == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.get_data()).read_all()
+    assert table.to_pydict() == expected
+
+
+def test_arrow_dashboards_need_a_single_series(client, event):
+    pytest.importorskip("pyarrow")
+    assert client.get("/hf_wire/dashboard?series=thrustlc,dp&format=arrow").status_code == 400
+
+
+def test_unknown_format_is_rejected(client, event):
+    assert client.get("/hf_wire/thrustlc?format=xml").status_code == 400
@@ -0,0 +1,196 @@
+import gzip
+import json
+import zlib
+import struct
+
+import numpy as np
+
+# Optional dependencies: without pyarrow the Arrow and Parquet formats are not
+# served, and without brotli responses fall back to gzip
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MIMETYPE = "application/json"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+COLUMNS_MIMETYPE = "application/x-rp-columns"
+NDJSON_MIMETYPE = "application/x-ndjson"
+CSV_MIMETYPE = "text/csv"
+PARQUET_MIMETYPE = "application/vnd.apache.parquet"
+
+# ?format= names; JSON stays the default when neither the parameter nor Accept asks otherwise
+WIRE_FORMATS = {
+    "json": JSON_MIMETYPE,
+    "arrow": ARROW_MIMETYPE,
+    "columns": COLUMNS_MIMETYPE,
+    "ndjson": NDJSON_MIMETYPE,
+    "csv": CSV_MIMETYPE,
+}
+
+# Line-oriented formats that full-resolution series stream batch by batch
+STREAM_FORMATS = ("ndjson", "csv")
+
+# /<event_id>/export formats
+EXPORT_FORMATS = {"csv": CSV_MIMETYPE, "parquet": PARQUET_MIMETYPE}
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+
+
+def negotiate_format(args, accept_mimetypes):
+    # ?format= wins over the Accept header
+    name = args.get("format")
+    if name is not None:
+        if name not in WIRE_FORMATS:
+            raise ValueError(f"Unknown format: {name}")
+        if name == "arrow" and pa is None:
+            raise ValueError("Arrow format is not available on this server")
+        return name
+
+    offered = [mimetype for name, mimetype in WIRE_FORMATS.items() if name != "arrow" or pa is not None]
+    best = accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+    return next(name for name, mimetype in WIRE_FORMATS.items() if mimetype == best)
+
+
+def negotiate_encoding(accept_encodings):
+    if brotli is not None and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def encode_columns(series, metrics=None, errors=None):
+    # Typed-array layout a browser can read with DataView/Float64Array and no parsing:
+    #   uint32 LE header length | JSON header (space-padded to a multiple of 8) |
+    #   every column as float64 LE, in header order
+    # The header is {"series": {name: {"length": n, "columns": ["Time", ...]}},
+    # "metrics": {...}, "errors": {...}}; series maps names to (time, channels) arrays.
+    header = {"series": {}, "metrics": metrics or {}, "errors": errors or {}}
+    columns = []
+    for name, (time, channels) in series.items():
+        header["series"][name] = {"length": len(time), "columns": ["Time", *channels]}
+        columns.append(time)
+        columns.extend(channels.values())
+
+    head = json.dumps(header).encode()
+    head += b" " * (-(4 + len(head)) % 8)
+    return b"".join([
+        struct.pack("<I", len(head)),
+        head,
+        *(np.ascontiguousarray(column, dtype="<f8").tobytes() for column in columns),
+    ])
+
+
+def encode_arrow(time, channels, metrics=None, errors=None):
+    # One Arrow IPC stream per series (Time plus float64 channels); any metrics
+    # and errors travel as JSON in the schema metadata
+    table = pa.table({"Time": time, **channels})
+    metadata = {}
+    if metrics:
+        metadata["metrics"] = json.dumps(metrics)
+    if errors:
+        metadata["errors"] = json.dumps(errors)
+    if metadata:
+        table = table.replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def compress_stream(chunks, encoding):
+    # Compress a streamed body chunk by chunk, flushing after each so the client
+    # can decode every batch as soon as it arrives
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def encode_ndjson(chunks):
+    # One {"Time": ..., <channel>: ...} object per line, the same shape as the JSON points.
+    # chunks yields (time, channels) arrays; each becomes one bytes chunk.
+    for time, channels in chunks:
+        names = ["Time", *channels]
+        rows = zip(time.tolist(), *(values.tolist() for values in channels.values()))
+        yield "".join(json.dumps(dict(zip(names, row))) + "\n" for row in rows).encode()
+
+
+def _csv_value(value):
+    return "" if value != value else str(value)  # NaN is written as an empty field
+
+
+def encode_csv(chunks):
+    header = None
+    for time, channels in chunks:
+        if header is None:
+            header = ",".join(["Time", *channels]) + "\n"
+            yield header.encode()
+        rows = zip(time.tolist(), *(values.tolist() for values in channels.values()))
+        yield "".join(",".join(map(_csv_value, row)) + "\n" for row in rows).encode()
+
+
+class _ChunkSink:
+    # Write-only file object that hands back whatever the Parquet writer produced
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def encode_parquet(chunks):
+    # One row group per chunk, sent as soon as it is written; the footer comes last
+    sink = _ChunkSink()
+    writer = None
+    for time, channels in chunks:
+        table = pa.table({"Time": time, **channels})
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+        yield sink.drain()
+
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
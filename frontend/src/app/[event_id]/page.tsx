@@ -5,6 +5,23 @@ import Header from ".././components/Header";
 import Graph from ".././components/Graph";
 import LoadingPage from ".././components/LoadingPage";
 
+// Decode the backend's "columns" wire format: a uint32 header length, a JSON header,
+// then every column as little-endian float64 (see backend/wire.py)
+function decodeColumns(buffer: ArrayBuffer) {
+  const headerLength = new DataView(buffer).getUint32(0, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+  let offset = 4 + headerLength;
+  const series: Record<string, Record<string, Float64Array>> = {};
+  for (const [name, meta] of Object.entries<any>(header.series)) {
+    series[name] = {};
+    for (const column of meta.columns) {
+      series[name][column] = new Float64Array(buffer, offset, meta.length);
+      offset += meta.length * 8;
+    }
+  }
+  return { series, metrics: header.metrics, errors: header.errors };
+}
+
 export default function EventPage() {
   const { event_id } = useParams() ?? {};
   const eventId = Array.isArray(event_id) ? event_id[0] : event_id ?? "";
@@ -15,6 +32,8 @@ export default function EventPage() {
     dataRate: null,
     burnTime: null,
     peakMdot: null, // Add peakMdot to the data panel state
+    totalImpulse: null,
+    averageThrust: null,
   });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
@@ -27,158 +46,110 @@ export default function EventPage() {
     const fetchData = async () => {
       try {
         const endpoints = [
-          { key: "dp", url: `https://rp-analysis.onrender.com/${event_id}/dp`, label: "Differential Pressure (DP) vs Time", xAxis: "Time (s)", yAxis: "DP (PSI)", yField: "DP" },
-          { key: "tank", url: `https://rp-analysis.onrender.com/${event_id}/tank`, label: "Tank Pressure vs Time", xAxis: "Time (s)", yAxis: "Tank Pressure (PSI)", yField: "Tank" },
-          { key: "tanklc", url: `https://rp-analysis.onrender.com/${event_id}/tanklc`, label: "TankLC vs Time", xAxis: "Time (s)", yAxis: "TankLC (lbs)", yField: "TankLC" },
-          { key: "thrustlc", url: `https://rp-analysis.onrender.com/${event_id}/thrustlc`, label: "ThrustLC vs Time", xAxis: "Time (s)", yAxis: "ThrustLC (lbs)", yField: "ThrustLC" },
-          { key: "pressures", url: `https://rp-analysis.onrender.com/${event_id}/pressures`, label: "Pressures (Chamber, Manifold, Tank) vs Time", xAxis: "Time (s)", yAxis: "Pressure (PSI)", yFields: ["Chamber", "Manifold", "Tank"] },
-          { key: "mdot", url: `https://rp-analysis.onrender.com/${event_id}/mdot`, label: "Mass Flow Rate (Mdot) vs Time", xAxis: "Time (s)", yAxis: "Mdot (kg/s)", yField: "Mdot" },
-          { key: "stiff", url: `https://rp-analysis.onrender.com/${event_id}/stiff`, label: "Injector Stiffness vs Time", xAxis: "Time (s)", yAxis: "Stiffness", yField: "Stiffness" },
+          { key: "dp", label: "Differential Pressure (DP) vs Time", xAxis: "Time (s)", yAxis: "DP (PSI)", yField: "DP" },
+          { key: "tank", label: "Tank Pressure vs Time", xAxis: "Time (s)", yAxis: "Tank Pressure (PSI)", yField: "Tank" },
+          { key: "tanklc", label: "TankLC vs Time", xAxis: "Time (s)", yAxis: "TankLC (lbs)", yField: "TankLC" },
+          { key: "thrustlc", label: "ThrustLC vs Time", xAxis: "Time (s)", yAxis: "ThrustLC (lbs)", yField: "ThrustLC" },
+          { key: "pressures", label: "Pressures (Chamber, Manifold, Tank) vs Time", xAxis: "Time (s)", yAxis: "Pressure (PSI)", yFields: ["Chamber", "Manifold", "Tank"] },
+          { key: "mdot", label: "Mass Flow Rate (Mdot) vs Time", xAxis: "Time (s)", yAxis: "Mdot (kg/s)", yField: "Mdot" },
+          { key: "stiff", label: "Injector Stiffness vs Time", xAxis: "Time (s)", yAxis: "Stiffness", yField: "Stiffness" },
         ];
 
-        const graphData = await Promise.all(
-          endpoints.map(async (endpoint) => {
-            try {
-              const response = await fetch(endpoint.url);
-              if (!response.ok) throw new Error(`Failed to fetch ${endpoint.key} data`);
-              const result = await response.json();
-
-              // Handle multiple Y-fields (e.g., pressures)
-              if (endpoint.yFields) {
-                const datasets = endpoint.yFields.map((field) => ({
-                  label: field,
-                  data: result.data
-                    .map((point: any) => ({
-                      x: point.Time,
-                      y: point[field],
-                    })),
-                    //.filter((point: any) => point.y !== 500), // why did i do this???? >>
-                  borderColor: field === "Chamber" ? "#FF5733" : field === "Manifold" ? "#33C3FF" : "#33FF57", // Different colors for each field
-                  backgroundColor: "rgba(0, 0, 0, 0)", // Transparent background
-                }));
-
-                // Skip the graph if all datasets are empty
-                if (datasets.every((dataset) => dataset.data.length === 0)) {
-                  return null;
-                }
-
-                return {
-                  label: endpoint.label,
-                  xAxisLabel: endpoint.xAxis,
-                  yAxisLabel: endpoint.yAxis,
-                  datasets,
-                };
-              }
-
-              // Handle single Y-field
-              const data = result.data
-                .map((point: any) => ({
-                  x: point.Time,
-                  y: point[endpoint.yField],
-                }))
-                .filter((point: any) => point.y !== 500); // Exclude points with y = 500
-
-              // Skip the graph if the dataset is empty
-              if (data.length === 0) {
-                return null;
-              }
-
-              return {
-                label: endpoint.label,
-                xAxisLabel: endpoint.xAxis,
-                yAxisLabel: endpoint.yAxis,
-                datasets: [
-                  {
-                    label: endpoint.label,
-                    data,
-                    borderColor: "#1c2f50",
-                    backgroundColor: "rgba(28, 47, 80, 0.2)",
-                  },
-                ],
-              };
-            } catch (err) {
-              console.log(`${endpoint.label} graph is broken: ${err instanceof Error ? err.message : "Unknown error"}`);
-              return null; // Skip this graph if there's an error
-            }
-          })
-        );
+        // Fetch every series and metric in a single request (one database scan),
+        // as typed arrays rather than JSON points
+        const series = endpoints.map((endpoint) => endpoint.key).join(",");
+        const response = await fetch(`https://rp-analysis.onrender.com/${event_id}/dashboard?series=${series}&max_points=2000&format=columns`);
+        if (!response.ok) throw new Error("Failed to fetch event data");
+        const dashboard = decodeColumns(await response.arrayBuffer());
+
+        const graphData = endpoints.map((endpoint) => {
+          const columns = dashboard.series[endpoint.key];
+          if (!columns) {
+            console.log(`${endpoint.label} graph is broken: ${dashboard.errors[endpoint.key] ?? "Unknown error"}`);
+            return null; // Skip this graph if its series failed
+          }
 
-        // Filter out null graphs (failed endpoints or excluded graphs)
-        setGraphs(graphData.filter((graph) => graph !== null));
+          // Handle multiple Y-fields (e.g., pressures)
+          if (endpoint.yFields) {
+            const datasets = endpoint.yFields.map((field) => ({
+              label: field,
+              data: Array.from(columns.Time, (x, i) => ({
+                  x,
+                  y: columns[field][i],
+                })),
+                //.filter((point: any) => point.y !== 500), // why did i do this???? >>
+              borderColor: field === "Chamber" ? "#FF5733" : field === "Manifold" ? "#33C3FF" : "#33FF57", // Different colors for each field
+              backgroundColor: "rgba(0, 0, 0, 0)", // Transparent background
+            }));
+
+            // Skip the graph if all datasets are empty
+            if (datasets.every((dataset) => dataset.data.length === 0)) {
+              return null;
+            }
 
-        // Fetch data for the data panel
-        let peakThrust = null;
-        let peakChamber = null;
-        let dataRate = null;
-        let burnTime = null;
-        let peakMdot = null;
-
-        try {
-          const peakThrustResponse = await fetch(`https://rp-analysis.onrender.com/${event_id}/peakThrust`);
-          if (peakThrustResponse.ok) {
-            const thrustData = await peakThrustResponse.json();
-            peakThrust = thrustData.peakThrust;
-          } else {
-            console.log("Failed to fetch peak thrust data");
+            return {
+              label: endpoint.label,
+              xAxisLabel: endpoint.xAxis,
+              yAxisLabel: endpoint.yAxis,
+              datasets,
+            };
           }
-        } catch (err) {
-          console.log("Error fetching peak thrust:", err instanceof Error ? err.message : "Unknown error");
-        }
 
-        try {
-          const peakChamberResponse = await fetch(`https://rp-analysis.onrender.com/${event_id}/peakChamber`);
-          if (peakChamberResponse.ok) {
-            const chamberData = await peakChamberResponse.json();
-            peakChamber = chamberData.peakChamber;
-          } else {
-            console.log("Failed to fetch peak chamber data");
+          // Handle single Y-field
+          const values = columns[endpoint.yField as string];
+          const data = Array.from(columns.Time, (x, i) => ({
+              x,
+              y: values[i],
+            }))
+            .filter((point: any) => point.y !== 500); // Exclude points with y = 500
+
+          // Skip the graph if the dataset is empty
+          if (data.length === 0) {
+            return null;
           }
-        } catch (err) {
-          console.log("Error fetching peak chamber:", err instanceof Error ? err.message : "Unknown error");
-        }
 
-        try {
-          const dataRateResponse = await fetch(`https://rp-analysis.onrender.com/${event_id}/dataRate`);
-          if (dataRateResponse.ok) {
-            const rateData = await dataRateResponse.json();
-            dataRate = rateData.dataRate;
-          } else {
-            console.log("Failed to fetch data rate");
-          }
-        } catch (err) {
-          console.log("Error fetching data rate:", err instanceof Error ? err.message : "Unknown error");
-        }
+          return {
+            label: endpoint.label,
+            xAxisLabel: endpoint.xAxis,
+            yAxisLabel: endpoint.yAxis,
+            datasets: [
+              {
+                label: endpoint.label,
+                data,
+                borderColor: "#1c2f50",
+                backgroundColor: "rgba(28, 47, 80, 0.2)",
+              },
+            ],
+          };
+        });
 
-        try {
-          const burnTimeResponse = await fetch(`https://rp-analysis.onrender.com/${event_id}/burntime`);
-          if (burnTimeResponse.ok) {
-            const burnTimeData = await burnTimeResponse.json();
-            burnTime = burnTimeData.burn_time;
-          } else {
-            console.log("Failed to fetch burn time");
-          }
-        } catch (err) {
-          console.log("Error fetching burn time:", err instanceof Error ? err.message : "Unknown error");
-        }
+        // Filter out null graphs (failed series or excluded graphs)
+        setGraphs(graphData.filter((graph) => graph !== null));
 
-        try {
-          const peakMdotResponse = await fetch(`https://rp-analysis.onrender.com/${event_id}/peakMdot`);
-          if (peakMdotResponse.ok) {
-            const mdotData = await peakMdotResponse.json();
-            peakMdot = mdotData.peakMdot;
-          } else {
-            console.log("Failed to fetch peak Mdot data");
+        // Data panel values come from the same response
+        const metrics = dashboard.metrics;
+        for (const [key, message] of Object.entries(dashboard.errors)) {
+          if (!endpoints.some((endpoint) => endpoint.key === key)) {
+            console.log(`Failed to compute ${key}: ${message}`);
           }
-        } catch (err) {
-          console.log("Error fetching peak Mdot:", err instanceof Error ? err.message : "Unknown error");
         }
 
+        const peakThrust = metrics.peakThrust ?? null;
+        const peakChamber = metrics.peakChamber ?? null;
+        const dataRate = metrics.dataRate ?? null;
+        const burnTime = metrics.burntime?.burn_time ?? null;
+        const peakMdot = metrics.peakMdot ?? null;
+        const totalImpulse = metrics.totalImpulse ?? null;
+        const averageThrust = metrics.averageThrust ?? null;
+
         setDataPanelValues({
           peakThrust,
           peakChamber,
           dataRate,
           burnTime,
           peakMdot,
+          totalImpulse,
+          averageThrust,
         });
 
         setLoading(false);
@@ -216,7 +187,7 @@ export default function EventPage() {
           </div>
 
             {/* Data Panel */}
-            <div className="p-4 border border-gray-300 rounded-lg shadow-sm bg-white sticky top-28 h-72">
+            <div className="p-4 border border-gray-300 rounded-lg shadow-sm bg-white sticky top-28 h-96">
             <h2 className="text-2xl font-bold text-rp-blue mb-4">Data: {eventId}</h2>
             <ul className="space-y-4 text-lg text-rp-blue">
                 <li>
@@ -234,6 +205,12 @@ export default function EventPage() {
                 <li>
                 <strong>Peak Mdot:</strong> {dataPanelValues.peakMdot ?? "N/A"} kg/s
                 </li>
+                <li>
+                <strong>Total Impulse:</strong> {dataPanelValues.totalImpulse ?? "N/A"} lbf·s
+                </li>
+                <li>
+                <strong>Average Thrust:</strong> {dataPanelValues.averageThrust ?? "N/A"} lbs
+                </li>
             </ul>
             </div>
         </div>
@@ -0,0 +1,116 @@
+"use client";
+import { useState, useEffect } from "react";
+import Header from ".././components/Header";
+import Graph from ".././components/Graph";
+import LoadingPage from ".././components/LoadingPage";
+
+// Overlaid series, each as { key, label, yAxis, yField }
+const charts = [
+  { key: "thrustlc", label: "ThrustLC vs Time from Burn Start", yAxis: "ThrustLC (lbs)", yField: "ThrustLC" },
+  { key: "dp", label: "Differential Pressure (DP) vs Time from Burn Start", yAxis: "DP (PSI)", yField: "DP" },
+];
+
+const colors = ["#1c2f50", "#FF5733", "#33C3FF", "#33FF57", "#A833FF", "#FFB833"];
+
+const format = (value: number | null | undefined) => (value === null || value === undefined ? "N/A" : value.toFixed(2));
+
+export default function ComparePage() {
+  const [comparison, setComparison] = useState<any>(null);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState<string | null>(null);
+
+  const handleHomeClick = () => {
+    window.location.href = "/";
+  };
+
+  useEffect(() => {
+    // e.g. /compare?events=hf_1,hf_2,hf_3
+    const events = new URLSearchParams(window.location.search).get("events") ?? "";
+    const fetchComparison = async () => {
+      try {
+        const series = charts.map((chart) => chart.key).join(",");
+        const response = await fetch(
+          `https://rp-analysis.onrender.com/compare?events=${encodeURIComponent(events)}&series=${series}&max_points=1000`
+        );
+        const body = await response.json();
+        if (!response.ok) throw new Error(body.error ?? "Failed to fetch comparison");
+        setComparison(body);
+      } catch (err) {
+        setError(err instanceof Error ? err.message : "An unknown error occurred");
+      }
+      setLoading(false);
+    };
+
+    fetchComparison();
+  }, []);
+
+  if (loading) return <LoadingPage />;
+  if (error) return <p className="text-red-500">Error: {error}</p>;
+
+  const eventNames = comparison.table.map((row: any) => row.event);
+  const graphs = charts.map((chart) => ({
+    ...chart,
+    datasets: eventNames
+      .filter((event: string) => comparison.events[event].series?.[chart.key])
+      .map((event: string, index: number) => ({
+        label: event,
+        data: comparison.events[event].series[chart.key].map((point: any) => ({ x: point.Time, y: point[chart.yField] })),
+        borderColor: colors[index % colors.length],
+        backgroundColor: "rgba(0, 0, 0, 0)",
+      })),
+  }));
+
+  return (
+    <div className="bg-gray-100 min-h-screen">
+      {/* Header */}
+      <Header onHomeClick={handleHomeClick} />
+
+      <div className="p-6 space-y-6">
+        {/* Metrics Table */}
+        <table className="w-full bg-white border border-gray-300 rounded-lg shadow-sm text-rp-blue">
+          <thead>
+            <tr className="text-left border-b border-gray-300">
+              <th className="p-2">Event</th>
+              <th className="p-2">Peak Thrust (lbs)</th>
+              <th className="p-2">Peak Chamber (PSI)</th>
+              <th className="p-2">Peak Mdot (kg/s)</th>
+              <th className="p-2">Burn Time (s)</th>
+              <th className="p-2">Total Impulse (lbf·s)</th>
+              <th className="p-2">Average Thrust (lbs)</th>
+              <th className="p-2">Data Rate (Hz)</th>
+            </tr>
+          </thead>
+          <tbody>
+            {comparison.table.map((row: any) => (
+              <tr key={row.event} className="border-b border-gray-200">
+                <td className="p-2 font-bold">{row.event}</td>
+                <td className="p-2">{format(row.peakThrust)}</td>
+                <td className="p-2">{format(row.peakChamber)}</td>
+                <td className="p-2">{format(row.peakMdot)}</td>
+                <td className="p-2">{format(row.burnTime)}</td>
+                <td className="p-2">{format(row.totalImpulse)}</td>
+                <td className="p-2">{format(row.averageThrust)}</td>
+                <td className="p-2">{format(row.dataRate)}</td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+
+        {/* Overlaid Graphs */}
+        <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
+          {graphs
+            .filter((graph) => graph.datasets.length > 0)
+            .map((graph) => (
+              <Graph
+                key={graph.key}
+                labels={graph.datasets[0].data.map((point: any) => point.x.toFixed(2))}
+                datasets={graph.datasets}
+                xAxisLabel="Time from Burn Start (s)"
+                yAxisLabel={graph.yAxis}
+              />
+            ))}
+        </div>
+      </div>
+    </div>
+  );
+}
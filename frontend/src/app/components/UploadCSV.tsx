@@ -11,6 +11,7 @@ interface UploadCSVProps {
 export default function UploadCSV({ onClose }: UploadCSVProps) {
   const [file, setFile] = useState<File | null>(null);
   const [csvName, setCsvName] = useState("");
+  const [author, setAuthor] = useState("");
   const [headers, setHeaders] = useState<string[]>([]);
   const [selectedTags, setSelectedTags] = useState<{ [header: string]: string }>({});
   const [notification, setNotification] = useState<{
@@ -69,6 +70,7 @@ export default function UploadCSV({ onClose }: UploadCSVProps) {
     formData.append("file", file);
     formData.append("tags", JSON.stringify(selectedTags));
     formData.append("new_csv_name", csvName);
+    if (author) formData.append("author", author);
 
     try {
       const response = await fetch("https://rp-analysis.onrender.com/upload", {
@@ -76,12 +78,22 @@ export default function UploadCSV({ onClose }: UploadCSVProps) {
         body: formData,
       });
 
-      if (response.ok) {
-        setNotification({ message: `Successfully uploaded ${csvName}`, type: "success" });
+      if (!response.ok) {
+        setNotification({ message: "Unsuccessful upload", type: "error" });
+        return;
+      }
+
+      // The backend ingests in the background; poll the job until it finishes
+      const { job_id } = await response.json();
+      setNotification({ message: `Processing ${csvName}...`, type: "success" });
+
+      const job = await waitForJob(job_id);
+      if (job.status === "succeeded") {
+        setNotification({ message: `Successfully uploaded ${csvName} (${job.rows_inserted} rows)`, type: "success" });
         resetState();
         onClose();
       } else {
-        setNotification({ message: "Unsuccessful upload", type: "error" });
+        setNotification({ message: job.error ?? "Unsuccessful upload", type: "error" });
       }
     } catch (error) {
       console.error("Error uploading file:", error);
@@ -89,9 +101,22 @@ export default function UploadCSV({ onClose }: UploadCSVProps) {
     }
   };
 
+  const waitForJob = async (jobId: string) => {
+    while (true) {
+      const response = await fetch(`https://rp-analysis.onrender.com/jobs/${jobId}`);
+      if (!response.ok) throw new Error("Failed to fetch upload status");
+      const job = await response.json();
+      if (job.status === "succeeded" || job.status === "failed") {
+        return job;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+  };
+
   const resetState = () => {
     setFile(null);
     setCsvName("");
+    setAuthor("");
     setHeaders([]);
     setSelectedTags({});
   };
@@ -144,6 +169,17 @@ export default function UploadCSV({ onClose }: UploadCSVProps) {
               <p className="text-sm text-gray-500">Example: id_event_MMDDYY</p>
             </div>
 
+            <div className="mb-6">
+              <label className="block text-sm font-medium text-gray-700 mb-1">Author</label>
+              <input
+                type="text"
+                value={author}
+                onChange={(e) => setAuthor(e.target.value)}
+                placeholder="Enter your name"
+                className="block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-[var(--color-rp-blue)] focus:border-[var(--color-rp-blue)] sm:text-sm"
+              />
+            </div>
+
             {/* Dropdowns for headers */}
             {headers.length > 0 && (
               <div className="grid grid-cols-1 md:grid-cols-2 gap-2">
@@ -0,0 +1,146 @@
+"use client";
+import { useParams } from "next/navigation";
+import { useState, useEffect, useRef } from "react";
+import Header from "../.././components/Header";
+import Graph from "../.././components/Graph";
+
+// Points kept per chart while a test is running (older points scroll off)
+const MAX_POINTS = 3000;
+
+// How often buffered updates are drawn, in ms
+const REDRAW_INTERVAL = 250;
+
+const charts = [
+  { key: "pressures", label: "Pressures (Chamber, Manifold, Tank) vs Time", yAxis: "Pressure (PSI)", yFields: ["Chamber", "Manifold", "Tank"] },
+  { key: "dp", label: "Differential Pressure (DP) vs Time", yAxis: "DP (PSI)", yFields: ["DP"] },
+  { key: "thrustlc", label: "ThrustLC vs Time", yAxis: "ThrustLC (lbs)", yFields: ["ThrustLC"] },
+  { key: "mdot", label: "Mass Flow Rate (Mdot) vs Time", yAxis: "Mdot (kg/s)", yFields: ["Mdot"] },
+  { key: "stiff", label: "Injector Stiffness vs Time", yAxis: "Stiffness", yFields: ["Stiffness"] },
+];
+
+const colors = ["#1c2f50", "#FF5733", "#33C3FF", "#33FF57"];
+
+export default function LiveEventPage() {
+  const { event_id } = useParams() ?? {};
+  const eventId = Array.isArray(event_id) ? event_id[0] : event_id ?? "";
+  const series = useRef<{ [key: string]: { [field: string]: number[] } }>({});
+  const [version, setVersion] = useState(0);
+  const [status, setStatus] = useState("Connecting...");
+  const [panel, setPanel] = useState<any>({ rows: 0, metrics: {}, burns: [] });
+
+  const handleHomeClick = () => {
+    window.location.href = "/";
+  };
+
+  useEffect(() => {
+    const source = new EventSource(`https://rp-analysis.onrender.com/live/${event_id}/stream`);
+    let dirty = false;
+
+    source.addEventListener("snapshot", (event) => {
+      setPanel(JSON.parse((event as MessageEvent).data));
+      setStatus("Live");
+    });
+
+    // Each update carries the new (downsampled) points of every series
+    source.addEventListener("update", (event) => {
+      const update = JSON.parse((event as MessageEvent).data);
+      for (const [key, columns] of Object.entries<any>(update.series)) {
+        const current = (series.current[key] ??= {});
+        for (const [field, values] of Object.entries<number[]>(columns)) {
+          const merged = (current[field] ?? []).concat(values);
+          current[field] = merged.length > MAX_POINTS ? merged.slice(merged.length - MAX_POINTS) : merged;
+        }
+      }
+      setPanel(update);
+      dirty = true;
+    });
+
+    source.addEventListener("end", (event) => {
+      setPanel(JSON.parse((event as MessageEvent).data));
+      setStatus("Finished");
+      source.close();
+      dirty = true;
+    });
+
+    source.onerror = () => setStatus("Disconnected");
+
+    // Redraw at a fixed rate rather than once per batch
+    const timer = setInterval(() => {
+      if (dirty) {
+        dirty = false;
+        setVersion((v) => v + 1);
+      }
+    }, REDRAW_INTERVAL);
+
+    return () => {
+      clearInterval(timer);
+      source.close();
+    };
+  }, [event_id]);
+
+  const graphs = charts
+    .filter((chart) => series.current[chart.key]?.Time?.length)
+    .map((chart) => {
+      const columns = series.current[chart.key];
+      return {
+        ...chart,
+        labels: columns.Time.map((time) => time.toFixed(2)),
+        datasets: chart.yFields.map((field, index) => ({
+          label: field,
+          data: columns.Time.map((x, i) => ({ x, y: columns[field][i] })),
+          borderColor: colors[index % colors.length],
+          backgroundColor: "rgba(0, 0, 0, 0)",
+        })),
+      };
+    });
+
+  const lastBurn = panel.burns?.[panel.burns.length - 1];
+  const burnState = !lastBurn ? "Waiting for flow" : lastBurn.end_time === null ? "Burning" : `${panel.burns.length} burn(s) complete`;
+
+  return (
+    <div className="bg-gray-100 min-h-screen" data-version={version}>
+      {/* Header */}
+      <Header onHomeClick={handleHomeClick} />
+
+      {/* Main Content */}
+      <div className="p-6">
+        <div className="grid grid-cols-1 lg:grid-cols-4 gap-6">
+          {/* Graphs */}
+          <div className="lg:col-span-3 grid grid-cols-1 lg:grid-cols-2 gap-6">
+            {graphs.map((graph) => (
+              <Graph
+                key={graph.key}
+                labels={graph.labels}
+                datasets={graph.datasets as any}
+                xAxisLabel="Time (s)"
+                yAxisLabel={graph.yAxis}
+              />
+            ))}
+          </div>
+
+          {/* Data Panel */}
+          <div className="p-4 border border-gray-300 rounded-lg shadow-sm bg-white sticky top-28 h-80">
+            <h2 className="text-2xl font-bold text-rp-blue mb-4">Live: {eventId}</h2>
+            <ul className="space-y-4 text-lg text-rp-blue">
+              <li>
+                <strong>Status:</strong> {status} ({burnState})
+              </li>
+              <li>
+                <strong>Samples:</strong> {panel.rows ?? 0}
+              </li>
+              <li>
+                <strong>Peak Thrust (LC):</strong> {panel.metrics?.peakThrust?.toFixed(2) ?? "N/A"} lbs
+              </li>
+              <li>
+                <strong>Peak Chamber Pressure:</strong> {panel.metrics?.peakChamber?.toFixed(2) ?? "N/A"} PSI
+              </li>
+              <li>
+                <strong>Peak Mdot:</strong> {panel.metrics?.peakMdot?.toFixed(2) ?? "N/A"} kg/s
+              </li>
+            </ul>
+          </div>
+        </div>
+      </div>
+    </div>
+  );
+}
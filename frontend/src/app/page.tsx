@@ -13,6 +13,7 @@ interface Collection {
 export default function Home() {
   const [isPanelOpen, setIsPanelOpen] = useState(false);
   const [collections, setCollections] = useState<Collection[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   const handleNewDataClick = () => {
     setIsPanelOpen(true); // Open the panel
@@ -26,22 +27,25 @@ export default function Home() {
     window.location.href = "/";
   };
 
-  // Fetch collections from the backend
-  useEffect(() => {
-    const fetchCollections = async () => {
-      try {
-        const response = await fetch("https://rp-analysis.onrender.com/collections");
-        if (response.ok) {
-          const data = await response.json();
-          setCollections(data.collections);
-        } else {
-          console.error("Failed to fetch collections");
-        }
-      } catch (error) {
-        console.error("Error fetching collections:", error);
+  // Fetch collections from the backend, one page at a time
+  const fetchCollections = async (cursor: string | null = null) => {
+    try {
+      const url = new URL("https://rp-analysis.onrender.com/collections");
+      if (cursor) url.searchParams.set("cursor", cursor);
+      const response = await fetch(url.toString());
+      if (response.ok) {
+        const data = await response.json();
+        setCollections((prev) => (cursor ? [...prev, ...data.collections] : data.collections));
+        setNextCursor(data.nextCursor ?? null);
+      } else {
+        console.error("Failed to fetch collections");
       }
-    };
+    } catch (error) {
+      console.error("Error fetching collections:", error);
+    }
+  };
 
+  useEffect(() => {
     fetchCollections();
   }, []);
 
@@ -86,6 +90,17 @@ export default function Home() {
             <p className="text-gray-500">No collections found.</p>
           )}
         </div>
+
+        {nextCursor && (
+          <div className="flex justify-center mt-6">
+            <button
+              onClick={() => fetchCollections(nextCursor)}
+              className="px-4 py-2 border border-[var(--color-rp-blue)] text-[var(--color-rp-blue)] rounded-md shadow-sm hover:bg-[var(--color-rp-blue)] hover:text-white transition duration-200"
+            >
+              Load More
+            </button>
+          </div>
+        )}
       </main>
 
       {/* Upload CSV Panel */}